@@ -0,0 +1,142 @@
+"""Near-duplicate index benchmark: lookup latency and recall as the history grows.
+
+Run from the repository root:
+
+    python benchmarks/bench_dedup.py [--entries N] [--queries N] [--lookup-budget-ms MS]
+
+Indexes N synthetic ideas, then times IdeaIndex lookups for planted
+near-duplicates (which must be found) and for unrelated ideas (which must
+not). Signature hashing is reported separately because it does not depend on
+the history size. Also reports the reload time from the index file and the
+index's memory. Fails if p99 lookup time exceeds the budget or recall drops.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from projectflow_core import DEDUP_DEFAULTS, IdeaIndex  # noqa: E402
+
+WORDS = ("redstone piston hopper comparator observer repeater dispenser dropper minecart rail village castle "
+         "tower bridge farm wheat sugar cane iron golem trader library enchanting brewing nether portal end "
+         "elytra beacon mob spawner arena parkour maze puzzle lock door elevator sorter storage kitchen garden "
+         "lighthouse harbor ship submarine aquarium volcano mountain desert jungle swamp snow igloo pyramid "
+         "temple tomb dungeon vault bank shop market clock calendar calculator display scoreboard timer "
+         "plugin datapack mod command block function predicate loot table recipe advancement texture model "
+         "shader sound animation gui inventory hotbar chat economy quest npc dialog teleport warp spawn").split()
+
+
+class FakeStore:
+    """The two history-store methods IdeaIndex.load() uses"""
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def entry_ids(self):
+        return [entry['id'] for entry in self.entries]
+
+    def iter_entries(self):
+        return iter(self.entries)
+
+
+def random_idea(rng, number):
+    words = rng.sample(WORDS, 18)
+    return {'name': f"{' '.join(words[:3]).title()} {number}",
+            'description': ' '.join(words[3:14]),
+            'key_features': [' '.join(words[14:16]), ' '.join(words[16:18])]}
+
+
+def near_duplicate(rng, idea):
+    """The same idea with one word of the description swapped, as a model would reword it"""
+    words = idea['description'].split()
+    words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return dict(idea, description=' '.join(words))
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--lookup-budget-ms', type=float, default=1.0, help="max p99 lookup time")
+    parser.add_argument('--min-recall', type=float, default=0.95)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    ideas = [random_idea(rng, number) for number in range(args.entries)]
+    entries = [{'id': number + 1, 'project': idea} for number, idea in enumerate(ideas)]
+    failures = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'history.minhash')
+        index = IdeaIndex(dict(DEDUP_DEFAULTS), path)
+        started = time.perf_counter()
+        index.load(FakeStore(entries))
+        build = time.perf_counter() - started
+
+        index.close()
+        reloaded = IdeaIndex(dict(DEDUP_DEFAULTS), path)
+        started = time.perf_counter()
+        reloaded.load(FakeStore(entries))
+        reload_time = time.perf_counter() - started
+
+        tracemalloc.start()
+        traced = IdeaIndex(dict(DEDUP_DEFAULTS), path)
+        traced.load(FakeStore(entries))
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del traced
+
+        duplicates = [near_duplicate(rng, rng.choice(ideas)) for _ in range(args.queries)]
+        unrelated = [random_idea(rng, args.entries + number) for number in range(args.queries)]
+        hashing, lookups, found, false_hits = [], [], 0, 0
+        for queries, is_duplicate in ((duplicates, True), (unrelated, False)):
+            for project in queries:
+                started = time.perf_counter()
+                signature = reloaded.signature(project)
+                hashed = time.perf_counter()
+                matches = reloaded.query_signature(signature)
+                hashing.append(hashed - started)
+                lookups.append(time.perf_counter() - hashed)
+                if is_duplicate:
+                    found += bool(matches)
+                else:
+                    false_hits += bool(matches)
+
+        started = time.perf_counter()
+        for number in range(1000):
+            reloaded.add(args.entries + number + 1, unrelated[number % len(unrelated)])
+        add_time = (time.perf_counter() - started) / 1000
+        reloaded.close()
+
+    recall = found / len(duplicates)
+    lookup_p99 = percentile(lookups, 0.99) * 1000
+    print(f"{args.entries} ideas: built in {build:.1f}s, reloaded from file in {reload_time:.2f}s, "
+          f"{memory / 1024 / 1024:.1f} MB ({memory / args.entries:.0f} B/idea)")
+    print(f"signature: p50 {percentile(hashing, 0.5) * 1000:.3f} ms, p99 {percentile(hashing, 0.99) * 1000:.3f} ms")
+    print(f"lookup:    p50 {percentile(lookups, 0.5) * 1000:.3f} ms, p99 {lookup_p99:.3f} ms")
+    print(f"add:       {add_time * 1000:.3f} ms per idea (signature + sorted insert + file append)")
+    print(f"recall {recall:.1%} on near-duplicates, {false_hits} false matches on {len(unrelated)} unrelated ideas")
+
+    if lookup_p99 > args.lookup_budget_ms:
+        failures.append(f"p99 lookup {lookup_p99:.3f} ms > budget {args.lookup_budget_ms} ms")
+    if recall < args.min_recall:
+        failures.append(f"recall {recall:.1%} < {args.min_recall:.0%}")
+    if false_hits > len(unrelated) * 0.01:
+        failures.append(f"{false_hits} false matches")
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
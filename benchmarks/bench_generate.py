@@ -0,0 +1,227 @@
+"""Offline end-to-end benchmark: generation, batch and history against a local mock provider.
+
+Run from the repository root:
+
+    python benchmarks/bench_generate.py [--count N] [--latency S] [--cassette FILE]
+                                        [--save-baseline FILE | --baseline FILE] [--json]
+
+Every backend in AI_BACKENDS is pointed at benchmarks/mock_provider.py, so no
+keys or network are needed. Each scenario reports ideas (or operations) per
+second, p50/p99 latency, parse time and the peak Python memory of a traced
+repeat run. It fails on failed generations; with --baseline it also fails
+when throughput drops or p99 latency rises by more than --tolerance.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_provider import MockProvider, load_cassette, synthetic_response  # noqa: E402
+from projectflow_core import AI_BACKENDS, LocalAICodeGenerator  # noqa: E402
+from projectflow_cli import run_batch  # noqa: E402
+
+# Client-side limits high enough that the benchmark measures the client, not the limiter
+BENCH_RATE_LIMIT = {'requests_per_minute': 1000000, 'tokens_per_minute': None,
+                    'initial_concurrency': 64, 'max_concurrency': 64}
+
+PREFERENCES = [
+    {'skill_level': 'beginner', 'interests': ['redstone'], 'time': 'short', 'focus': 'builds'},
+    {'skill_level': 'intermediate', 'interests': ['mods', 'java'], 'time': 'medium', 'focus': 'mods'},
+    {'skill_level': 'advanced', 'interests': ['datapacks'], 'time': 'long', 'focus': 'general'},
+]
+
+
+def quantile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class Timer:
+    """Collects per-operation latencies for one scenario"""
+
+    def __init__(self):
+        self.samples = []
+        self.failures = 0
+
+    def measure(self, func, *args, **kwargs):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.samples.append(time.perf_counter() - started)
+        return result
+
+
+def make_generator(directory: str, name: str, **settings) -> LocalAICodeGenerator:
+    history = {'database_file': os.path.join(directory, f"{name}.db"), 'fsync': False}
+    return LocalAICodeGenerator(silent=True, history=history, cache={'enabled': False}, **settings)
+
+
+def scenario_generate(directory, count, backend='openai', stream=False):
+    """Sequential generate_project_idea calls, saved to history"""
+    generator = make_generator(directory, f"generate-{backend}-{stream}")
+    timer = Timer()
+    on_chunk = (lambda text: None) if stream else None
+    try:
+        for number in range(count):
+            project = timer.measure(generator.generate_project_idea, PREFERENCES[number % len(PREFERENCES)],
+                                    backend, on_chunk=on_chunk)
+            if project is None:
+                timer.failures += 1
+    finally:
+        generator.close()
+    return timer, count
+
+
+def scenario_batch(directory, count, concurrency=4, ideas_per_request=1):
+    """run_batch over `count` JSONL records; latency is the generation time of each record's request"""
+    generator = make_generator(directory, f"batch-{ideas_per_request}", selected_backend='openai',
+                               multi_idea={'ideas_per_request': ideas_per_request})
+    lines = [json.dumps(dict(PREFERENCES[number % len(PREFERENCES)], id=number)) for number in range(count)]
+    output = io.StringIO()
+    timer = Timer()
+    try:
+        stats = timer.measure(run_batch, generator, lines, output, concurrency=concurrency)
+    finally:
+        generator.close()
+    timer.failures = stats['failed']
+    timer.samples = [result['project']['latency']['total']
+                     for result in map(json.loads, output.getvalue().splitlines()) if 'project' in result]
+    return timer, count
+
+
+def scenario_history(directory, count):
+    """save_suggestion, then full-text search and paging over what was saved"""
+    generator = make_generator(directory, 'history')
+    timer = Timer()
+    try:
+        for number in range(count):
+            project = generator.parse_ai_response(synthetic_response(number))
+            timer.measure(generator.save_suggestion, {'project': project, 'user_input': PREFERENCES[number % 3],
+                                                      'backend': 'openai'})
+        for number in range(max(1, count // 10)):
+            timer.measure(generator.search_history, query=['redstone', 'datapack', 'farm'][number % 3], limit=50)
+            timer.measure(generator.history_page, (number * 50) % max(count, 1), 50)
+            timer.measure(generator.count_history, difficulty='beginner')
+    finally:
+        generator.close()
+    return timer, len(timer.samples)
+
+
+def parse_time(texts, repeat=200):
+    """Mean microseconds parse_ai_response spends per response"""
+    generator = LocalAICodeGenerator(silent=True, defer_startup=True)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            generator.parse_ai_response(text)
+    return (time.perf_counter() - started) / (repeat * len(texts)) * 1e6
+
+
+def run_scenario(func, directory, count, **kwargs):
+    """Timed run, then a smaller traced run for peak memory"""
+    started = time.perf_counter()
+    timer, operations = func(directory, count, **kwargs)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    try:
+        func(directory, max(10, count // 10), **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'operations': operations,
+        'per_sec': round(operations / elapsed, 2),
+        'p50_ms': round(quantile(timer.samples, 0.5) * 1000, 2),
+        'p99_ms': round(quantile(timer.samples, 0.99) * 1000, 2),
+        'mean_ms': round(statistics.mean(timer.samples) * 1000, 2),
+        'failures': timer.failures,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of `results` against a saved baseline"""
+    failures = []
+    for name, result in results.items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        if result['per_sec'] < before['per_sec'] * (1 - tolerance):
+            failures.append(f"{name}: {result['per_sec']}/s vs baseline {before['per_sec']}/s")
+        if result['p99_ms'] > before['p99_ms'] * (1 + tolerance):
+            failures.append(f"{name}: p99 {result['p99_ms']} ms vs baseline {before['p99_ms']} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200, help="generations per scenario")
+    parser.add_argument('--latency', type=float, default=0.02, help="mock provider latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--idea-latency', type=float, default=0.004,
+                        help="mock seconds per extra idea in a multi-idea response")
+    parser.add_argument('--cassette', help="replay recorded responses instead of synthetic ones")
+    parser.add_argument('--baseline', help="fail on regressions against this saved result")
+    parser.add_argument('--save-baseline', help="write this run's results here")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    for backend in AI_BACKENDS.values():
+        backend['rate_limit'] = dict(BENCH_RATE_LIMIT)
+        backend['http'] = {'prewarm': False}
+    mock_settings = {'latency': args.latency, 'jitter': args.jitter, 'idea_latency': args.idea_latency, 'seed': 1}
+    texts = load_cassette(args.cassette) if args.cassette else [synthetic_response(n) for n in range(10)]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        with MockProvider(mock_settings, args.cassette) as provider:
+            provider.point_backends()
+            results['generate (openai format)'] = run_scenario(scenario_generate, directory, args.count)
+            results['generate (gemini format)'] = run_scenario(scenario_generate, directory, args.count,
+                                                               backend='google')
+            results['generate streaming'] = run_scenario(scenario_generate, directory, args.count, stream=True)
+            results['batch x4'] = run_scenario(scenario_batch, directory, args.count)
+            results['batch x4, 5 ideas/request'] = run_scenario(scenario_batch, directory, args.count,
+                                                                ideas_per_request=5)
+        # Failures and throttling on every backend: measures retries and fallbacks
+        flaky = dict(mock_settings, error_rate=0.1, throttle_rate=0.05, retry_after=0)
+        with MockProvider(flaky, args.cassette) as provider:
+            provider.point_backends()
+            results['generate, 10% 500s + 5% 429s'] = run_scenario(scenario_generate, directory, args.count)
+        results['history ops'] = run_scenario(scenario_history, directory, args.count * 5)
+    parse_us = round(parse_time(texts), 1)
+
+    failures = [f"{name}: {result['failures']} failed" for name, result in results.items() if result['failures']]
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            failures += compare(results, json.load(f), args.tolerance)
+    report = {'mock_latency': args.latency, 'parse_us': parse_us, 'scenarios': results}
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"mock latency {args.latency * 1000:.0f} ms (+{args.jitter * 1000:.0f} ms jitter), "
+              f"parse_ai_response {parse_us} us/response")
+        print(f"{'scenario':32} {'ops':>6} {'per sec':>9} {'p50 ms':>8} {'p99 ms':>8} {'peak KB':>9} {'failed':>7}")
+        for name, result in results.items():
+            print(f"{name:32} {result['operations']:>6} {result['per_sec']:>9} {result['p50_ms']:>8} "
+                  f"{result['p99_ms']:>8} {result['peak_kb']:>9} {result['failures']:>7}")
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Microbenchmark: extract_json_object vs. the previous regex-based parser.
+
+Run from the repository root:
+
+    python benchmarks/bench_parse.py [--repeat N]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from projectflow_core import extract_json_object  # noqa: E402
+
+
+PROJECT = {
+    "name": "Redstone Sorting Factory",
+    "description": "An automatic item sorter with {curly} text and \"quotes\" inside strings",
+    "technologies": ["Minecraft Java Edition", "Redstone"],
+    "difficulty": "intermediate",
+    "estimated_duration": "1-2 weeks",
+    "key_features": ["Hopper chains", "Overflow protection", "Comparator clocks"],
+    "learning_outcomes": ["Redstone timing", "Item filtering"],
+}
+
+
+def legacy_extract(response_text):
+    """The JSON stage of parse_ai_response before the single-pass extractor"""
+    json_match = re.search(r'```json\n(.*?)\n```', response_text, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except ValueError:
+            pass
+    matches = re.findall(r'\{.*\}', response_text, re.DOTALL)
+    if matches:
+        try:
+            return json.loads(matches[-1])
+        except ValueError:
+            pass
+    return None
+
+
+def build_cases():
+    body = json.dumps(PROJECT, indent=2)
+    chatter = "Here is a detailed idea that fits your skill level and interests. " * 40 + "\n"
+    return {
+        'typical fenced': f"Sure!\n```json\n{body}\n```\nHave fun building it.",
+        'fence, no trailing newline': f"```json\n{body}```",
+        'large chatty (~300 KB)': chatter * 60 + body + "\n" + chatter * 60,
+        'prose braces around object': "Use {curly} notes like {this}.\n" * 500 + body + "\nThat's it {ok}.",
+        'two objects, last wins': json.dumps({"name": "draft"}) + "\nFinal answer:\n" + body,
+        'adversarial: trailing open braces': body + "{" * 20000,
+        'adversarial: unclosed fences': body + "```json\nx" * 5000,
+        'adversarial: stray brace before object': "Remember { to plan.\n" + body,
+    }
+
+
+def best_time(func, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'case':40} {'size':>8} {'legacy ms':>10} {'new ms':>8} {'speedup':>8}  found (legacy/new)")
+    failures = []
+    for name, text in build_cases().items():
+        legacy = best_time(legacy_extract, text, args.repeat)
+        new = best_time(extract_json_object, text, args.repeat)
+        legacy_found = legacy_extract(text) == PROJECT
+        new_found = extract_json_object(text) == PROJECT
+        print(f"{name:40} {len(text):>8} {legacy * 1000:>10.3f} {new * 1000:>8.3f} "
+              f"{legacy / new:>7.1f}x  {'yes' if legacy_found else 'no'}/{'yes' if new_found else 'no'}")
+        if not new_found:
+            failures.append(f"{name}: not extracted")
+        elif legacy_found and new > legacy:
+            failures.append(f"{name}: slower than legacy")
+
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Startup benchmark: import cost of the headless core and the GUI's time to first paint.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--repeat N] [--import-budget-ms MS] [--paint-budget-ms MS]
+
+Each measurement runs in a fresh interpreter (bytecode is compiled once up front,
+as it would be after the first launch). The import phase reports
+`python -X importtime` cumulative times and fails if the core pulls in Tk,
+requests or other heavy modules. The paint phase opens the window over a
+history database of --history-entries rows and is skipped without a display.
+"""
+import argparse
+import compileall
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the headless core must not import eagerly
+HEAVY_MODULES = ['tkinter', 'requests', 'urllib3', 'sqlite3', 'http.server', 'concurrent.futures']
+
+IMPORT_PROBE = """
+import sys
+import {module}
+print('LOADED', ','.join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+PAINT_PROBE = """
+import time
+started = time.perf_counter()
+import sys
+sys.path.insert(0, {root!r})
+import projectflow_core
+projectflow_core.HTTP_POOL_DEFAULTS['prewarm'] = False  # no network in the benchmark
+import tkinter as tk
+from projectflow_gui import AICodeSuggestorGUI
+
+root = tk.Tk()
+app = AICodeSuggestorGUI(root)
+marks = {{}}
+
+def on_expose(event):
+    marks.setdefault('paint', time.perf_counter() - started)
+
+def poll():
+    if 'paint' in marks and app.status_bar.cget('text').startswith('Loaded'):
+        marks['history'] = time.perf_counter() - started
+        root.destroy()
+    else:
+        root.after(5, poll)
+
+root.bind('<Expose>', on_expose)
+root.after(5, poll)
+root.after(30000, root.destroy)
+root.mainloop()
+print('PAINT', marks.get('paint', -1), 'HISTORY', marks.get('history', -1))
+"""
+
+
+def clean_env():
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env['PYTHONPATH'] = ROOT
+    return env
+
+
+def measure_import(module, repeat):
+    """Best cumulative import time in ms and the heavy modules it loaded"""
+    best, loaded = float('inf'), ''
+    probe = IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe], cwd=ROOT, env=clean_env(),
+                                capture_output=True, text=True, check=True)
+        for line in result.stderr.splitlines():
+            match = re.match(r'import time:\s+\d+ \|\s+(\d+) \| (\S+)$', line)
+            if match and match.group(2) == module:
+                best = min(best, int(match.group(1)) / 1000)
+        loaded = result.stdout.split('LOADED', 1)[1].strip()
+    return best, [name for name in loaded.split(',') if name]
+
+
+def seed_history(directory, entries):
+    """A history database of `entries` rows in the GUI's default location"""
+    sys.path.insert(0, ROOT)
+    from projectflow_core import HISTORY_DEFAULTS, SQLiteHistoryStore
+    settings = dict(HISTORY_DEFAULTS, database_file=os.path.join(directory, HISTORY_DEFAULTS['database_file']),
+                    fsync=False)
+    store = SQLiteHistoryStore(settings)
+    for i in range(entries):
+        store.append({'timestamp': f"2026-01-01T00:00:{i % 60:02d}", 'backend': ['openai', 'mistral', 'google'][i % 3],
+                      'user_input': {'skill_level': 'beginner'},
+                      'project': {'name': f"Project {i}", 'description': "A redstone build " * 8,
+                                  'difficulty': 'beginner', 'technologies': ['Redstone']}})
+    store.close()
+
+
+def measure_paint(repeat, entries):
+    """Best (first paint, history shown) in ms, or None without a display"""
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        return None
+    best_paint = best_history = float('inf')
+    with tempfile.TemporaryDirectory() as directory:
+        seed_history(directory, entries)
+        for _ in range(repeat):
+            result = subprocess.run([sys.executable, '-c', PAINT_PROBE.format(root=ROOT)], cwd=directory,
+                                    env=clean_env(), capture_output=True, text=True, timeout=60)
+            match = re.search(r'PAINT (\S+) HISTORY (\S+)', result.stdout)
+            if not match:
+                raise RuntimeError(result.stderr.strip() or "GUI probe printed nothing")
+            best_paint = min(best_paint, float(match.group(1)) * 1000)
+            best_history = min(best_history, float(match.group(2)) * 1000)
+    return best_paint, best_history
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--import-budget-ms', type=float, default=25.0,
+                        help="max cumulative import time of projectflow_core")
+    parser.add_argument('--paint-budget-ms', type=float, default=800.0,
+                        help="max time from interpreter start to the first painted frame")
+    parser.add_argument('--history-entries', type=int, default=20000)
+    args = parser.parse_args()
+
+    compileall.compile_dir(ROOT, maxlevels=0, quiet=1)
+    failures = []
+
+    print(f"{'module':20} {'import ms':>10}  heavy modules loaded")
+    for module in ('projectflow_core', 'main', 'projectflow_cli', 'projectflow_gui'):
+        ms, loaded = measure_import(module, args.repeat)
+        print(f"{module:20} {ms:>10.1f}  {', '.join(loaded) or '-'}")
+        if module in ('projectflow_core', 'main'):
+            if loaded:
+                failures.append(f"{module} imports {', '.join(loaded)} eagerly")
+            if module == 'projectflow_core' and ms > args.import_budget_ms:
+                failures.append(f"{module} import {ms:.1f} ms > budget {args.import_budget_ms:.0f} ms")
+
+    paint = measure_paint(args.repeat, args.history_entries)
+    if paint is None:
+        print("first paint: skipped (no display)")
+    else:
+        print(f"first paint: {paint[0]:.0f} ms, history shown: {paint[1]:.0f} ms "
+              f"({args.history_entries} entries)")
+        if paint[0] > args.paint_budget_ms:
+            failures.append(f"first paint {paint[0]:.0f} ms > budget {args.paint_budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
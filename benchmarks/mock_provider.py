@@ -0,0 +1,337 @@
+"""Local stand-in for the AI providers, for benchmarks that need neither keys nor network.
+
+Speaks the OpenAI-compatible `chat/completions` format (also used by Mistral)
+and Gemini's `generateContent` / `streamGenerateContent?alt=sse`, including
+streamed SSE responses and `usage` fields. Latency, jitter, error and 429
+rates are configurable, and responses come either from a synthetic project
+generator or from a cassette of recorded responses.
+
+Run standalone and point the app at it yourself:
+
+    python benchmarks/mock_provider.py serve --port 8800 --latency 0.5 --throttle-rate 0.05
+
+or record real responses (needs API keys) for later replay:
+
+    python benchmarks/mock_provider.py record -b openai -n 20 -o benchmarks/cassettes/openai.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MOCK_DEFAULTS = {
+    'latency': 0.0,          # seconds before the response starts
+    'jitter': 0.0,           # extra uniformly random seconds on top of latency
+    'error_rate': 0.0,       # fraction of requests answered with a 500
+    'throttle_rate': 0.0,    # fraction of requests answered with a 429
+    'retry_after': 1,        # Retry-After seconds sent with a 429
+    'chunk_size': 24,        # characters per streamed event
+    'chunk_delay': 0.0,      # seconds between streamed events
+    'idea_latency': 0.0,     # extra seconds per idea after the first when a prompt asks for several
+    'seed': None,
+}
+
+# How create_project_prompt asks for several ideas in one response
+MULTI_IDEA_PROMPT = re.compile(r'JSON array of (\d+) objects')
+
+TOPICS = ['Redstone', 'Command Block', 'Datapack', 'Fabric Mod', 'Spigot Plugin', 'Resource Pack', 'Farm',
+          'Minigame', 'Castle', 'Railway']
+
+
+def synthetic_project(number: int) -> dict:
+    """The project dict behind synthetic response `number`"""
+    topic = TOPICS[number % len(TOPICS)]
+    return {
+        "name": f"{topic} Project #{number}",
+        "description": f"Build a {topic.lower()} that teaches {{event}} handling and \"state\" step by step.",
+        "technologies": ["Minecraft Java Edition", topic],
+        "difficulty": ["beginner", "intermediate", "advanced"][number % 3],
+        "estimated_duration": "1-2 weeks",
+        "key_features": [f"Feature {i}" for i in range(1, 5)],
+        "learning_outcomes": ["Planning a build", f"{topic} mechanics"],
+        "prerequisites": ["Basic Minecraft knowledge"],
+        "potential_extensions": ["Add multiplayer support"],
+        "resources": ["https://minecraft.wiki"],
+    }
+
+
+def synthetic_response(number: int) -> str:
+    """A response shaped like the real ones: a fenced JSON project with some chatter around it"""
+    project = synthetic_project(number)
+    return (f"Here's a project idea that fits your preferences:\n\n```json\n{json.dumps(project, indent=2)}\n```\n\n"
+            f"Have fun building it!")
+
+
+def synthetic_ideas(number: int, count: int) -> str:
+    """A multi-idea response: a fenced JSON array of `count` projects"""
+    projects = [synthetic_project(number * count + index) for index in range(count)]
+    return f"Here are {count} ideas:\n\n```json\n{json.dumps(projects, indent=2)}\n```"
+
+
+def load_cassette(path: str):
+    """Recorded response texts from a cassette (JSONL of {"text": ...} records)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        texts = [json.loads(line)['text'] for line in f if line.strip()]
+    if not texts:
+        raise ValueError(f"{path}: empty cassette")
+    return texts
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        # Connection pre-warming
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def send_body(self, status: int, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunk(self, data: bytes):
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def do_POST(self):
+        provider = self.server.provider
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self.send_body(400, {'error': {'message': 'invalid JSON'}})
+            return
+        path = urlparse(self.path).path
+        google = path.endswith(':generateContent') or path.endswith(':streamGenerateContent')
+        if not google and not path.endswith('/chat/completions'):
+            self.send_body(404, {'error': {'message': 'not found'}})
+            return
+
+        prompt = json.dumps(request)
+        asked = MULTI_IDEA_PROMPT.search(prompt)
+        count = int(asked.group(1)) if asked else 1
+        outcome, delay, text = provider.next_response(count)
+        time.sleep(delay)
+        if outcome == 'throttled':
+            retry_after = provider.settings['retry_after']
+            details = [{'@type': 'type.googleapis.com/google.rpc.RetryInfo', 'retryDelay': f"{retry_after}s"}]
+            self.send_body(429, {'error': {'code': 429, 'message': 'rate limited', 'details': details}},
+                           {'Retry-After': str(retry_after)})
+            return
+        if outcome == 'error':
+            self.send_body(500, {'error': {'code': 500, 'message': 'mock server error'}})
+            return
+
+        usage = {'prompt': len(prompt) // 4, 'completion': len(text) // 4}
+        if path.endswith(':streamGenerateContent') or request.get('stream'):
+            self.stream(text, google, usage)
+        elif google:
+            self.send_body(200, {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'},
+                                                 'finishReason': 'STOP'}],
+                                 'usageMetadata': google_usage(usage)})
+        else:
+            self.send_body(200, {'id': 'mock', 'object': 'chat.completion', 'model': request.get('model'),
+                                 'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text},
+                                              'finish_reason': 'stop'}],
+                                 'usage': openai_usage(usage)})
+
+    def stream(self, text: str, google: bool, usage):
+        settings = self.server.provider.settings
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        size = max(1, settings['chunk_size'])
+        try:
+            for start in range(0, len(text), size):
+                piece = text[start:start + size]
+                if google:
+                    event = {'candidates': [{'content': {'parts': [{'text': piece}], 'role': 'model'}}],
+                             'usageMetadata': google_usage(usage)}
+                else:
+                    event = {'choices': [{'index': 0, 'delta': {'content': piece}}]}
+                self.send_chunk(b'data: ' + json.dumps(event).encode('utf-8') + b'\n\n')
+                if settings['chunk_delay']:
+                    time.sleep(settings['chunk_delay'])
+            if not google:
+                final = {'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}], 'usage': openai_usage(usage)}
+                self.send_chunk(b'data: ' + json.dumps(final).encode('utf-8') + b'\n\n')
+                self.send_chunk(b'data: [DONE]\n\n')
+            self.send_chunk(b'')
+        except OSError:
+            pass  # the client stopped reading once it had the whole JSON object
+
+
+def openai_usage(usage):
+    return {'prompt_tokens': usage['prompt'], 'completion_tokens': usage['completion'],
+            'total_tokens': usage['prompt'] + usage['completion']}
+
+
+def google_usage(usage):
+    return {'promptTokenCount': usage['prompt'], 'candidatesTokenCount': usage['completion'],
+            'totalTokenCount': usage['prompt'] + usage['completion']}
+
+
+class MockProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):  # clients closing idle keep-alives are normal
+            super().handle_error(request, client_address)
+
+
+class MockProvider:
+    """A threaded mock provider server; use as a context manager or call start()/stop()"""
+
+    def __init__(self, settings=None, cassette=None, host='127.0.0.1', port=0):
+        self.settings = dict(MOCK_DEFAULTS)
+        self.settings.update(settings or {})
+        self.random = random.Random(self.settings['seed'])
+        self.random_lock = threading.Lock()
+        self.texts = load_cassette(cassette) if cassette else None
+        self.counter = itertools.count()
+        self.server = MockProviderServer((host, port), MockProviderHandler)
+        self.server.provider = self
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_response(self, count: int = 1):
+        """(outcome, delay, text) for the next request, asking for `count` ideas"""
+        number = next(self.counter)
+        with self.random_lock:
+            roll = self.random.random()
+            delay = self.settings['latency'] + self.random.uniform(0, self.settings['jitter'])
+        delay += self.settings['idea_latency'] * (count - 1)
+        if roll < self.settings['throttle_rate']:
+            return 'throttled', delay, None
+        if roll < self.settings['throttle_rate'] + self.settings['error_rate']:
+            return 'error', delay, None
+        if self.texts:
+            text = self.texts[number % len(self.texts)]
+        else:
+            text = synthetic_ideas(number, count) if count > 1 else synthetic_response(number)
+        return 'ok', delay, text
+
+    def start(self) -> 'MockProvider':
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def endpoints(self):
+        """AI_BACKENDS endpoint for each backend, pointing at this server"""
+        from projectflow_core import AI_BACKENDS
+        return {name: (f"{self.url}/v1beta/models/{backend['model']}:generateContent"
+                       if backend['type'] == 'google' else f"{self.url}/v1/chat/completions")
+                for name, backend in AI_BACKENDS.items() if backend['type'] != 'local'}
+
+    def point_backends(self):
+        """Aim every AI_BACKENDS entry at this server with a dummy key; returns a function that undoes it"""
+        from projectflow_core import AI_BACKENDS
+        saved = {name: (backend['endpoint'], backend['key'])
+                 for name, backend in AI_BACKENDS.items() if backend['type'] != 'local'}
+        for name, endpoint in self.endpoints().items():
+            AI_BACKENDS[name]['endpoint'] = endpoint
+            AI_BACKENDS[name]['key'] = 'mock-key'
+
+        def restore():
+            for name, (endpoint, key) in saved.items():
+                AI_BACKENDS[name]['endpoint'] = endpoint
+                AI_BACKENDS[name]['key'] = key
+        return restore
+
+
+def record_cassette(backend_name: str, count: int, output: str, preferences=None):
+    """Generate `count` responses from a real backend and append their texts to a cassette"""
+    from projectflow_core import LocalAICodeGenerator
+    generator = LocalAICodeGenerator(silent=True, selected_backend=backend_name)
+    if not generator.backend_status.get(backend_name):
+        raise SystemExit(f"{backend_name}: no API key configured")
+    levels = ['beginner', 'intermediate', 'advanced']
+    recorded = 0
+    try:
+        with open(output, 'a', encoding='utf-8') as f:
+            for number in range(count):
+                user_input = preferences or {'skill_level': levels[number % 3],
+                                             'interests': [TOPICS[number % len(TOPICS)]]}
+                response = generator.generate_response(generator.create_project_prompt(user_input), backend_name)
+                if generator.is_error(response):
+                    print(f"  skipped: {response}", file=sys.stderr)
+                    continue
+                f.write(json.dumps({'backend': backend_name, 'text': response}) + '\n')
+                recorded += 1
+    finally:
+        generator.close()
+    print(f"Recorded {recorded} responses to {output}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="run the mock provider until interrupted")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8800)
+    serve.add_argument('--cassette', help="replay response texts from this cassette")
+    for key, value in MOCK_DEFAULTS.items():
+        serve.add_argument(f"--{key.replace('_', '-')}", type=float if key != 'seed' else int, default=value)
+    record = commands.add_parser('record', help="record real responses into a cassette (needs API keys)")
+    record.add_argument('-b', '--backend', required=True)
+    record.add_argument('-n', '--count', type=int, default=10)
+    record.add_argument('-o', '--output', required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        record_cassette(args.backend, args.count, args.output)
+        return 0
+    settings = {key: getattr(args, key) for key in MOCK_DEFAULTS}
+    settings['chunk_size'] = int(settings['chunk_size'])
+    settings['retry_after'] = int(settings['retry_after'])
+    provider = MockProvider(settings, args.cassette, args.host, args.port)
+    print(f"Mock provider on {provider.url}; endpoints:", file=sys.stderr)
+    for name, endpoint in provider.endpoints().items():
+        print(f"  {name}: {endpoint}", file=sys.stderr)
+    try:
+        provider.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        provider.server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,497 @@
+"""Headless entry points: `main.py batch`, `main.py export` and `main.py serve`"""
+import json
+import sys
+import os
+import argparse
+import threading
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from projectflow_core import (AI_BACKENDS, AUTO_BACKEND, EXPORT_FORMATS, RETRY_DEFAULTS, CancelToken,
+                              DeadlineExceeded, LocalAICodeGenerator)
+
+
+class BatchCheckpoint:
+    """Tracks which input lines of a batch run are finished so it can resume.
+    
+    Stores a low watermark (every line below it is done) plus the finished
+    lines above it, which stay bounded by the number of in-flight records.
+    """
+    
+    def __init__(self, path: Optional[str], source: str):
+        self.path = path
+        self.source = source
+        self.lock = threading.Lock()
+        self.watermark = 0
+        self.done_above = set()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    state = json.load(f)
+                if state.get('source') == source:
+                    self.watermark = state.get('watermark', 0)
+                    self.done_above = set(state.get('done_above', []))
+            except (OSError, ValueError):
+                pass
+    
+    @property
+    def resuming(self) -> bool:
+        return bool(self.watermark or self.done_above)
+    
+    def is_done(self, line_number: int) -> bool:
+        return line_number < self.watermark or line_number in self.done_above
+    
+    def mark_done(self, line_number: int):
+        with self.lock:
+            self.done_above.add(line_number)
+            while self.watermark in self.done_above:
+                self.done_above.remove(self.watermark)
+                self.watermark += 1
+            if self.path:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump({'source': self.source, 'watermark': self.watermark,
+                               'done_above': sorted(self.done_above)}, f)
+                os.replace(tmp_path, self.path)
+
+
+def run_batch(generator: 'LocalAICodeGenerator', lines, output, checkpoint: Optional[BatchCheckpoint] = None,
+              backend_name: Optional[str] = None, concurrency: int = 4, save_history: bool = True,
+              progress=None, coalesce: Optional[bool] = None) -> Dict:
+    """Generate one idea per JSONL record in `lines`, writing JSONL results to `output`.
+    
+    With the generator's ideas_per_request above 1, records with the same
+    preferences and backend share multi-idea requests through its idea buffer.
+    Concurrent records with identical preferences share one provider call
+    unless coalesce=False.
+    Records are read lazily and at most `concurrency` requests run per backend,
+    so memory stays flat however long the input is. Results are written in
+    completion order, each tagged with its input line number (and the record's
+    'id' if it has one). With a checkpoint, finished lines are skipped on the
+    next run; delivery is at-least-once if the process dies between writing a
+    result and recording it.
+    """
+    checkpoint = checkpoint or BatchCheckpoint(None, '')
+    backend_slots = {name: threading.Semaphore(concurrency) for name in list(AI_BACKENDS) + [AUTO_BACKEND]}
+    workers = concurrency * len(AI_BACKENDS)
+    window = threading.BoundedSemaphore(workers * 2)  # records read ahead of the workers
+    output_lock = threading.Lock()
+    stats = {'processed': 0, 'succeeded': 0, 'failed': 0, 'skipped': 0}
+    
+    def emit(result: Dict):
+        with output_lock:
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            stats['processed'] += 1
+            stats['succeeded' if 'project' in result else 'failed'] += 1
+            if progress:
+                progress(stats)
+    
+    def process(line_number: int, line: str):
+        result = {'line': line_number}
+        emitted = False
+        try:
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("record is not a JSON object")
+                user_input = record.get('user_input', record)
+                if not isinstance(user_input, dict):
+                    raise ValueError("user_input is not a JSON object")
+            except ValueError as e:
+                result['error'] = f"invalid record: {e}"
+                emit(result)
+                emitted = True
+                return
+            
+            if 'id' in record:
+                result['id'] = record['id']
+            backend = record.get('backend') or backend_name or generator.selected_backend
+            user_input = {key: value for key, value in user_input.items() if key not in ('id', 'backend')}
+            
+            with backend_slots.get(backend, backend_slots[generator.selected_backend]):
+                try:
+                    project = generator.next_project_idea(user_input, backend, save_history=save_history,
+                                                          coalesce=coalesce)
+                except Exception as e:
+                    project = None
+                    result['error'] = str(e)
+            result['backend'] = project.get('backend_used', backend) if project else backend
+            if project:
+                result['project'] = project
+            else:
+                result.setdefault('error', 'generation failed')
+            emit(result)
+            emitted = True
+        except Exception as e:
+            # Never let a record vanish: report it, so the checkpoint only moves past written lines
+            result.pop('project', None)
+            result['error'] = f"internal error: {e}"
+            try:
+                emit(result)
+                emitted = True
+            except Exception:
+                pass
+        finally:
+            if emitted:
+                checkpoint.mark_done(line_number)
+            window.release()
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for line_number, line in enumerate(lines):
+                if checkpoint.is_done(line_number):
+                    stats['skipped'] += 1
+                    continue
+                if not line.strip():
+                    # Blank lines count as done too, or the watermark would stall below them
+                    checkpoint.mark_done(line_number)
+                    stats['skipped'] += 1
+                    continue
+                window.acquire()
+                executor.submit(process, line_number, line)
+        except KeyboardInterrupt:
+            # Let in-flight records finish and checkpoint; the rest resume next time
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+    return stats
+
+
+def batch_main(argv: List[str]) -> int:
+    """`python main.py batch`: headless JSONL-in / JSONL-out generation"""
+    parser = argparse.ArgumentParser(
+        prog='main.py batch',
+        description="Generate project ideas for each JSON record (the same keys as the GUI form: "
+                    "skill_level, interests, time, focus; optional id and backend).")
+    parser.add_argument('input', nargs='?', default='-', help="JSONL input file ('-' for stdin)")
+    parser.add_argument('-o', '--output', default='-', help="JSONL output file ('-' for stdout)")
+    parser.add_argument('-b', '--backend', choices=sorted(AI_BACKENDS) + [AUTO_BACKEND],
+                        help="default backend for records ('auto' routes to the fastest healthy one)")
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help="concurrent requests per backend")
+    parser.add_argument('--checkpoint', help="checkpoint file; re-running with it resumes an interrupted run "
+                                             "(default: <output>.checkpoint when writing to a file)")
+    parser.add_argument('--cache', action='store_true',
+                        help="serve repeated preferences from the response cache (off by default, so every "
+                             "record gets a fresh idea)")
+    parser.add_argument('--no-cache', action='store_true', help=argparse.SUPPRESS)  # the default; kept for old scripts
+    parser.add_argument('--no-history', action='store_true', help="don't save results to the history store")
+    parser.add_argument('--deadline', type=float, default=RETRY_DEFAULTS['deadline'],
+                        help="seconds each record may take, retries and fallbacks included")
+    parser.add_argument('--metrics-file', help="keep per-backend metrics in this Prometheus text file")
+    parser.add_argument('--dedup', action='store_true',
+                        help="regenerate ideas that nearly repeat one already in the history")
+    parser.add_argument('--no-coalesce', action='store_true',
+                        help="give concurrent identical records independent provider calls")
+    parser.add_argument('--ideas-per-request', type=int, default=1,
+                        help="ideas asked for per request; the extras serve later records with the same preferences")
+    args = parser.parse_args(argv)
+    
+    checkpoint_path = args.checkpoint
+    if checkpoint_path is None and args.output != '-':
+        checkpoint_path = args.output + '.checkpoint'
+    source = os.path.abspath(args.input) if args.input != '-' else '<stdin>'
+    checkpoint = BatchCheckpoint(checkpoint_path, source)
+    
+    generator = LocalAICodeGenerator(silent=True, selected_backend=args.backend or 'mistral',
+                                     retry={'deadline': args.deadline},
+                                     metrics={'prometheus_file': args.metrics_file},
+                                     dedup={'enabled': args.dedup},
+                                     multi_idea={'ideas_per_request': max(1, args.ideas_per_request)})
+    if args.no_cache or not args.cache:
+        generator.response_cache.settings['enabled'] = False
+    if not any(generator.backend_status.values()):
+        print("❌ No AI backend configured - set an API key first", file=sys.stderr)
+        return 1
+    
+    def progress(stats):
+        print(f"\r{stats['processed']} done ({stats['failed']} failed)", end='', file=sys.stderr, flush=True)
+    
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r')
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'a' if checkpoint.resuming else 'w')
+    try:
+        if checkpoint.resuming:
+            print(f"Resuming from line {checkpoint.watermark}", file=sys.stderr)
+        stats = run_batch(generator, input_file, output_file, checkpoint, backend_name=args.backend,
+                          concurrency=max(1, args.concurrency), save_history=not args.no_history,
+                          progress=progress, coalesce=False if args.no_coalesce else None)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+        generator.close()
+    print(f"\n✅ {stats['succeeded']} generated, {stats['failed']} failed, {stats['skipped']} skipped",
+          file=sys.stderr)
+    return 0 if stats['failed'] == 0 else 2
+
+
+
+def export_main(argv: List[str]) -> int:
+    """`python main.py export`: stream the saved history to one JSONL, JSON, CSV or Markdown file"""
+    parser = argparse.ArgumentParser(
+        prog='main.py export',
+        description="Export saved ideas matching the filters, oldest first, without loading the whole history.")
+    parser.add_argument('output', help="file to write; the format follows its extension unless --format is given")
+    parser.add_argument('-f', '--format', choices=sorted(EXPORT_FORMATS))
+    parser.add_argument('-q', '--query', default='', help="only ideas containing these words")
+    parser.add_argument('-b', '--backend', help="only ideas from this backend")
+    parser.add_argument('-d', '--difficulty', help="only ideas of this difficulty")
+    parser.add_argument('--since', help="only ideas saved on or after this date (YYYY-MM-DD or ISO timestamp)")
+    parser.add_argument('--until', help="only ideas saved on or before this date (YYYY-MM-DD or ISO timestamp)")
+    args = parser.parse_args(argv)
+    
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip('.').lower()
+    if fmt not in EXPORT_FORMATS:
+        parser.error(f"can't tell the format from {args.output!r}; pass --format")
+    
+    def progress(done, total):
+        print(f"\r{done}/{total} exported", end='', file=sys.stderr, flush=True)
+    
+    generator = LocalAICodeGenerator(silent=True)
+    try:
+        result = generator.export_history(args.output, fmt, progress=progress,
+                                          query=args.query, backend=args.backend, difficulty=args.difficulty,
+                                          since=args.since, until=args.until)
+    except KeyboardInterrupt:
+        print("\nExport interrupted; nothing written", file=sys.stderr)
+        return 130
+    finally:
+        generator.close()
+    print(f"\n✅ {result['exported']} ideas written to {result['path']}", file=sys.stderr)
+    return 0
+
+
+class GenerationService:
+    """Shares one LocalAICodeGenerator between HTTP clients.
+    
+    Generations run on a bounded worker pool; at most `workers + queue_limit`
+    are admitted at once and anything beyond that is rejected (HTTP 429) so a
+    burst of clients can't pile up unbounded work.
+    """
+    
+    def __init__(self, generator: 'LocalAICodeGenerator', workers: int = 8, queue_limit: int = 32,
+                 request_timeout: float = 120.0):
+        self.generator = generator
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.request_timeout = request_timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='generate')
+        self.admission = threading.BoundedSemaphore(workers + queue_limit)
+        self.stats_lock = threading.Lock()
+        self.stats = {'accepted': 0, 'rejected': 0, 'completed': 0, 'failed': 0, 'in_flight': 0}
+    
+    def _count(self, key: str, delta: int = 1):
+        with self.stats_lock:
+            self.stats[key] += delta
+    
+    def generate(self, body: Dict):
+        """Returns (status, payload) for a generate request"""
+        if not isinstance(body, dict):
+            return 400, {'error': 'expected a JSON object'}
+        backend = body.get('backend') or self.generator.selected_backend
+        if backend not in AI_BACKENDS and backend != AUTO_BACKEND:
+            return 400, {'error': f"unknown backend: {backend}"}
+        deadline = body.get('deadline')
+        if deadline is not None:
+            if isinstance(deadline, bool) or not isinstance(deadline, (int, float)) or deadline <= 0:
+                return 400, {'error': 'deadline must be a positive number of seconds'}
+            deadline = min(deadline, self.request_timeout)
+        coalesce = body.get('coalesce')
+        if coalesce is not None and not isinstance(coalesce, bool):
+            return 400, {'error': 'coalesce must be true or false'}
+        user_input = {key: value for key, value in body.items() if key not in ('backend', 'deadline', 'coalesce')}
+        
+        if not self.admission.acquire(blocking=False):
+            self._count('rejected')
+            return 429, {'error': 'server busy, retry later'}
+        cancel_token = CancelToken()
+        try:
+            future = self.executor.submit(self.generator.generate_project_idea, user_input, backend,
+                                          deadline=deadline, coalesce=coalesce, cancel_token=cancel_token)
+        except RuntimeError:
+            self.admission.release()
+            return 503, {'error': 'server shutting down'}
+        # The slot is freed when the work actually finishes (or is dropped from the queue)
+        future.add_done_callback(lambda _: self.admission.release())
+        self._count('accepted')
+        self._count('in_flight')
+        try:
+            project = future.result(timeout=self.request_timeout)
+        except (FutureTimeoutError, DeadlineExceeded) as e:
+            # Stop the abandoned work so it gives back its slot and connection instead of running on
+            future.cancel()
+            cancel_token.cancel()
+            self._count('failed')
+            return 504, {'error': str(e) or 'generation timed out'}
+        except Exception as e:
+            self._count('failed')
+            return 500, {'error': str(e)}
+        finally:
+            self._count('in_flight', -1)
+        
+        if project is None:
+            self._count('failed')
+            return 502, {'error': 'generation failed'}
+        self._count('completed')
+        return 200, {'project': project}
+    
+    def history(self, params: Dict):
+        """Returns (status, payload) for a history query"""
+        def param(name):
+            values = params.get(name)
+            return values[0] if values else None
+        
+        filters = {key: param(name) for key, name in (('query', 'q'), ('backend', 'backend'),
+                                                       ('difficulty', 'difficulty'))
+                   if param(name)}
+        try:
+            limit = min(max(int(param('limit') or 50), 1), 500)
+            offset = max(int(param('offset') or 0), 0)
+        except ValueError:
+            return 400, {'error': 'limit and offset must be integers'}
+        return 200, {'total': self.generator.count_history(**filters),
+                     'items': [row.as_dict() for row in self.generator.history_page(offset, limit, **filters)]}
+    
+    def history_entry(self, entry_id: str):
+        try:
+            entry = self.generator.get_history_entry(int(entry_id))
+        except ValueError:
+            entry = None
+        if entry is None:
+            return 404, {'error': 'not found'}
+        return 200, entry
+    
+    def backends(self):
+        """Returns (status, payload) describing backend availability and performance"""
+        connections = self.generator.connection_stats()
+        latency = self.generator.latency_summary()
+        rate_limits = self.generator.rate_limit_stats()
+        health = self.generator.backend_health()
+        local_models = self.generator.local_model_stats()
+        metrics = self.generator.metrics_snapshot()['backends']
+        with self.stats_lock:
+            service = dict(self.stats)
+        return 200, {
+            'backends': {name: {'name': info['name'], 'model': info['model'],
+                                'available': bool(self.generator.backend_status.get(name)),
+                                'connections': connections.get(name), 'latency': latency.get(name),
+                                'rate_limit': rate_limits.get(name), 'circuit': health.get(name),
+                                'local_model': local_models.get(name), 'metrics': metrics.get(name)}
+                         for name, info in AI_BACKENDS.items()},
+            'service': dict(service, workers=self.workers, queue_limit=self.queue_limit),
+            'cache': self.generator.response_cache.stats(),
+        }
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class GenerationRequestHandler(BaseHTTPRequestHandler):
+    """JSON API: POST /generate, GET /history[/<id>], GET /backends; Prometheus text at GET /metrics"""
+    
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # headers and body are separate writes; don't hold the body for an ACK
+    max_body_bytes = 64 * 1024
+    
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+    
+    def send_json(self, status: int, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_text(self, status: int, text: str, content_type: str = 'text/plain; charset=utf-8'):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        service = self.server.service
+        if url.path == '/backends':
+            self.send_json(*service.backends())
+        elif url.path == '/metrics':
+            self.send_text(200, service.generator.metrics.prometheus_text(), 'text/plain; version=0.0.4; charset=utf-8')
+        elif url.path == '/history':
+            self.send_json(*service.history(parse_qs(url.query)))
+        elif url.path.startswith('/history/'):
+            self.send_json(*service.history_entry(url.path[len('/history/'):]))
+        else:
+            self.send_json(404, {'error': 'not found'})
+    
+    def do_POST(self):
+        if urlparse(self.path).path != '/generate':
+            self.send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= self.max_body_bytes:
+            # The unread body would be taken for the next request on a keep-alive connection
+            self.close_connection = True
+            if length < 0:
+                self.send_json(400, {'error': 'invalid Content-Length'})
+            else:
+                self.send_json(413, {'error': 'request body too large'})
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self.send_json(400, {'error': 'invalid JSON'})
+            return
+        self.send_json(*self.server.service.generate(body))
+
+
+class GenerationHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512  # listen backlog for bursts of clients
+    
+    def __init__(self, address, service: GenerationService, quiet: bool = False):
+        self.service = service
+        self.quiet = quiet
+        super().__init__(address, GenerationRequestHandler)
+
+
+def serve_main(argv: List[str]) -> int:
+    """`python main.py serve`: local JSON API around one shared generator"""
+    parser = argparse.ArgumentParser(prog='main.py serve', description="Serve project idea generation over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=8, help="concurrent generations")
+    parser.add_argument('--queue', type=int, default=32, help="generations allowed to wait for a worker before 429")
+    parser.add_argument('--timeout', type=float, default=120.0, help="seconds a client waits for its generation")
+    parser.add_argument('--deadline', type=float, default=RETRY_DEFAULTS['deadline'],
+                        help="default time budget per generation (clients may send a smaller 'deadline')")
+    parser.add_argument('--metrics-file', help="also write per-backend metrics to this Prometheus text file")
+    parser.add_argument('--quiet', action='store_true', help="don't log requests")
+    args = parser.parse_args(argv)
+    
+    generator = LocalAICodeGenerator(silent=True, retry={'deadline': args.deadline},
+                                     metrics={'prometheus_file': args.metrics_file})
+    service = GenerationService(generator, workers=max(1, args.workers), queue_limit=max(0, args.queue),
+                                request_timeout=args.timeout)
+    server = GenerationHTTPServer((args.host, args.port), service, quiet=args.quiet)
+    print(f"🌐 Serving on http://{args.host}:{server.server_address[1]} "
+          f"(POST /generate, GET /history, GET /backends, GET /metrics)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        generator.close()
+    return 0
@@ -0,0 +1,4401 @@
+"""Headless core of the project idea generator: backends, cache, history and parsing.
+
+Importing this module is cheap: it needs neither Tk nor `requests` (loaded on
+first use), and API keys from `.env` are read when the first generator starts.
+"""
+import json
+import random
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional
+import os
+import re
+import queue
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import heapify, heappop, heappush
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+
+if TYPE_CHECKING:
+    import requests
+
+# Simple .env file loader
+def load_env_file(env_path='.env'):
+    """Load environment variables from .env file"""
+    if os.path.exists(env_path):
+        with open(env_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    key = key.strip()
+                    value = value.strip().strip('"').strip("'")
+                    # Remove inline comments (anything after // or #)
+                    if '//' in value:
+                        value = value.split('//')[0].strip()
+                    if '#' in value:
+                        value = value.split('#')[0].strip()
+                    if value:  # Only set if value is not empty
+                        os.environ[key] = value
+
+# .env file in the script directory, read by load_backend_keys()
+script_dir = os.path.dirname(os.path.abspath(__file__))
+env_file_path = os.path.join(script_dir, '.env')
+
+# API Keys - Replace with your own from the services below; an empty 'key' is
+# filled from the 'key_env' environment variable (or .env) when the first generator starts.
+# 'structured_output' is how the project schema is sent (see STRUCTURED_OUTPUT_DEFAULTS):
+# 'json_object' (JSON mode), 'json_schema' (the provider enforces the schema) or None
+AI_BACKENDS = {
+    'openai': {
+        'name': 'OpenAI ChatGPT (Most Popular)',
+        'label': 'OpenAI',
+        'key': '',
+        'key_env': 'OPENAI_API_KEY',  # Set in environment or .env
+        'endpoint': 'https://api.openai.com/v1/chat/completions',
+        'model': 'gpt-3.5-turbo',
+        'type': 'openai_compatible',
+        'structured_output': 'json_object'  # 'json_schema' needs gpt-4o-mini or newer
+    },
+    'mistral': {
+        'name': 'Mistral (Open Source & Free)',
+        'label': 'Mistral',
+        'key': '',
+        'key_env': 'MISTRAL_API_KEY',  # Set in environment or .env
+        'endpoint': 'https://api.mistral.ai/v1/chat/completions',
+        'model': 'mistral-small-latest',
+        'type': 'openai_compatible',
+        'structured_output': 'json_object'
+    },
+    'google': {
+        'name': 'Google Gemini (Very Popular)',
+        'label': 'Google',
+        'key': '',
+        'key_env': 'GEMINI_API_KEY',  # Set in environment or .env
+        'endpoint': 'https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent',
+        'model': 'gemini-pro',
+        'type': 'google',
+        'structured_output': 'json_schema'  # responseMimeType + responseSchema
+    },
+    'local': {
+        'name': 'Local model (offline, CPU)',
+        'label': 'Local',
+        'key': '',
+        'model': 'Qwen/Qwen2.5-0.5B-Instruct',    # Hugging Face model id or local directory
+        'model_env': 'PROJECTFLOW_LOCAL_MODEL',  # setting it enables this backend with that model
+        'type': 'local'
+    }
+}
+
+_keys_loaded = False
+_keys_lock = threading.Lock()
+
+
+def load_backend_keys():
+    """Read .env once and fill in backend keys from the environment"""
+    global _keys_loaded
+    with _keys_lock:
+        if _keys_loaded:
+            return
+        load_env_file(env_file_path)
+        for backend in AI_BACKENDS.values():
+            if not backend.get('key') and backend.get('key_env'):
+                backend['key'] = os.getenv(backend['key_env'], '')
+            if backend.get('model_env') and os.getenv(backend['model_env']):
+                backend['model'] = os.getenv(backend['model_env'])
+        _keys_loaded = True
+
+
+# HTTP connection pool tuning. Any key can be overridden per backend by adding
+# an 'http' dict to its AI_BACKENDS entry, e.g. AI_BACKENDS['openai']['http'] = {'pool_size': 8}
+HTTP_POOL_DEFAULTS = {
+    'pool_size': 4,            # max idle keep-alive connections kept per host
+    'pool_block': False,       # wait for a free connection instead of opening an extra one
+    'keep_alive': True,
+    'connect_timeout': 5,      # seconds
+    'read_timeout': 30,        # seconds
+    'prewarm': True,           # open connections in the background during check_backends()
+    'prewarm_connections': 1,
+}
+
+# Hedged requests: if the primary backend hasn't answered after `delay` seconds,
+# send the same prompt to the next healthy backend and keep whichever answers first
+HEDGING_DEFAULTS = {
+    'enabled': False,
+    'delay': None,             # seconds; None = primary backend's observed latency quantile
+    'quantile': 0.9,
+    'default_delay': 6.0,      # used until enough latency samples have been observed
+    'min_delay': 1.0,
+    'min_samples': 5,
+    'max_backends': 2,         # primary + hedges
+}
+
+# Response cache in front of generate_response, keyed on normalized user input + backend + model
+RESPONSE_CACHE_DEFAULTS = {
+    'enabled': True,
+    'directory': 'ai_cache',
+    'ttl': 7 * 24 * 3600,          # seconds a cached response stays valid
+    'memory_entries': 256,         # keys kept in the in-memory LRU
+    'disk_entries': 5000,          # keys kept on disk
+    'disk_bytes': 50 * 1024 * 1024,
+    'variants': 1,                 # distinct responses collected per key before serving from cache
+}
+
+
+class ResponseCache:
+    """Two-level (in-memory LRU + on-disk) cache of raw AI responses.
+
+    Each key holds up to settings['variants'] responses; a key only counts
+    as a hit once all variants have been collected, so N > 1 keeps variety.
+    """
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = dict(RESPONSE_CACHE_DEFAULTS)
+        self.settings.update(settings or {})
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()  # key -> list of {'response', 'created'}
+        self.disk_index = None       # key -> (size, mtime), built on first disk access
+        self.counters = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                         'writes': 0, 'evictions': 0, 'expired': 0}
+
+    @staticmethod
+    def make_key(user_input: Dict, backend_name: str) -> str:
+        """Hash of the normalized user input, backend key and model"""
+        def normalize(value):
+            if isinstance(value, str):
+                return ' '.join(value.lower().split())
+            if isinstance(value, (list, tuple)):
+                return sorted({normalize(v) for v in value if normalize(v)}, key=str)
+            if isinstance(value, dict):
+                return {str(k).lower(): normalize(v) for k, v in value.items()}
+            return value
+
+        model = AI_BACKENDS.get(backend_name, {}).get('model', '')
+        material = json.dumps([normalize(user_input or {}), backend_name, model], sort_keys=True)
+        import hashlib
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.settings['directory'], f"{key}.json")
+
+    def _load_disk_index(self):
+        if self.disk_index is not None:
+            return
+        self.disk_index = {}
+        try:
+            with os.scandir(self.settings['directory']) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.json') and entry.is_file():
+                        stat = entry.stat()
+                        self.disk_index[entry.name[:-5]] = (stat.st_size, stat.st_mtime)
+        except FileNotFoundError:
+            pass
+
+    def _fresh(self, variants: List[Dict]) -> List[Dict]:
+        cutoff = time.time() - self.settings['ttl']
+        return [v for v in variants if v.get('created', 0) >= cutoff]
+
+    def _read_disk(self, key: str) -> Optional[List[Dict]]:
+        self._load_disk_index()
+        if key not in self.disk_index:
+            return None
+        try:
+            with open(self._path(key), 'r') as f:
+                return json.load(f).get('variants', [])
+        except (OSError, ValueError):
+            self._remove_disk(key)
+            return None
+
+    def _remove_disk(self, key: str):
+        self.disk_index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _write_disk(self, key: str, variants: List[Dict]):
+        self._load_disk_index()
+        os.makedirs(self.settings['directory'], exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'key': key, 'variants': variants}, f)
+        os.replace(tmp_path, path)
+        self.disk_index[key] = (os.path.getsize(path), time.time())
+
+        # Size-based eviction, oldest first
+        total = sum(size for size, _ in self.disk_index.values())
+        if len(self.disk_index) > self.settings['disk_entries'] or total > self.settings['disk_bytes']:
+            for old_key, (size, _) in sorted(self.disk_index.items(), key=lambda item: item[1][1]):
+                if len(self.disk_index) <= self.settings['disk_entries'] and total <= self.settings['disk_bytes']:
+                    break
+                if old_key == key:
+                    continue
+                self._remove_disk(old_key)
+                total -= size
+                self.counters['evictions'] += 1
+
+    def _remember(self, key: str, variants: List[Dict]):
+        self.memory[key] = variants
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.settings['memory_entries']:
+            self.memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached response for key, or None on a miss"""
+        with self.lock:
+            level = 'memory_hits'
+            variants = self.memory.get(key)
+            if variants is None:
+                level = 'disk_hits'
+                variants = self._read_disk(key)
+            if variants is not None:
+                fresh = self._fresh(variants)
+                if len(fresh) != len(variants):
+                    self.counters['expired'] += len(variants) - len(fresh)
+                    if not fresh:
+                        self.memory.pop(key, None)
+                        self._remove_disk(key)
+                variants = fresh
+                if variants:
+                    self._remember(key, variants)
+            if not variants or len(variants) < self.settings['variants']:
+                self.counters['misses'] += 1
+                return None
+            self.counters['hits'] += 1
+            self.counters[level] += 1
+            return random.choice(variants)['response']
+
+    def put(self, key: str, response: str):
+        """Store a response under key (as a new variant if there is room)"""
+        with self.lock:
+            variants = self.memory.get(key)
+            if variants is None:
+                variants = self._read_disk(key) or []
+            variants = self._fresh(variants)
+            if any(v['response'] == response for v in variants):
+                return
+            variants.append({'response': response, 'created': time.time()})
+            variants = variants[-max(1, self.settings['variants']):]
+            self._remember(key, variants)
+            self.counters['writes'] += 1
+            try:
+                self._write_disk(key, variants)
+            except OSError:
+                pass
+
+    def clear(self):
+        """Drop every cached response from memory and disk"""
+        with self.lock:
+            self.memory.clear()
+            self._load_disk_index()
+            for key in list(self.disk_index):
+                self._remove_disk(key)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters plus current sizes"""
+        with self.lock:
+            self._load_disk_index()
+            stats = dict(self.counters)
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+            stats['memory_keys'] = len(self.memory)
+            stats['disk_keys'] = len(self.disk_index)
+            stats['disk_bytes'] = sum(size for size, _ in self.disk_index.values())
+            return stats
+
+
+# Several ideas per completion: one request asks for a JSON array, every idea is saved,
+# and next_project_idea() serves the extras from a local buffer per preference set
+MULTI_IDEA_DEFAULTS = {
+    'ideas_per_request': 1,    # 1 = one idea per request, as before
+    'tokens_per_idea': 800,    # completion budget per idea; max_tokens scales with the count
+    'max_tokens': 4096,        # cap on one completion; fewer ideas are asked for above it
+    'buffer_ttl': 3600,        # seconds a buffered idea can still be served
+    'max_buffers': 32,         # preference sets with buffered ideas (least recently used dropped)
+}
+
+
+# History storage: 'sqlite' (indexed, full-text searchable) or 'jsonl' (an append-only
+# journal compacted in the background into a snapshot)
+HISTORY_DEFAULTS = {
+    'store': 'sqlite',                         # the only store that compresses entry details
+    'database_file': 'ai_suggestions.db',
+    'snapshot_file': 'ai_suggestions.jsonl',
+    'journal_file': 'ai_suggestions.journal.jsonl',
+    'legacy_file': 'ai_suggestions.json',      # old single-array format, migrated once
+    'max_entries': None,                       # retention: None keeps everything
+    'max_age_days': None,                      # retention: None keeps everything
+    'display_limit': 200,                      # entries load_history keeps in memory
+    'compact_journal_bytes': 1024 * 1024,      # compact once the journal grows past this
+    'fsync': True,
+    'retention_every': 100,                    # sqlite: apply retention every N appends
+    'compress': True,                          # sqlite: store entry details zlib-compressed (needs FTS5)
+}
+
+
+def _history_search_fields(entry: Dict) -> Dict:
+    """Text fields of a history entry that search and filters look at"""
+    project = entry.get('project') or {}
+
+    def joined(value):
+        if isinstance(value, (list, tuple)):
+            return ', '.join(str(item) for item in value)
+        return str(value or '')
+
+    return {
+        'name': str(project.get('name') or ''),
+        'description': str(project.get('description') or ''),
+        'technologies': joined(project.get('technologies')),
+        'features': joined(project.get('key_features') or project.get('features')),
+        'backend': str(entry.get('backend') or ''),
+        'difficulty': str(project.get('difficulty') or ''),
+    }
+
+
+def _tail_lines(path: str, limit: int, block_size: int = 64 * 1024) -> List[bytes]:
+    """Last `limit` non-empty lines of a file, read backwards in blocks"""
+    if limit <= 0:
+        return []
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return []
+    with f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        newest_first = []
+        remainder = b''
+        while position > 0 and len(newest_first) < limit:
+            read = min(block_size, position)
+            position -= read
+            f.seek(position)
+            parts = (f.read(read) + remainder).split(b'\n')
+            remainder = parts[0]
+            newest_first.extend(line for line in reversed(parts[1:]) if line.strip())
+        if position == 0 and remainder.strip():
+            newest_first.append(remainder)
+    return list(reversed(newest_first[:limit]))
+
+
+def _decode_lines(lines) -> List[Dict]:
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue  # torn write at the end of the journal
+    return entries
+
+
+class HistorySummary:
+    """The columns the History tab lists for an entry; the details stay in the store until asked for"""
+    
+    __slots__ = ('id', 'timestamp', 'name', 'difficulty', 'backend')
+    
+    def __init__(self, entry_id: Optional[int], timestamp: str, name: str, difficulty: str, backend: str):
+        self.id = entry_id
+        self.timestamp = timestamp  # ISO 8601, so it sorts and slices without parsing
+        self.name = name
+        self.difficulty = difficulty
+        self.backend = backend
+    
+    def as_dict(self) -> Dict:
+        return {'id': self.id, 'timestamp': self.timestamp, 'name': self.name,
+                'difficulty': self.difficulty, 'backend': self.backend}
+    
+    def __repr__(self) -> str:
+        return f"HistorySummary({self.id!r}, {self.timestamp!r}, {self.name!r})"
+
+
+def _history_summary(entry: Dict) -> HistorySummary:
+    """The summary record for a full history entry"""
+    fields = _history_search_fields(entry)
+    return HistorySummary(entry.get('id'), entry.get('timestamp', ''), fields['name'],
+                          fields['difficulty'], fields['backend'])
+
+
+class JournalHistoryStore:
+    """Suggestion history as a JSONL snapshot plus an append-only, fsync'd journal.
+
+    Every entry gets a monotonically increasing integer 'id'. Once the journal
+    passes settings['compact_journal_bytes'] it is rotated and merged into the
+    snapshot on a background thread, applying the retention policy. Readers
+    de-duplicate by id, so a crash mid-compaction never shows an entry twice.
+    Entries stay plain, uncompressed JSON lines so the files remain greppable
+    and tail-readable; only SQLiteHistoryStore (the default) compresses details.
+    """
+
+    def __init__(self, settings: Dict):
+        self.settings = settings
+        self.snapshot_path = settings['snapshot_file']
+        self.journal_path = settings['journal_file']
+        self.compacting_path = self.journal_path + '.compacting'
+        self.lock = threading.Lock()
+        self.journal = None
+        self.compaction_thread = None
+        self._migrate_legacy()
+        latest = self._read_recent(1)
+        self.next_id = latest[-1]['id'] + 1 if latest else 1
+
+    def _migrate_legacy(self):
+        legacy = self.settings.get('legacy_file')
+        if not legacy or os.path.exists(self.snapshot_path) or os.path.exists(self.journal_path):
+            return
+        try:
+            with open(legacy, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(entries, list):
+            return
+        with open(self.snapshot_path + '.tmp', 'w') as f:
+            for index, entry in enumerate(entries, 1):
+                entry.setdefault('id', index)
+                f.write(json.dumps(entry) + '\n')
+        os.replace(self.snapshot_path + '.tmp', self.snapshot_path)
+
+    def _paths(self) -> List[str]:
+        """Files holding history, oldest entries first"""
+        return [self.snapshot_path, self.compacting_path, self.journal_path]
+
+    def _read_recent(self, limit: int) -> List[Dict]:
+        entries = {}
+        remaining = limit
+        for path in reversed(self._paths()):
+            if remaining <= 0:
+                break
+            for entry in _decode_lines(_tail_lines(path, remaining)):
+                entries[entry.get('id')] = entry
+            remaining = limit - len(entries)
+        ordered = sorted(entries.values(), key=lambda entry: entry.get('id') or 0)
+        return ordered[-limit:]
+
+    def recent(self, limit: int) -> List[Dict]:
+        """The newest `limit` entries, oldest first; cost is proportional to limit"""
+        return self._read_recent(limit)
+
+    def iter_entries(self):
+        """Stream every entry, oldest first, without loading the archive"""
+        last_id = 0
+        for path in self._paths():
+            try:
+                f = open(path, 'r')
+            except FileNotFoundError:
+                continue
+            with f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get('id', 0) > last_id:
+                        last_id = entry['id']
+                        yield entry
+
+    def iter_matching(self, query: str = '', backend: Optional[str] = None, difficulty: Optional[str] = None,
+                      since: Optional[str] = None, until: Optional[str] = None):
+        """Stream entries matching the filters, oldest first"""
+        terms = query.lower().split()
+        for entry in self.iter_entries():
+            fields = _history_search_fields(entry)
+            timestamp = entry.get('timestamp', '')
+            if backend and fields['backend'] != backend:
+                continue
+            if difficulty and fields['difficulty'] != difficulty:
+                continue
+            if (since and timestamp < since) or (until and timestamp > until):
+                continue
+            if terms:
+                text = ' '.join((fields['name'], fields['description'],
+                                 fields['technologies'], fields['features'])).lower()
+                if not all(term in text for term in terms):
+                    continue
+            yield entry
+
+    def search(self, query: str = '', backend: Optional[str] = None, difficulty: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None, limit: int = 200) -> List[Dict]:
+        """Newest entries matching the filters, newest first (linear scan)"""
+        matches = deque(self.iter_matching(query, backend, difficulty, since, until), maxlen=limit)
+        return list(reversed(matches))
+
+    def count(self, **filters) -> int:
+        """Number of entries matching the filters (linear scan)"""
+        return sum(1 for _ in self.iter_matching(**filters))
+
+    def entry_ids(self) -> List[int]:
+        """Every entry id, ascending (linear scan)"""
+        return [entry['id'] for entry in self.iter_entries()]
+
+    def page(self, offset: int, limit: int, **filters) -> List[HistorySummary]:
+        """Summary records, newest first (linear scan holding only summaries)"""
+        matches = deque((_history_summary(entry) for entry in self.iter_matching(**filters)), maxlen=offset + limit)
+        return list(reversed(matches))[offset:offset + limit]
+
+    def get(self, entry_id: int) -> Optional[Dict]:
+        """Full entry by id (linear scan)"""
+        for entry in self.iter_entries():
+            if entry.get('id') == entry_id:
+                return entry
+        return None
+
+    def distinct_values(self, field: str) -> List[str]:
+        """Sorted distinct values of 'backend' or 'difficulty'"""
+        return sorted({_history_search_fields(entry)[field] for entry in self.iter_entries()} - {''})
+
+    def append(self, entry: Dict) -> Dict:
+        """Durably append one entry to the journal (assigns entry['id'])"""
+        with self.lock:
+            entry['id'] = self.next_id
+            self.next_id += 1
+            if self.journal is None:
+                self.journal = open(self.journal_path, 'ab')
+            self.journal.write(json.dumps(entry).encode('utf-8') + b'\n')
+            self.journal.flush()
+            if self.settings['fsync']:
+                os.fsync(self.journal.fileno())
+            needs_compaction = self.journal.tell() >= self.settings['compact_journal_bytes']
+        if needs_compaction:
+            self.compact()
+        return entry
+
+    def compact(self, wait: bool = False):
+        """Merge the journal into the snapshot on a background thread"""
+        with self.lock:
+            if self.compaction_thread and self.compaction_thread.is_alive():
+                thread = self.compaction_thread
+            else:
+                if not os.path.exists(self.compacting_path):
+                    if self.journal is not None:
+                        self.journal.close()
+                        self.journal = None
+                    if os.path.exists(self.journal_path):
+                        os.replace(self.journal_path, self.compacting_path)
+                thread = threading.Thread(target=self._run_compaction, daemon=True)
+                self.compaction_thread = thread
+                thread.start()
+        if wait:
+            thread.join()
+
+    def _retained(self, paths: List[str]):
+        """Stream entries from paths after applying the retention policy (two passes)"""
+        max_age = self.settings.get('max_age_days')
+        cutoff = (datetime.now().timestamp() - max_age * 86400) if max_age else None
+
+        def too_old(entry):
+            if cutoff is None:
+                return False
+            try:
+                return datetime.fromisoformat(entry['timestamp']).timestamp() < cutoff
+            except (KeyError, TypeError, ValueError):
+                return False
+
+        def stream():
+            last_id = 0
+            for path in paths:
+                try:
+                    f = open(path, 'r')
+                except FileNotFoundError:
+                    continue
+                with f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue
+                        if entry.get('id', 0) > last_id and not too_old(entry):
+                            last_id = entry['id']
+                            yield line if line.endswith('\n') else line + '\n'
+
+        max_entries = self.settings.get('max_entries')
+        skip = max(sum(1 for _ in stream()) - max_entries, 0) if max_entries else 0
+        for index, line in enumerate(stream()):
+            if index >= skip:
+                yield line
+
+    def _run_compaction(self):
+        tmp_path = self.snapshot_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as out:
+                for line in self._retained([self.snapshot_path, self.compacting_path]):
+                    out.write(line)
+                out.flush()
+                if self.settings['fsync']:
+                    os.fsync(out.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            os.remove(self.compacting_path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """Delete the whole history"""
+        if self.compaction_thread:
+            self.compaction_thread.join()
+        with self.lock:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+            for path in self._paths():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            open(self.snapshot_path, 'w').close()
+
+    def close(self):
+        with self.lock:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+
+
+class SQLiteHistoryStore:
+    """Suggestion history in SQLite: indexed on timestamp, backend and difficulty,
+    with an FTS5 index over name, description, technologies and features.
+
+    Same interface as JournalHistoryStore; one connection shared under a lock.
+    Existing JSONL/JSON history is imported once, the first time the database is created.
+    """
+
+    MIGRATED_VERSION = 1  # PRAGMA user_version once the JSONL/JSON import has run
+
+    def __init__(self, settings: Dict):
+        import sqlite3
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.appends_since_retention = 0
+        self.db = sqlite3.connect(settings['database_file'], check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=" + ("NORMAL" if settings['fsync'] else "OFF"))
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS suggestions (
+                id INTEGER PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                backend TEXT NOT NULL DEFAULT '',
+                difficulty TEXT NOT NULL DEFAULT '',
+                name TEXT NOT NULL DEFAULT '',
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_suggestions_timestamp ON suggestions(timestamp);
+            CREATE INDEX IF NOT EXISTS idx_suggestions_backend ON suggestions(backend, id);
+            CREATE INDEX IF NOT EXISTS idx_suggestions_difficulty ON suggestions(difficulty, id);
+            -- Covering index so paging through the History tab never touches the large data column
+            CREATE INDEX IF NOT EXISTS idx_suggestions_listing ON suggestions(id, timestamp, name, difficulty, backend);
+        """)
+        try:
+            self.db.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS suggestions_fts
+                               USING fts5(name, description, technologies, features)""")
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False  # SQLite built without FTS5: search falls back to LIKE
+        self.db.commit()
+        # user_version records the one-time JSON/JSONL import, so a cleared history stays cleared
+        if self.db.execute("PRAGMA user_version").fetchone()[0] < self.MIGRATED_VERSION:
+            if self.db.execute("SELECT 1 FROM suggestions LIMIT 1").fetchone() is None:
+                self._import_jsonl()
+            self.db.execute(f"PRAGMA user_version = {self.MIGRATED_VERSION}")
+            self.db.commit()
+
+    def _import_jsonl(self):
+        paths = [self.settings.get(key) for key in ('snapshot_file', 'journal_file', 'legacy_file')]
+        if not any(path and os.path.exists(path) and os.path.getsize(path) for path in paths):
+            return
+        with self.lock:
+            for entry in JournalHistoryStore(self.settings).iter_entries():
+                self._insert(entry)
+            self.db.commit()
+
+    @property
+    def compressing(self) -> bool:
+        """Whether details are stored compressed; LIKE search (no FTS5) needs them as plain text"""
+        return bool(self.settings.get('compress', True) and self.fts)
+
+    def _encode(self, entry: Dict):
+        """The data column for an entry: zlib-compressed JSON bytes, or JSON text"""
+        data = json.dumps(entry, separators=(',', ':'))
+        if not self.compressing:
+            return data
+        import zlib
+        return zlib.compress(data.encode('utf-8'))
+
+    @staticmethod
+    def _decode(row_id: int, data) -> Dict:
+        """A full entry from its data column, which holds compressed bytes or (older rows) JSON text"""
+        if isinstance(data, bytes):
+            import zlib
+            data = zlib.decompress(data)
+        entry = json.loads(data)
+        entry['id'] = row_id  # the data column is written before the id is assigned
+        return entry
+
+    def _insert(self, entry: Dict):
+        fields = _history_search_fields(entry)
+        cursor = self.db.execute(
+            "INSERT INTO suggestions (id, timestamp, backend, difficulty, name, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (entry.get('id'), entry.get('timestamp', ''), fields['backend'], fields['difficulty'],
+             fields['name'], self._encode(entry)))
+        entry['id'] = cursor.lastrowid
+        if self.fts:
+            self.db.execute(
+                "INSERT INTO suggestions_fts (rowid, name, description, technologies, features) VALUES (?, ?, ?, ?, ?)",
+                (entry['id'], fields['name'], fields['description'], fields['technologies'], fields['features']))
+
+    def append(self, entry: Dict) -> Dict:
+        """Insert one entry (assigns entry['id'])"""
+        entry.pop('id', None)
+        with self.lock:
+            self._insert(entry)
+            self.db.commit()
+            self.appends_since_retention += 1
+            if self.appends_since_retention >= self.settings['retention_every']:
+                self._apply_retention()
+        return entry
+
+    def _apply_retention(self):
+        self.appends_since_retention = 0
+        conditions = []
+        if self.settings.get('max_entries'):
+            row = self.db.execute("SELECT id FROM suggestions ORDER BY id DESC LIMIT 1 OFFSET ?",
+                                  (self.settings['max_entries'],)).fetchone()
+            if row:
+                conditions.append(("id <= ?", row[0]))
+        if self.settings.get('max_age_days'):
+            cutoff = datetime.fromtimestamp(datetime.now().timestamp() - self.settings['max_age_days'] * 86400)
+            conditions.append(("timestamp < ?", cutoff.isoformat()))
+        for condition, value in conditions:
+            if self.fts:
+                self.db.execute(f"DELETE FROM suggestions_fts WHERE rowid IN (SELECT id FROM suggestions WHERE {condition})",
+                                (value,))
+            self.db.execute(f"DELETE FROM suggestions WHERE {condition}", (value,))
+        self.db.commit()
+
+    def compact(self, wait: bool = False, batch_size: int = 1000):
+        """Apply the retention policy, compress details saved as plain text, and refresh planner statistics"""
+        with self.lock:
+            self._apply_retention()
+            self.db.execute("PRAGMA optimize")
+        while self.compressing:
+            with self.lock:
+                rows = self.db.execute("SELECT id, data FROM suggestions WHERE typeof(data) = 'text' LIMIT ?",
+                                       (batch_size,)).fetchall()
+                self.db.executemany("UPDATE suggestions SET data = ? WHERE id = ?",
+                                    [(self._encode(json.loads(data)), row_id) for row_id, data in rows])
+                self.db.commit()
+            if len(rows) < batch_size:
+                break
+
+    def recent(self, limit: int) -> List[Dict]:
+        """The newest `limit` entries, oldest first"""
+        with self.lock:
+            rows = self.db.execute("SELECT id, data FROM suggestions ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._decode(*row) for row in reversed(rows)]
+
+    def iter_entries(self, batch_size: int = 500):
+        """Stream every entry, oldest first, in id-ordered batches"""
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.db.execute("SELECT id, data FROM suggestions WHERE id > ? ORDER BY id LIMIT ?",
+                                       (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            for row_id, data in rows:
+                yield self._decode(row_id, data)
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Turn free text into an FTS5 query of quoted prefix terms (no syntax errors)"""
+        return ' '.join('"' + term.replace('"', '""') + '"*' for term in query.split())
+
+    def _filter_sql(self, query: str = '', backend: Optional[str] = None, difficulty: Optional[str] = None,
+                    since: Optional[str] = None, until: Optional[str] = None):
+        """(FROM clause, WHERE clause, params, ORDER BY column) for a set of filters"""
+        source = "suggestions s"
+        clauses, params = [], []
+        if query.strip():
+            if self.fts:
+                # Walk the full-text index newest-first so LIMIT can stop early
+                source = "suggestions_fts f JOIN suggestions s ON s.id = f.rowid"
+                clauses.append("suggestions_fts MATCH ?")
+                params.append(self._fts_query(query))
+            else:
+                for term in query.split():
+                    clauses.append("s.data LIKE ?")
+                    params.append(f"%{term}%")
+        for clause, value in (("s.backend = ?", backend), ("s.difficulty = ?", difficulty),
+                              ("s.timestamp >= ?", since), ("s.timestamp <= ?", until)):
+            if value:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "f.rowid" if source.startswith("suggestions_fts") else "s.id"
+        return source, where, params, order
+
+    def iter_matching(self, query: str = '', backend: Optional[str] = None, difficulty: Optional[str] = None,
+                      since: Optional[str] = None, until: Optional[str] = None, batch_size: int = 500):
+        """Stream entries matching the filters, oldest first, in keyset batches"""
+        source, where, params, order = self._filter_sql(query, backend, difficulty, since, until)
+        where = f"{where} AND {order} > ?" if where else f"WHERE {order} > ?"
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.db.execute(f"SELECT s.id, s.data FROM {source} {where} ORDER BY {order} LIMIT ?",
+                                       params + [last_id, batch_size]).fetchall()
+            if not rows:
+                return
+            for row_id, data in rows:
+                yield self._decode(row_id, data)
+            last_id = rows[-1][0]
+
+    def search(self, query: str = '', backend: Optional[str] = None, difficulty: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None, limit: int = 200) -> List[Dict]:
+        """Newest entries matching the filters, newest first (indexed query)"""
+        source, where, params, order = self._filter_sql(query, backend, difficulty, since, until)
+        with self.lock:
+            rows = self.db.execute(f"SELECT s.id, s.data FROM {source} {where} ORDER BY {order} DESC LIMIT ?",
+                                   params + [limit]).fetchall()
+        return [self._decode(*row) for row in rows]
+
+    def count(self, **filters) -> int:
+        """Number of entries matching the filters"""
+        source, where, params, _ = self._filter_sql(**filters)
+        with self.lock:
+            return self.db.execute(f"SELECT COUNT(*) FROM {source} {where}", params).fetchone()[0]
+
+    def entry_ids(self) -> List[int]:
+        """Every entry id, ascending"""
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT id FROM suggestions ORDER BY id").fetchall()]
+
+    def page(self, offset: int, limit: int, **filters) -> List[HistorySummary]:
+        """Summary records, newest first (read from the covering index, never the details)"""
+        source, where, params, order = self._filter_sql(**filters)
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT s.id, s.timestamp, s.name, s.difficulty, s.backend FROM {source} {where} "
+                f"ORDER BY {order} DESC LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+        return [HistorySummary(*row) for row in rows]
+
+    def get(self, entry_id: int) -> Optional[Dict]:
+        """Full entry by id"""
+        with self.lock:
+            row = self.db.execute("SELECT id, data FROM suggestions WHERE id = ?", (entry_id,)).fetchone()
+        return self._decode(*row) if row else None
+
+    def distinct_values(self, field: str) -> List[str]:
+        """Sorted distinct values of 'backend' or 'difficulty'"""
+        if field not in ('backend', 'difficulty'):
+            raise ValueError(f"Unknown history field: {field}")
+        with self.lock:
+            rows = self.db.execute(f"SELECT DISTINCT {field} FROM suggestions WHERE {field} != '' ORDER BY {field}").fetchall()
+        return [row[0] for row in rows]
+
+    def clear(self):
+        """Delete the whole history"""
+        with self.lock:
+            self.db.execute("DELETE FROM suggestions")
+            if self.fts:
+                self.db.execute("DELETE FROM suggestions_fts")
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def history_store_errors() -> tuple:
+    """Exceptions a history store raises for an unreadable, locked or corrupt file.
+    
+    sqlite3.Error only once sqlite3 is imported (it can't be raised before), keeping imports light.
+    """
+    sqlite3 = sys.modules.get('sqlite3')
+    return (OSError, sqlite3.Error) if sqlite3 is not None else (OSError,)
+
+
+def create_history_store(settings: Dict):
+    """History store selected by settings['store']"""
+    if settings.get('store') == 'jsonl':
+        return JournalHistoryStore(settings)
+    return SQLiteHistoryStore(settings)
+
+
+# Bulk history export: matching entries are streamed from the store to the file one at a
+# time, so memory stays flat however large the history is
+EXPORT_FORMATS = {'jsonl': 'JSON Lines', 'json': 'JSON', 'csv': 'CSV', 'md': 'Markdown'}
+
+EXPORT_CSV_COLUMNS = ('id', 'timestamp', 'backend', 'name', 'description', 'difficulty', 'estimated_duration',
+                      'technologies', 'key_features', 'learning_outcomes', 'prerequisites',
+                      'potential_extensions', 'resources', 'skill_level', 'interests', 'time', 'focus')
+
+_MARKDOWN_LIST_SECTIONS = (('Technologies', 'technologies'), ('Key Features', 'key_features'),
+                           ('Learning Outcomes', 'learning_outcomes'), ('Prerequisites', 'prerequisites'),
+                           ('Potential Extensions', 'potential_extensions'), ('Resources', 'resources'))
+
+
+def _as_list(value) -> List[str]:
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value]
+    return [str(value)] if value else []
+
+
+def project_markdown(project: Dict, heading: str = '#') -> str:
+    """A project as a Markdown section with every field, headed at the given level"""
+    lines = [f"{heading} {project.get('name') or 'Project'}", '']
+    if project.get('description'):
+        lines += [str(project['description']), '']
+    for label, value in (('Difficulty', project.get('difficulty')),
+                         ('Duration', project.get('estimated_duration') or project.get('duration')),
+                         ('Backend', project.get('backend_used'))):
+        if value:
+            lines.append(f"**{label}**: {value}  ")
+    lines.append('')
+    for title, key in _MARKDOWN_LIST_SECTIONS:
+        items = _as_list(project.get(key) or (project.get('features') if key == 'key_features' else None))
+        if items:
+            lines += [f"{heading}# {title}", ''] + [f"- {item}" for item in items] + ['']
+    return '\n'.join(lines) + '\n'
+
+
+def _csv_row(entry: Dict) -> List[str]:
+    """One CSV row for a history entry; list fields are joined with '; '"""
+    project = entry.get('project') or {}
+    user_input = entry.get('user_input') or {}
+    values = dict(project, id=entry.get('id'), timestamp=entry.get('timestamp'), backend=entry.get('backend'))
+    values.setdefault('key_features', project.get('features'))
+    for key in ('skill_level', 'interests', 'time', 'focus'):
+        values[key] = user_input.get(key)
+    return ['; '.join(_as_list(values.get(column))) for column in EXPORT_CSV_COLUMNS]
+
+
+def write_history_export(entries, output, fmt: str, total: Optional[int] = None, progress=None,
+                         cancel_token: Optional['CancelToken'] = None, title: str = 'ProjectFlow AI ideas') -> int:
+    """Write history entries to a text file object as they are read; returns how many were written.
+
+    progress(done, total) is called every few entries. Stops early, with the
+    file incomplete, once cancel_token is cancelled.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    writer = None
+    if fmt == 'csv':
+        import csv
+        writer = csv.writer(output)
+        writer.writerow(EXPORT_CSV_COLUMNS)
+    elif fmt == 'json':
+        output.write('[')
+    elif fmt == 'md':
+        output.write(f"# {title}\n\n")
+    count = 0
+    for entry in entries:
+        if cancel_token is not None and cancel_token.cancelled:
+            break
+        if fmt == 'jsonl':
+            output.write(json.dumps(entry) + '\n')
+        elif fmt == 'json':
+            output.write((',' if count else '') + '\n  ' + json.dumps(entry, indent=2).replace('\n', '\n  '))
+        elif fmt == 'csv':
+            writer.writerow(_csv_row(entry))
+        else:
+            project = entry.get('project') or {}
+            output.write(project_markdown(project, heading='##'))
+            output.write(f"_Saved {str(entry.get('timestamp', ''))[:16].replace('T', ' ')}"
+                         f" via {entry.get('backend') or 'unknown'}_\n\n")
+        count += 1
+        if progress is not None and count % 100 == 0:
+            progress(count, total)
+    if fmt == 'json':
+        output.write('\n]\n' if count else ']\n')
+    if progress is not None:
+        progress(count, total)
+    return count
+
+
+# Near-duplicate detection over history: MinHash signatures of the word shingles in each
+# idea's name, description and key features, indexed with LSH banding. Matches start to
+# show up around a similarity of (1 / bands) ** (bands / num_perm); num_perm must be a
+# multiple of bands
+DEDUP_DEFAULTS = {
+    'enabled': False,          # reject near-duplicates in generate_project_idea
+    'threshold': 0.6,          # estimated Jaccard similarity that counts as a repeat
+    'num_perm': 48,
+    'bands': 12,
+    'shingle_size': 2,         # words per shingle
+    'retries': 2,              # fresh generations after a near-duplicate
+    'avoid_hints': 3,          # closest saved ideas named in the retry prompt (0 = plain retry)
+    'save_duplicates': False,  # save the last attempt even if every retry was a repeat too
+    'index_file': None,        # default: the history file with a .minhash extension
+}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_SHINGLE_STOPWORDS = frozenset("a an and are as at be by for from in into is it its of on or that the this "
+                               "to with you your".split())
+
+
+class IdeaIndex:
+    """MinHash/LSH index of saved ideas for near-duplicate lookups.
+    
+    Signatures live in one flat array and each LSH band is a sorted array of
+    band hashes searched with bisect, so an idea costs about
+    4 * num_perm + 16 * bands bytes and a lookup is `bands` binary searches
+    plus one signature comparison per candidate, however long the history.
+    Entries are appended to `path` as they are added, so a restart reads the
+    signatures back instead of rehashing the history. Entries without text
+    are recorded there under their negated id with an empty signature, so
+    the file knows the newest history id it has seen.
+    """
+    
+    def __init__(self, settings: Dict, path: Optional[str] = None):
+        self.settings = settings
+        self.num_perm = settings['num_perm']
+        self.bands = settings['bands']
+        if self.num_perm % self.bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.rows = self.num_perm // self.bands
+        rng = random.Random(0x5EED)  # fixed so signatures stay comparable across runs
+        self.permutations = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(_MERSENNE_PRIME))
+                             for _ in range(self.num_perm)]
+        self.path = path
+        self.file = None
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.pending = []  # entries added while load() runs
+        self._reset()
+    
+    def _reset(self):
+        self.ids = array('q')
+        self.signatures = array('I')
+        self.covered = 0  # newest history id indexed or seen without text
+        self.band_keys = [array('q') for _ in range(self.bands)]
+        self.band_slots = [array('q') for _ in range(self.bands)]
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def shingles(self, project: Dict) -> set:
+        """Overlapping word n-grams of the idea's name, description and key features"""
+        features = project.get('key_features') or project.get('features') or []
+        if isinstance(features, str):
+            features = [features]
+        text = ' '.join([str(project.get('name', '')), str(project.get('description', ''))] +
+                        [str(feature) for feature in features])
+        words = [word for word in re.findall(r'[a-z0-9]+', text.lower()) if word not in _SHINGLE_STOPWORDS]
+        size = self.settings['shingle_size']
+        if len(words) <= size:
+            return {' '.join(words)} if words else set()
+        return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    
+    def signature(self, project: Dict) -> Optional[array]:
+        """MinHash signature of the idea, or None if it has no text"""
+        import zlib
+        hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in self.shingles(project)]
+        if not hashes:
+            return None
+        return array('I', [min([(a * x + b) % _MERSENNE_PRIME for x in hashes]) & 0xFFFFFFFF
+                           for a, b in self.permutations])
+    
+    def _band_key(self, raw: bytes, band: int) -> int:
+        """Hash of one band of a signature given as bytes (in-process only, so never persisted)"""
+        width = 4 * self.rows
+        return hash(raw[band * width:(band + 1) * width])
+    
+    def _persist(self, entry_id: int, signature: array):
+        if self.path:
+            if self.file is None:
+                self.file = open(self.path, 'ab')
+            self.file.write(array('q', [entry_id]).tobytes() + signature.tobytes())
+            self.file.flush()
+    
+    def _mark(self, entry_id: int):
+        """Remember a history entry that has no signature"""
+        if entry_id > self.covered:
+            self.covered = entry_id
+            self._persist(-entry_id, array('I', bytes(4 * self.num_perm)))
+    
+    def _insert(self, entry_id: int, signature: array, persist: bool):
+        self.covered = max(self.covered, entry_id)
+        slot = len(self.ids)
+        self.ids.append(entry_id)
+        self.signatures.extend(signature)
+        raw = signature.tobytes()
+        for band in range(self.bands):
+            key = self._band_key(raw, band)
+            position = bisect_right(self.band_keys[band], key)
+            self.band_keys[band].insert(position, key)
+            self.band_slots[band].insert(position, slot)
+        if persist:
+            self._persist(entry_id, signature)
+    
+    def add(self, entry_id: int, project: Dict):
+        """Index a saved idea"""
+        signature = self.signature(project)
+        with self.lock:
+            if not self.ready.is_set():
+                self.pending.append((entry_id, signature))
+            elif signature is None:
+                self._mark(entry_id)
+            else:
+                self._insert(entry_id, signature, persist=True)
+    
+    def query(self, project: Dict, limit: int = 3) -> List[tuple]:
+        """(entry id, estimated similarity) of saved ideas at or above the threshold, closest first"""
+        return self.query_signature(self.signature(project), limit)
+    
+    def query_signature(self, signature: Optional[array], limit: int = 3) -> List[tuple]:
+        """query() for an already computed signature"""
+        if signature is None or not self.ready.is_set():
+            return []
+        matches = []
+        raw = signature.tobytes()
+        with self.lock:
+            candidates = set()
+            for band in range(self.bands):
+                key = self._band_key(raw, band)
+                keys = self.band_keys[band]
+                position = bisect_left(keys, key)
+                while position < len(keys) and keys[position] == key:
+                    candidates.add(self.band_slots[band][position])
+                    position += 1
+            for slot in candidates:
+                stored = self.signatures[slot * self.num_perm:(slot + 1) * self.num_perm]
+                similarity = sum(1 for mine, theirs in zip(signature, stored) if mine == theirs) / self.num_perm
+                if similarity >= self.settings['threshold']:
+                    matches.append((self.ids[slot], round(similarity, 3)))
+        matches.sort(key=lambda match: -match[1])
+        return matches[:limit]
+    
+    def _header(self) -> bytes:
+        return (json.dumps({'version': 1, 'num_perm': self.num_perm, 'bands': self.bands,
+                            'shingle_size': self.settings['shingle_size'], 'byteorder': sys.byteorder}) + '\n').encode()
+    
+    def _read_file(self) -> Optional[tuple]:
+        """(ids, flat signatures, newest id seen) saved at `path`, or None if missing or built with other settings"""
+        if not self.path:
+            return None
+        try:
+            with open(self.path, 'rb') as f:
+                if f.readline() != self._header():
+                    return None
+                data = f.read()
+        except OSError:
+            return None
+        # Records are an int64 id followed by num_perm uint32s: read them as uint32
+        # words, then split the two id words of each record out of the signatures
+        stride = self.num_perm + 2
+        words = array('I')
+        words.frombytes(data[:len(data) - len(data) % (4 * stride)])
+        low, high = words[0::stride], words[1::stride]
+        if sys.byteorder != 'little':
+            low, high = high, low
+        ids = array('q', [low_word | (high_word << 32) if high_word < 0x80000000
+                          else (low_word | (high_word << 32)) - (1 << 64) for low_word, high_word in zip(low, high)])
+        del words[0::stride]
+        del words[0::stride - 1]
+        covered = max(max(ids, default=0), -min(ids, default=0))
+        if ids and min(ids) < 0:
+            ids, words = self._select(ids, words, [slot for slot, entry_id in enumerate(ids) if entry_id > 0])
+        return ids, words, covered
+    
+    def _select(self, ids: array, signatures: array, slots: List[int]) -> tuple:
+        """The records at `slots` of a flat (ids, signatures) pair"""
+        kept = array('I')
+        for slot in slots:
+            kept.extend(signatures[slot * self.num_perm:(slot + 1) * self.num_perm])
+        return array('q', [ids[slot] for slot in slots]), kept
+    
+    def _write_file(self):
+        if not self.path:
+            return
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(self._header())
+            for slot, entry_id in enumerate(self.ids):
+                f.write(array('q', [entry_id]).tobytes() +
+                        self.signatures[slot * self.num_perm:(slot + 1) * self.num_perm].tobytes())
+            if self.covered > max(self.ids, default=0):
+                f.write(array('q', [-self.covered]).tobytes() + bytes(4 * self.num_perm))
+        os.replace(temp_path, self.path)
+    
+    def load(self, store):
+        """Read the index file, rebuilding it from the history store if it is missing, built with
+        other settings or behind the store's newest entry, and dropping ids the store no longer has.
+        Lookups find nothing until this finishes."""
+        saved = self._read_file()
+        live = store.entry_ids()
+        newest = live[-1] if live else 0
+        rebuild = saved is None or saved[2] != newest
+        rewrite = rebuild
+        if rebuild:
+            ids, signatures = array('q'), array('I')
+            for entry in store.iter_entries():
+                signature = self.signature(entry.get('project') or {})
+                if signature is not None and entry.get('id') is not None:
+                    ids.append(entry['id'])
+                    signatures.extend(signature)
+        else:
+            ids, signatures, _ = saved
+            live = set(live)
+            kept = [slot for slot, entry_id in enumerate(ids) if entry_id in live]
+            if len(kept) < len(ids):  # removed by retention or compaction
+                ids, signatures = self._select(ids, signatures, kept)
+                rewrite = True
+        
+        raw = signatures.tobytes()
+        record, width = 4 * self.num_perm, 4 * self.rows
+        band_tables = []
+        for band in range(self.bands):
+            keys = [hash(raw[offset:offset + width]) for offset in range(band * width, len(raw), record)]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            band_tables.append((array('q', [keys[slot] for slot in order]), array('q', order)))
+        
+        with self.lock:
+            self.ids, self.signatures = ids, signatures
+            self.band_keys = [keys for keys, _ in band_tables]
+            self.band_slots = [slots for _, slots in band_tables]
+            self.covered = max(newest, max(ids, default=0))
+            if rewrite:
+                self._write_file()
+            indexed = set(self.ids) if self.pending else ()
+            for entry_id, signature in self.pending:
+                if signature is None:
+                    self._mark(entry_id)
+                elif entry_id not in indexed:
+                    self._insert(entry_id, signature, persist=True)
+            self.pending = []
+            self.ready.set()
+    
+    def clear(self):
+        with self.lock:
+            self._reset()
+            self.pending = []
+            self._write_file()
+    
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+# Inside an object: a JSON string (unterminated strings run to the end) or a brace
+_JSON_TOKEN = re.compile(r'("[^"\\]*(?:\\.[^"\\]*)*(?:"|\\?\Z))|(\{)|(\})', re.DOTALL)
+
+
+def _json_object_spans(text: str, position: int, end: int) -> List[tuple]:
+    """(start, end) of the outermost balanced objects in text[position:end], in order"""
+    spans = []
+    while position < end:
+        start = text.find('{', position, end)
+        if start < 0:
+            break
+        stack = [start]
+        for match in _JSON_TOKEN.finditer(text, start + 1, end):
+            kind = match.lastindex
+            if kind == 2:
+                stack.append(match.start())
+            elif kind == 3:
+                opened = stack.pop()
+                # Drop objects nested in this one; keeps only the outermost spans
+                while spans and spans[-1][0] > opened:
+                    spans.pop()
+                spans.append((opened, match.end()))
+                if not stack:
+                    position = match.end()
+                    break
+        else:
+            break  # unclosed braces run to the end
+    return spans
+
+
+def extract_json_object(text: str) -> Optional[Dict]:
+    """Return the last balanced top-level JSON object in text, or None.
+
+    The common case (one object, possibly fenced and surrounded by prose) is
+    a single json.loads between the first '{' and the last '}'. Otherwise one
+    forward pass tracks braces on a stack: prose between objects is skipped
+    with str.find and strings inside objects are consumed by one regex match,
+    so braces in values and ```json fences with or without a trailing newline
+    don't matter. Linear in the input; no regex backtracking.
+    """
+    end = text.rfind('}') + 1
+    start = text.find('{', 0, end)
+    if start < 0:
+        return None
+    try:
+        value = json.loads(text[start:end], strict=False)
+        if isinstance(value, dict):
+            return value
+    except ValueError:
+        pass
+    
+    for start, end in reversed(_json_object_spans(text, start, end)):
+        try:
+            value = json.loads(text[start:end], strict=False)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def extract_json_objects(text: str) -> List[Dict]:
+    """Return every top-level JSON object in text, in order.
+
+    Handles a JSON array of objects (fenced or not), objects separated by
+    prose, and a single object wrapping the list ({"ideas": [...]}). An array
+    cut off mid-object (the completion hit its token limit) yields the objects
+    that did close.
+    """
+    first_object = text.find('{')
+    if first_object < 0:
+        return []
+    end = text.rfind(']') + 1
+    start = text.find('[', 0, end)
+    if 0 <= start < first_object:
+        try:
+            value = json.loads(text[start:end], strict=False)
+            if isinstance(value, list):
+                return [item for item in value if isinstance(item, dict)]
+        except ValueError:
+            pass
+
+    objects = []
+    for start, end in _json_object_spans(text, first_object, text.rfind('}') + 1):
+        try:
+            value = json.loads(text[start:end], strict=False)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            objects.append(value)
+    if len(objects) == 1 and 'name' not in objects[0]:
+        for value in objects[0].values():
+            if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+                return value
+    return objects
+
+
+# Structured output: the project schema goes to the provider (response_format for
+# OpenAI-compatible backends, responseMimeType/responseSchema for Gemini), every answer
+# is checked against it, and only fields that still fail are asked for again
+STRUCTURED_OUTPUT_DEFAULTS = {
+    'enabled': True,           # send the schema to backends with a 'structured_output' mode
+    'repair': True,            # ask again for just the invalid fields of an answer
+    'repair_max_tokens': 400,  # completion cap of a repair call
+}
+
+_STRING_LIST = {'type': 'array', 'items': {'type': 'string'}}
+
+PROJECT_SCHEMA = {
+    'title': 'project',
+    'type': 'object',
+    'properties': {
+        'name': {'type': 'string', 'minLength': 1},
+        'description': {'type': 'string', 'minLength': 1},
+        'technologies': dict(_STRING_LIST, minItems=1),
+        'difficulty': {'type': 'string', 'minLength': 1},
+        'estimated_duration': {'type': 'string', 'minLength': 1},
+        'key_features': dict(_STRING_LIST, minItems=1),
+        'learning_outcomes': dict(_STRING_LIST, minItems=1),
+        'prerequisites': _STRING_LIST,
+        'potential_extensions': _STRING_LIST,
+        'resources': _STRING_LIST,
+    },
+    'required': ['name', 'description', 'technologies', 'difficulty', 'estimated_duration', 'key_features',
+                 'learning_outcomes'],
+}
+
+# A 400 body naming these means the model rejected the structured-output fields themselves,
+# not that some other part of the request was malformed
+_STRUCTURED_REJECTION = re.compile(
+    r'response_?format|response_?schema|response_?mime_?type|json_?schema|structured[ _-]?outputs?'
+    r'|(?:unsupported|unknown|unrecognized) (?:parameter|field|argument)'
+    r'|(?:parameter|field|argument)\b[^.\n]{0,60}\bnot supported',
+    re.IGNORECASE)
+
+# Keys models use instead of the schema's, renamed before validation
+_PROJECT_ALIASES = {'title': 'name', 'project_name': 'name', 'tech_stack': 'technologies',
+                    'duration': 'estimated_duration', 'features': 'key_features'}
+
+
+def project_list_schema(count: int) -> Dict:
+    """Schema of a multi-idea answer: {"ideas": [count projects]} (providers want an object at the top)"""
+    return {'title': 'project_ideas', 'type': 'object',
+            'properties': {'ideas': {'type': 'array', 'items': PROJECT_SCHEMA, 'minItems': count, 'maxItems': count}},
+            'required': ['ideas']}
+
+
+def provider_schema(schema: Dict, dialect: str) -> Dict:
+    """The subset of a JSON schema a provider accepts.
+
+    'google' is Gemini's responseSchema (upper-case types, no string
+    lengths); 'openai' is a strict json_schema, where every property is
+    required and no others are allowed.
+    """
+    converted = {}
+    for key, value in schema.items():
+        if key == 'type':
+            converted[key] = value.upper() if dialect == 'google' else value
+        elif key == 'properties':
+            converted[key] = {name: provider_schema(spec, dialect) for name, spec in value.items()}
+        elif key == 'items':
+            converted[key] = provider_schema(value, dialect)
+        elif key in ('required', 'enum', 'description') or (dialect == 'google' and key in ('minItems', 'maxItems')):
+            converted[key] = value
+    if dialect == 'openai' and schema.get('type') == 'object':
+        converted['required'] = list(converted.get('properties', ()))
+        converted['additionalProperties'] = False
+    return converted
+
+
+def _coerce_value(value, spec: Dict):
+    """A cheap fix for a value of the wrong type: lists joined into strings, strings split into lists"""
+    kind = spec.get('type')
+    if kind == 'string':
+        if isinstance(value, list):
+            return ', '.join(str(item) for item in value if item not in (None, ''))
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+    elif kind == 'array':
+        if isinstance(value, str):
+            separator = '\n' if '\n' in value.strip() else ','
+            value = [item.strip().lstrip('-*• ').strip() for item in value.split(separator)]
+            return [item for item in value if item]
+        if isinstance(value, list) and spec.get('items', {}).get('type') == 'string':
+            return [item if isinstance(item, str) else json.dumps(item) if isinstance(item, dict) else str(item)
+                    for item in value if item not in (None, '')]
+    return value
+
+
+def compile_validator(schema: Dict):
+    """Compile an object schema into a check returning the names of its invalid properties.
+
+    The check takes a dict, first renames aliased keys and coerces values of
+    the wrong type in place, then returns the properties that are missing
+    (if required) or still break their type, minLength or minItems ([] when
+    valid). Covers the subset PROJECT_SCHEMA uses: string and
+    array-of-string properties.
+    """
+    required = frozenset(schema.get('required', ()))
+    checks = []
+    for name, spec in schema.get('properties', {}).items():
+        minimum = spec.get('minLength', spec.get('minItems', 0))
+        if spec.get('type') == 'string':
+            def check(value, minimum=minimum):
+                return isinstance(value, str) and len(value.strip()) >= minimum
+        elif spec.get('type') == 'array':
+            strings = spec.get('items', {}).get('type') == 'string'
+
+            def check(value, minimum=minimum, strings=strings):
+                return (isinstance(value, list) and len(value) >= minimum and
+                        (not strings or all(isinstance(item, str) for item in value)))
+        else:
+            def check(value):
+                return True
+        checks.append((name, spec, name in required, check))
+    checks = tuple(checks)
+    aliases = tuple((alias, name) for alias, name in _PROJECT_ALIASES.items() if name in schema.get('properties', {}))
+
+    def invalid_fields(value: Dict) -> List[str]:
+        if not isinstance(value, dict):
+            return [name for name, _, needed, _ in checks if needed]
+        for alias, name in aliases:
+            if alias in value and value.get(name) in (None, '', []):
+                value[name] = value.pop(alias)
+        invalid = []
+        for name, spec, needed, check in checks:
+            field = value.get(name)
+            if field is None:
+                if needed:
+                    invalid.append(name)
+            elif not check(field):
+                field = value[name] = _coerce_value(field, spec)
+                if not check(field):
+                    invalid.append(name)
+        return invalid
+
+    return invalid_fields
+
+
+validate_project = compile_validator(PROJECT_SCHEMA)
+
+
+class JSONObjectScanner:
+    """Incremental scanner that spots when the first top-level JSON object closes.
+
+    Fed with streamed text chunks; strings and escapes inside the object are
+    honoured so braces in values don't confuse it.
+    """
+
+    _special = re.compile(r'["\\{}]')
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.complete = False
+
+    def feed(self, text: str) -> bool:
+        """Consume a chunk; returns True once a complete object has been seen"""
+        if self.complete or not text:
+            return self.complete
+        # An escape left pending by the previous chunk applies to this chunk's first char
+        start = 1 if self.escape else 0
+        self.escape = False
+        skip_at = -1
+        for match in self._special.finditer(text, start):
+            index = match.start()
+            if index == skip_at:
+                continue
+            ch = match.group()
+            if self.in_string:
+                if ch == '\\':
+                    if index + 1 == len(text):
+                        self.escape = True
+                    else:
+                        skip_at = index + 1
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = self.depth > 0
+            elif ch == '{':
+                self.depth += 1
+            elif ch == '}' and self.depth:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.complete = True
+                    return True
+        return False
+
+
+class CancelToken:
+    """Cooperative cancellation for an in-flight backend call.
+
+    Connections used while the token is active (see cancellation_scope) are
+    shut down on cancel(), which aborts a blocked socket read.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._children = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to timeout seconds; returns True if cancelled meanwhile"""
+        return self._event.wait(timeout)
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            connections = list(self._connections)
+            self._connections.clear()
+            children = list(self._children)
+            self._children.clear()
+        for conn in connections:
+            _shutdown_connection(conn)
+        for child in children:
+            child.cancel()
+    
+    def child(self) -> 'CancelToken':
+        """A token that is cancelled along with this one, but can also be cancelled on its own"""
+        token = CancelToken()
+        with self._lock:
+            if not self._event.is_set():
+                self._children.add(token)
+                return token
+        token.cancel()
+        return token
+    
+    def _detach(self, child: 'CancelToken'):
+        with self._lock:
+            self._children.discard(child)
+
+    def _register(self, conn):
+        with self._lock:
+            if not self._event.is_set():
+                self._connections.add(conn)
+                return
+        _shutdown_connection(conn)
+
+    def _release(self):
+        with self._lock:
+            self._connections.clear()
+
+
+def _shutdown_connection(conn):
+    sock = getattr(conn, 'sock', None)
+    if sock is not None:
+        import socket
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+_cancel_scope = threading.local()
+
+
+@contextmanager
+def cancellation_scope(token: Optional[CancelToken]):
+    """Attach a CancelToken to HTTP calls made by the current thread"""
+    previous = getattr(_cancel_scope, 'token', None)
+    _cancel_scope.token = token
+    try:
+        yield token
+    finally:
+        _cancel_scope.token = previous
+        if token is not None:
+            token._release()
+
+
+# Retries and time budgets for backend calls
+RETRY_DEFAULTS = {
+    'attempts': 2,             # tries per backend on 429/5xx/connection errors
+    'backoff_base': 1.0,       # backoff before the first retry; doubles per retry, with jitter
+    'backoff_max': 8.0,
+    'min_attempt': 0.5,        # don't start an HTTP attempt with less budget left than this
+    'fallback_share': 0.3,     # part of the remaining budget held back for fallback backends
+    'deadline': 30.0,          # default end-to-end budget per generation in seconds (None = unbounded)
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a generation runs out of its time budget"""
+
+
+class Deadline:
+    """An end-to-end time budget shared by a call's attempts, retries and fallbacks"""
+    
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+    
+    @classmethod
+    def coerce(cls, value) -> Optional['Deadline']:
+        """Accept a Deadline, a number of seconds or None"""
+        if value is None or isinstance(value, Deadline):
+            return value
+        return cls(float(value))
+    
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+    
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+    
+    def timeout(self, connect: float, read: float) -> tuple:
+        """(connect, read) HTTP timeouts clipped to the remaining budget"""
+        remaining = self.remaining()
+        return (min(connect, remaining), min(read, remaining))
+    
+    def share(self, fraction: float) -> 'Deadline':
+        """A sub-deadline using `fraction` of what is left, e.g. for one of several fallbacks"""
+        sub = Deadline(0)
+        sub.seconds = self.remaining() * fraction
+        sub.expires_at = time.monotonic() + sub.seconds
+        return sub
+
+
+class DeadlineTimer:
+    """One daemon thread that runs callbacks at their deadlines, kept in a heap.
+
+    Replaces a threading.Timer (and its thread) per scoped call. Cancelled
+    entries stay in the heap until they come due, or until they make up most
+    of it and it is rebuilt.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.heap = []          # [when, seq, callback]; callback None once cancelled
+        self.sequence = 0
+        self.cancelled = 0
+        self.thread = None
+
+    def schedule(self, delay: float, callback) -> list:
+        """Run callback() in `delay` seconds; returns a handle for cancel()"""
+        with self.condition:
+            self.sequence += 1
+            entry = [time.monotonic() + delay, self.sequence, callback]
+            heappush(self.heap, entry)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='deadline-timer', daemon=True)
+                self.thread.start()
+            if self.heap[0] is entry:
+                self.condition.notify()
+        return entry
+
+    def cancel(self, entry: list):
+        with self.condition:
+            if entry[2] is None:
+                return
+            entry[2] = None
+            self.cancelled += 1
+            if self.cancelled > 64 and self.cancelled * 2 > len(self.heap):
+                self.heap = [e for e in self.heap if e[2] is not None]
+                heapify(self.heap)
+                self.cancelled = 0
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    while self.heap and self.heap[0][2] is None:
+                        heappop(self.heap)
+                        self.cancelled -= 1
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+                    delay = self.heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self.condition.wait(delay)
+                entry = heappop(self.heap)
+                callback, entry[2] = entry[2], None
+            try:
+                callback()
+            except Exception:
+                pass
+
+
+_deadline_timer = DeadlineTimer()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline], token: Optional[CancelToken] = None):
+    """Yield a token that is cancelled when the deadline passes (or when `token` is)"""
+    if deadline is None:
+        yield token
+        return
+    child = token.child() if token else CancelToken()
+    timer = _deadline_timer.schedule(deadline.remaining(), child.cancel)
+    try:
+        yield child
+    finally:
+        _deadline_timer.cancel(timer)
+        if token:
+            token._detach(child)
+
+
+# Client-side rate limiting per backend. Any key can be overridden per backend with a
+# 'rate_limit' dict in its AI_BACKENDS entry, e.g. AI_BACKENDS['openai']['rate_limit'] = {'requests_per_minute': 500}
+RATE_LIMIT_DEFAULTS = {
+    'requests_per_minute': 60,
+    'tokens_per_minute': 60000,    # None disables the token budget
+    'initial_concurrency': 4,
+    'min_concurrency': 1,
+    'max_concurrency': 16,
+    'default_backoff': 1.5,        # seconds to hold off after a 429 without Retry-After
+    'max_wait': 60.0,              # longest a caller queues for a slot before giving up
+}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a caller would have to wait longer than the limiter's max_wait"""
+    
+    def __init__(self, backend_name: str, retry_after: float):
+        super().__init__(f"rate limited by {backend_name} (retry after {retry_after:.1f}s)")
+        self.retry_after = retry_after
+
+
+def _parse_duration(value) -> Optional[float]:
+    """Seconds from '20', '1.5', '20ms', '1s', '6m0s' or '1h2m3.5s' style values"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value)
+    if not parts:
+        return None
+    scale = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def _retry_after_seconds(response) -> Optional[float]:
+    """How long a 429 response asks us to back off: Retry-After header or Gemini's RetryInfo"""
+    header = response.headers.get('Retry-After')
+    if header:
+        from email.utils import parsedate_to_datetime
+        seconds = _parse_duration(header)
+        if seconds is not None:
+            return seconds
+        try:
+            return max((parsedate_to_datetime(header) - datetime.now(parsedate_to_datetime(header).tzinfo)).total_seconds(), 0)
+        except (TypeError, ValueError):
+            pass
+    try:
+        details = response.json().get('error', {}).get('details', [])
+    except (ValueError, AttributeError):
+        return None
+    for detail in details if isinstance(details, list) else []:
+        if isinstance(detail, dict) and 'retryDelay' in detail:
+            return _parse_duration(detail['retryDelay'])
+    return None
+
+
+class RatePermit:
+    """A slot granted by BackendRateLimiter.acquire(); release it exactly once"""
+    
+    def __init__(self, limiter: 'BackendRateLimiter', tokens: int):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.released = False
+    
+    def release(self, response=None, tokens_used: Optional[int] = None):
+        """Free the slot, feeding back the response status/headers and actual token usage"""
+        if not self.released:
+            self.released = True
+            self.limiter._release(self, response, tokens_used)
+
+
+class BackendRateLimiter:
+    """Token buckets for requests/min and tokens/min plus an adaptive concurrency limit.
+    
+    Callers queue in acquire() instead of hitting an endpoint that has told us to
+    back off: a 429 halves the concurrency limit and blocks new requests for its
+    Retry-After; successes grow the limit again (AIMD). Provider rate-limit
+    headers (x-ratelimit-remaining-*/reset-*) keep the buckets in sync.
+    """
+    
+    def __init__(self, backend_name: str, settings: Dict):
+        self.backend_name = backend_name
+        self.settings = settings
+        self.condition = threading.Condition()
+        now = time.monotonic()
+        self.refilled_at = now
+        self.request_budget = float(settings['requests_per_minute'])
+        self.token_budget = float(settings['tokens_per_minute'] or 0)
+        self.concurrency = float(settings['initial_concurrency'])
+        self.in_flight = 0
+        self.waiting = 0
+        self.blocked_until = 0.0
+        self.throttled = 0
+    
+    def _refill(self, now: float):
+        elapsed = now - self.refilled_at
+        self.refilled_at = now
+        rpm = self.settings['requests_per_minute']
+        self.request_budget = min(float(rpm), self.request_budget + elapsed * rpm / 60.0)
+        tpm = self.settings['tokens_per_minute']
+        if tpm:
+            self.token_budget = min(float(tpm), self.token_budget + elapsed * tpm / 60.0)
+    
+    def _wait_time(self, now: float, tokens: int) -> Optional[float]:
+        """Seconds until a request could start; None means wait for a slot to free up"""
+        waits = [self.blocked_until - now]
+        if self.request_budget < 1:
+            waits.append((1 - self.request_budget) * 60.0 / self.settings['requests_per_minute'])
+        tpm = self.settings['tokens_per_minute']
+        if tpm:
+            needed = min(tokens, tpm)  # a request larger than the whole budget waits for a full bucket
+            if self.token_budget < needed:
+                waits.append((needed - self.token_budget) * 60.0 / tpm)
+        wait = max(waits)
+        if wait <= 0 and self.in_flight >= max(int(self.concurrency), self.settings['min_concurrency']):
+            return None
+        return wait
+    
+    def acquire(self, tokens: int = 0, cancel_token: Optional[CancelToken] = None,
+                timeout: Optional[float] = None) -> RatePermit:
+        """Block until the request fits the budgets; raises RateLimitExceeded past the timeout"""
+        max_wait = self.settings['max_wait'] if timeout is None else timeout
+        deadline = time.monotonic() + max_wait
+        with self.condition:
+            self.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._wait_time(now, tokens)
+                    if wait is not None and wait <= 0:
+                        self.request_budget -= 1
+                        if self.settings['tokens_per_minute']:
+                            self.token_budget -= tokens
+                        self.in_flight += 1
+                        return RatePermit(self, tokens)
+                    if cancel_token and cancel_token.cancelled:
+                        raise RateLimitExceeded(self.backend_name, 0.0)
+                    if wait is not None and now + wait > deadline:
+                        raise RateLimitExceeded(self.backend_name, wait)
+                    if now >= deadline:
+                        raise RateLimitExceeded(self.backend_name, 0.0)
+                    pause = deadline - now if wait is None else wait
+                    if cancel_token:
+                        pause = min(pause, 0.25)
+                    self.condition.wait(pause)
+            finally:
+                self.waiting -= 1
+    
+    def has_headroom(self, tokens: int = 0, reserve: int = 1) -> bool:
+        """Whether a request could start now and still leave `reserve` requests and slots for others"""
+        with self.condition:
+            now = time.monotonic()
+            self._refill(now)
+            if self.waiting or self.blocked_until > now or self.request_budget < 1 + reserve:
+                return False
+            if self.settings['tokens_per_minute'] and self.token_budget < tokens * (1 + reserve):
+                return False
+            return self.in_flight + reserve < max(int(self.concurrency), self.settings['min_concurrency'])
+    
+    def _release(self, permit: RatePermit, response, tokens_used: Optional[int]):
+        with self.condition:
+            now = time.monotonic()
+            self.in_flight -= 1
+            if tokens_used is not None and self.settings['tokens_per_minute']:
+                self.token_budget -= tokens_used - permit.tokens
+            if response is not None:
+                self._observe(now, response)
+            self.condition.notify_all()
+    
+    def _observe(self, now: float, response):
+        status = response.status_code
+        settings = self.settings
+        if status == 429:
+            self.throttled += 1
+            self.concurrency = max(float(settings['min_concurrency']), self.concurrency / 2)
+            retry_after = _retry_after_seconds(response)
+            self.blocked_until = max(self.blocked_until,
+                                     now + (retry_after if retry_after is not None else settings['default_backoff']))
+        elif status < 400:
+            self.concurrency = min(float(settings['max_concurrency']), self.concurrency + 1 / self.concurrency)
+        
+        headers = response.headers
+        for kind in ('requests', 'tokens'):
+            remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+            if remaining is None:
+                continue
+            try:
+                remaining = float(remaining)
+            except ValueError:
+                continue
+            if kind == 'requests':
+                self.request_budget = min(self.request_budget, remaining)
+            elif settings['tokens_per_minute']:
+                self.token_budget = min(self.token_budget, remaining)
+            if remaining <= 0:
+                reset = _parse_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+                if reset:
+                    self.blocked_until = max(self.blocked_until, now + reset)
+    
+    def stats(self) -> Dict:
+        with self.condition:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'concurrency_limit': max(int(self.concurrency), self.settings['min_concurrency']),
+                'in_flight': self.in_flight,
+                'queued': self.waiting,
+                'requests_available': round(self.request_budget, 2),
+                'tokens_available': round(self.token_budget) if self.settings['tokens_per_minute'] else None,
+                'blocked_for': round(max(self.blocked_until - now, 0), 2),
+                'throttled': self.throttled,
+            }
+
+# Single-flight: identical prompts sent to the same backend while one is in flight share
+# its result instead of each paying for a provider call
+COALESCE_DEFAULTS = {
+    'enabled': True,           # default for generate_response(coalesce=None)
+}
+
+
+class _InflightCall:
+    """A provider call other callers with the same prompt can wait on"""
+    
+    __slots__ = ('done', 'response')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+
+
+# Rolling per-backend health used to route around failing or slow providers
+ROUTING_DEFAULTS = {
+    'window': 20,               # recent outcomes kept per backend
+    'min_calls': 4,             # outcomes needed before the failure rate can open the circuit
+    'failure_rate': 0.5,        # open the circuit at this failure rate...
+    'consecutive_failures': 3,  # ...or after this many failures in a row
+    'open_seconds': 30.0,       # how long an open circuit rejects calls before a half-open probe
+    'max_open_seconds': 300.0,  # the open time doubles after each failed probe, up to this
+}
+
+# Pseudo-backend: route each request to the fastest healthy backend
+AUTO_BACKEND = 'auto'
+AUTO_BACKEND_NAME = 'Auto (fastest healthy service)'
+
+
+class BackendError:
+    """A failed backend call, returned in place of the response text"""
+    
+    CANCELLED = 'cancelled'        # the caller gave up (e.g. a hedge that lost the race)
+    THROTTLED = 'throttled'        # our own rate limiter would not grant a slot in time
+    CIRCUIT_OPEN = 'circuit_open'  # the backend's circuit breaker is rejecting calls
+    HTTP = 'http'                  # non-200 status after retries
+    NETWORK = 'network'            # connection failure or timeout
+    TIMEOUT = 'timeout'            # the call's deadline ran out
+    INVALID = 'invalid'            # 200 with a body we could not read
+    EMPTY = 'empty'                # 200 with no generated text
+    MODEL = 'model'                # a local model failed to load or generate
+    
+    def __init__(self, backend_name: str, kind: str, detail: str = '', status_code: Optional[int] = None):
+        self.backend_name = backend_name
+        self.kind = kind
+        self.detail = detail or kind.replace('_', ' ')
+        self.status_code = status_code
+    
+    @property
+    def counts_as_failure(self) -> bool:
+        """Whether the error says something about the backend's health"""
+        return self.kind in (self.HTTP, self.NETWORK, self.INVALID, self.EMPTY, self.MODEL)
+    
+    def __str__(self) -> str:
+        label = AI_BACKENDS.get(self.backend_name, {}).get('label', self.backend_name)
+        return f"{label} error: {self.detail}"
+    
+    def __repr__(self) -> str:
+        return f"BackendError({self.backend_name!r}, {self.kind!r}, {self.detail!r})"
+
+
+class CircuitBreaker:
+    """Rolling success record for one backend with closed/open/half-open states.
+    
+    The circuit opens after too many recent failures, rejects calls for
+    open_seconds, then lets a single probe through (half-open): success closes
+    it, failure re-opens it for twice as long.
+    """
+    
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+    
+    def __init__(self, settings: Dict):
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.outcomes = deque(maxlen=settings['window'])  # True for success
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.open_seconds = settings['open_seconds']
+        self.probing = False
+        self.last_error = None
+    
+    def _state(self, now: float) -> str:
+        if self.state == self.OPEN and now - self.opened_at >= self.open_seconds:
+            self.state = self.HALF_OPEN
+            self.probing = False
+        return self.state
+    
+    def _open(self, now: float):
+        self.state = self.OPEN
+        self.opened_at = now
+        self.probing = False
+    
+    def available(self) -> bool:
+        """Whether a call would be let through right now (without reserving the probe)"""
+        with self.lock:
+            state = self._state(time.monotonic())
+            return state == self.CLOSED or (state == self.HALF_OPEN and not self.probing)
+    
+    def allow(self) -> bool:
+        """Reserve a call; in half-open state only one probe is in flight at a time"""
+        with self.lock:
+            state = self._state(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                # Recovered: forget the failures that opened the circuit
+                self.state = self.CLOSED
+                self.open_seconds = self.settings['open_seconds']
+                self.outcomes.clear()
+            self.probing = False
+            self.outcomes.append(True)
+            self.consecutive_failures = 0
+    
+    def record_failure(self, error):
+        with self.lock:
+            now = time.monotonic()
+            self.outcomes.append(False)
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            state = self._state(now)
+            if state == self.HALF_OPEN:
+                self.open_seconds = min(self.open_seconds * 2, self.settings['max_open_seconds'])
+                self._open(now)
+            elif state == self.CLOSED:
+                failures = self.outcomes.count(False)
+                if (self.consecutive_failures >= self.settings['consecutive_failures'] or
+                        (len(self.outcomes) >= self.settings['min_calls'] and
+                         failures / len(self.outcomes) >= self.settings['failure_rate'])):
+                    self._open(now)
+    
+    def release(self):
+        """A reserved call ended without telling us anything (cancelled/throttled)"""
+        with self.lock:
+            self.probing = False
+    
+    def success_rate(self) -> Optional[float]:
+        with self.lock:
+            return self.outcomes.count(True) / len(self.outcomes) if self.outcomes else None
+    
+    def stats(self) -> Dict:
+        with self.lock:
+            now = time.monotonic()
+            state = self._state(now)
+            return {
+                'state': state,
+                'success_rate': round(self.outcomes.count(True) / len(self.outcomes), 3) if self.outcomes else None,
+                'calls': len(self.outcomes),
+                'consecutive_failures': self.consecutive_failures,
+                'retry_in': round(max(self.opened_at + self.open_seconds - now, 0), 1) if state == self.OPEN else None,
+                'last_error': self.last_error,
+            }
+
+
+# Local inference for backends of type 'local': a small causal LM run on CPU with
+# transformers/torch, which are only imported when the model first loads. Any key can be
+# overridden per backend with an 'inference' dict in its AI_BACKENDS entry,
+# e.g. AI_BACKENDS['local']['inference'] = {'threads': 8}
+LOCAL_MODEL_DEFAULTS = {
+    'enabled': False,          # also enabled by setting the backend's model_env variable
+    'threads': None,           # torch intra-op threads; None lets torch use every core
+    'quantize': True,          # dynamic int8 quantization of the Linear layers
+    'max_new_tokens': 1000,    # completion cap when the caller gives none
+    'max_batch': 4,            # prompts decoded together in one generate() pass
+    'batch_wait': 0.02,        # seconds to wait for more prompts before starting a pass
+    'temperature': 0.7,        # 0 decodes greedily
+}
+
+
+class _LocalRequest:
+    """A prompt waiting for a local model worker"""
+    
+    def __init__(self, prompt: str, max_new_tokens: int, cancel_token: Optional[CancelToken],
+                 deadline: Optional[Deadline]):
+        self.prompt = prompt
+        self.max_new_tokens = max_new_tokens
+        self.cancel_token = cancel_token
+        self.deadline = deadline
+        self.done = threading.Event()
+        self.response = None
+        self.usage = None
+    
+    @property
+    def abandoned(self) -> bool:
+        return bool((self.cancel_token and self.cancel_token.cancelled) or
+                    (self.deadline is not None and self.deadline.expired))
+
+
+class LocalModelWorker:
+    """A causal LM kept warm by the one thread that runs it.
+    
+    The model loads on the first request. Prompts that queue up while a pass
+    is running are padded into one batch and decoded by a single generate()
+    call, so throughput grows with the batch size and the cores torch gets.
+    A pass stops early once every prompt in it has been cancelled.
+    """
+    
+    def __init__(self, backend_name: str, model_name: str, settings: Dict):
+        self.backend_name = backend_name
+        self.model_name = model_name
+        self.settings = settings
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.torch = None
+        self.model = None
+        self.tokenizer = None
+        self.counters = {'passes': 0, 'prompts': 0, 'dropped': 0, 'largest_batch': 0, 'load_seconds': None}
+    
+    @staticmethod
+    def installed() -> bool:
+        """Whether transformers and torch are importable (checked without importing them)"""
+        import importlib.util
+        return all(importlib.util.find_spec(name) is not None for name in ('torch', 'transformers'))
+    
+    def generate(self, prompt: str, max_new_tokens: Optional[int] = None,
+                 cancel_token: Optional[CancelToken] = None, deadline: Optional[Deadline] = None):
+        """(text or BackendError, token usage) for one prompt; (None, None) once the caller is cancelled or out of time"""
+        request = _LocalRequest(prompt, max_new_tokens or self.settings['max_new_tokens'], cancel_token, deadline)
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name=f"local-model-{self.backend_name}",
+                                               daemon=True)
+                self.thread.start()
+        self.requests.put(request)
+        while not request.done.wait(0.25 if cancel_token or deadline else None):
+            if request.abandoned:
+                return None, None  # the worker drops it, or stops the pass if nobody else is waiting
+        return request.response, request.usage
+    
+    def stats(self) -> Dict:
+        """Whether the model is loaded, prompts queued, and pass/batch counters"""
+        return dict(self.counters, model=self.model_name, loaded=self.model is not None,
+                    queued=self.requests.qsize())
+    
+    def close(self):
+        with self.lock:
+            if self.thread is not None:
+                self.requests.put(None)
+                self.thread = None
+    
+    def _run(self):
+        stopping = False
+        while not stopping:
+            request = self.requests.get()
+            if request is None:
+                return
+            batch = [request]
+            wait_until = time.monotonic() + self.settings['batch_wait']
+            while len(batch) < self.settings['max_batch']:
+                try:
+                    request = self.requests.get(timeout=max(0.0, wait_until - time.monotonic()))
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+            
+            live = []
+            for request in batch:
+                if request.abandoned:
+                    self.counters['dropped'] += 1
+                    request.done.set()
+                else:
+                    live.append(request)
+            if not live:
+                continue
+            try:
+                self._load()
+                self._generate_batch(live)
+            except Exception as e:
+                for request in live:
+                    request.response = BackendError(self.backend_name, BackendError.MODEL, str(e))
+            for request in live:
+                request.done.set()
+    
+    def _load(self):
+        if self.model is not None:
+            return
+        started = time.monotonic()
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        if self.settings['threads']:
+            torch.set_num_threads(self.settings['threads'])
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        tokenizer.padding_side = 'left'  # batched prompts must all end where generation starts
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        model = AutoModelForCausalLM.from_pretrained(self.model_name, torch_dtype=torch.float32)
+        model.eval()
+        if self.settings['quantize']:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.torch, self.tokenizer, self.model = torch, tokenizer, model
+        self.counters['load_seconds'] = time.monotonic() - started
+    
+    def _generate_batch(self, batch: List[_LocalRequest]):
+        """Decode a batch in one generate() pass, filling in each request's response and usage"""
+        from transformers import StoppingCriteria, StoppingCriteriaList
+        
+        class AllAbandoned(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return all(request.abandoned for request in batch)
+        
+        chat = bool(getattr(self.tokenizer, 'chat_template', None))
+        texts = [self.tokenizer.apply_chat_template([{'role': 'user', 'content': request.prompt}],
+                                                    tokenize=False, add_generation_prompt=True)
+                 if chat else request.prompt for request in batch]
+        inputs = self.tokenizer(texts, return_tensors='pt', padding=True, add_special_tokens=not chat)
+        temperature = self.settings['temperature']
+        with self.torch.inference_mode():
+            output = self.model.generate(**inputs, max_new_tokens=max(request.max_new_tokens for request in batch),
+                                         do_sample=temperature > 0, temperature=temperature or None,
+                                         pad_token_id=self.tokenizer.pad_token_id,
+                                         stopping_criteria=StoppingCriteriaList([AllAbandoned()]))
+        prompt_length = inputs['input_ids'].shape[1]
+        for row, request in enumerate(batch):
+            generated = output[row, prompt_length:prompt_length + request.max_new_tokens]
+            completion = int((generated != self.tokenizer.pad_token_id).sum())
+            prompt_tokens = int(inputs['attention_mask'][row].sum())
+            request.usage = {'prompt': prompt_tokens, 'completion': completion, 'total': prompt_tokens + completion}
+            text = self.tokenizer.decode(generated, skip_special_tokens=True).strip()
+            request.response = text or BackendError(self.backend_name, BackendError.EMPTY, "empty response")
+        self.counters['passes'] += 1
+        self.counters['prompts'] += len(batch)
+        self.counters['largest_batch'] = max(self.counters['largest_batch'], len(batch))
+
+
+# Per-backend metrics. 'latency_buckets' are the histogram's upper bounds in seconds;
+# set 'prometheus_file' to have the generator rewrite a Prometheus text file every 'export_interval' seconds
+METRICS_DEFAULTS = {
+    'enabled': True,
+    'latency_buckets': (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.25, 1.5, 2, 2.5, 3, 4, 5, 6, 8, 10, 12.5, 15,
+                        20, 25, 30, 45, 60, 90, 120),
+    'throughput_window': 60,   # seconds of completed calls behind the per-minute rate
+    'max_pending': 4096,       # queued events folded into the totals by the recording thread
+    'prometheus_file': None,
+    'export_interval': 15,     # seconds
+}
+
+
+class MetricsRecorder:
+    """Per-backend latency histograms, outcomes, HTTP status codes, retries, parse fallbacks and token usage.
+    
+    Recording only appends a tuple to a deque (atomic, no lock), so the
+    generation hot path never waits on a reader; events are folded into the
+    totals under a lock when a snapshot is taken or `max_pending` have queued.
+    """
+    
+    def __init__(self, settings: Optional[Dict] = None, backends=()):
+        self.settings = dict(METRICS_DEFAULTS)
+        self.settings.update(settings or {})
+        self.buckets = tuple(sorted(float(bound) for bound in self.settings['latency_buckets']))
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.totals = {}
+        for name in backends:
+            self._totals(name)
+    
+    def _totals(self, backend_name: str) -> Dict:
+        totals = self.totals.get(backend_name)
+        if totals is None:
+            totals = self.totals[backend_name] = {
+                'latency': [0] * (len(self.buckets) + 1), 'latency_sum': 0.0,
+                'first_token': [0] * (len(self.buckets) + 1), 'first_token_sum': 0.0,
+                'outcomes': {}, 'status_codes': {}, 'retries': 0, 'coalesced': 0, 'parses': 0, 'parse_fallbacks': 0,
+                'repairs': 0, 'repair_failures': 0,
+                'tokens': {'prompt': 0, 'completion': 0, 'total': 0}, 'completed': deque(),
+            }
+        return totals
+    
+    def _record(self, event: tuple):
+        if not self.settings['enabled']:
+            return
+        self.pending.append(event)
+        if len(self.pending) >= self.settings['max_pending'] and self.lock.acquire(blocking=False):
+            try:
+                self._fold()
+            finally:
+                self.lock.release()
+    
+    def record_call(self, backend_name: str, outcome: str, seconds: Optional[float] = None,
+                    first_token: Optional[float] = None):
+        """A finished backend call: 'ok' or a BackendError kind, with its latency when it succeeded"""
+        self._record(('call', backend_name, outcome, seconds, first_token, time.monotonic()))
+    
+    def record_status(self, backend_name: str, status_code: int):
+        self._record(('status', backend_name, status_code))
+    
+    def record_retry(self, backend_name: str):
+        self._record(('retry', backend_name))
+    
+    def record_coalesced(self, backend_name: str):
+        """A call that waited for an identical one already in flight instead of making its own"""
+        self._record(('coalesced', backend_name))
+    
+    def record_parse(self, backend_name: str, fallback: bool):
+        """A parsed response; fallback means no JSON object was found and the text parser was used"""
+        self._record(('parse', backend_name, fallback))
+    
+    def record_repair(self, backend_name: str, fixed: bool):
+        """A call asking again for the fields that failed schema validation; fixed if they all came back valid"""
+        self._record(('repair', backend_name, fixed))
+    
+    def record_tokens(self, backend_name: str, usage: Dict):
+        self._record(('tokens', backend_name, usage))
+    
+    def _observe(self, histogram: List[int], seconds: float) -> float:
+        histogram[bisect_left(self.buckets, seconds)] += 1
+        return seconds
+    
+    def _fold(self):
+        """Apply queued events to the totals (caller holds the lock)"""
+        while True:
+            try:
+                event = self.pending.popleft()
+            except IndexError:
+                break
+            kind, totals = event[0], self._totals(event[1])
+            if kind == 'call':
+                outcome, seconds, first_token, finished = event[2:]
+                totals['outcomes'][outcome] = totals['outcomes'].get(outcome, 0) + 1
+                if seconds is not None:
+                    totals['latency_sum'] += self._observe(totals['latency'], seconds)
+                if first_token is not None:
+                    totals['first_token_sum'] += self._observe(totals['first_token'], first_token)
+                if outcome == 'ok':
+                    totals['completed'].append(finished)
+            elif kind == 'status':
+                totals['status_codes'][event[2]] = totals['status_codes'].get(event[2], 0) + 1
+            elif kind == 'retry':
+                totals['retries'] += 1
+            elif kind == 'coalesced':
+                totals['coalesced'] += 1
+            elif kind == 'parse':
+                totals['parses'] += 1
+                totals['parse_fallbacks'] += int(event[2])
+            elif kind == 'repair':
+                totals['repairs'] += 1
+                totals['repair_failures'] += int(not event[2])
+            elif kind == 'tokens':
+                for key in totals['tokens']:
+                    totals['tokens'][key] += event[2].get(key) or 0
+        cutoff = time.monotonic() - self.settings['throughput_window']
+        for totals in self.totals.values():
+            while totals['completed'] and totals['completed'][0] < cutoff:
+                totals['completed'].popleft()
+    
+    def _quantile(self, histogram: List[int], quantile: float) -> Optional[float]:
+        """Quantile estimated by linear interpolation inside the histogram bucket it falls in"""
+        count = sum(histogram)
+        if not count:
+            return None
+        rank = quantile * count
+        seen = 0
+        for index, in_bucket in enumerate(histogram):
+            if in_bucket and seen + in_bucket >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]  # beyond the last bound; report the bound
+                lower = self.buckets[index - 1] if index else 0.0
+                return round(lower + (self.buckets[index] - lower) * (rank - seen) / in_bucket, 3)
+            seen += in_bucket
+        return self.buckets[-1]
+    
+    def _summary(self, histogram: List[int], total: float) -> Dict:
+        count = sum(histogram)
+        return {'count': count, 'mean': round(total / count, 3) if count else None,
+                'p50': self._quantile(histogram, 0.5), 'p95': self._quantile(histogram, 0.95),
+                'p99': self._quantile(histogram, 0.99)}
+    
+    def snapshot(self) -> Dict:
+        """Point-in-time copy of every backend's metrics"""
+        with self.lock:
+            self._fold()
+            window = self.settings['throughput_window']
+            backends = {}
+            for name, totals in self.totals.items():
+                calls = sum(totals['outcomes'].values())
+                errors = calls - totals['outcomes'].get('ok', 0)
+                backends[name] = {
+                    'calls': calls,
+                    'errors': errors,
+                    'error_rate': round(errors / calls, 3) if calls else None,
+                    'outcomes': dict(totals['outcomes']),
+                    'per_minute': round(len(totals['completed']) * 60 / window, 2),
+                    'latency': self._summary(totals['latency'], totals['latency_sum']),
+                    'first_token': self._summary(totals['first_token'], totals['first_token_sum']),
+                    'status_codes': dict(totals['status_codes']),
+                    'retries': totals['retries'],
+                    'coalesced': totals['coalesced'],
+                    'parses': totals['parses'],
+                    'parse_fallbacks': totals['parse_fallbacks'],
+                    'repairs': totals['repairs'],
+                    'repair_failures': totals['repair_failures'],
+                    'tokens': dict(totals['tokens']),
+                }
+        return {'uptime': round(time.time() - self.started, 1), 'backends': backends}
+    
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self.lock:
+            self._fold()
+            totals = {name: {'latency': list(t['latency']), 'latency_sum': t['latency_sum'],
+                             'first_token': list(t['first_token']), 'first_token_sum': t['first_token_sum'],
+                             'outcomes': dict(t['outcomes']), 'status_codes': dict(t['status_codes']),
+                             'retries': t['retries'], 'coalesced': t['coalesced'], 'parses': t['parses'],
+                             'parse_fallbacks': t['parse_fallbacks'], 'repairs': t['repairs'],
+                             'repair_failures': t['repair_failures'], 'tokens': dict(t['tokens'])}
+                      for name, t in self.totals.items()}
+        lines = []
+        
+        def family(metric, kind, help_text):
+            lines.append(f"# HELP projectflow_{metric} {help_text}")
+            lines.append(f"# TYPE projectflow_{metric} {kind}")
+        
+        def sample(metric, labels, value):
+            label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+            lines.append(f"projectflow_{metric}{{{label_text}}} {value}")
+        
+        for metric, help_text in (('latency', "Seconds per successful backend call."),
+                                  ('first_token', "Seconds to the first streamed token.")):
+            name = 'backend_request_seconds' if metric == 'latency' else 'backend_first_token_seconds'
+            family(name, 'histogram', help_text)
+            for backend, values in totals.items():
+                cumulative = 0
+                for bound, in_bucket in zip(self.buckets + (float('inf'),), values[metric]):
+                    cumulative += in_bucket
+                    le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                    sample(f"{name}_bucket", {'backend': backend, 'le': le}, cumulative)
+                sample(f"{name}_sum", {'backend': backend}, round(values[f"{metric}_sum"], 6))
+                sample(f"{name}_count", {'backend': backend}, cumulative)
+        
+        family('backend_calls_total', 'counter', "Backend calls by outcome ('ok' or the error kind).")
+        for backend, values in totals.items():
+            for outcome, count in sorted(values['outcomes'].items()):
+                sample('backend_calls_total', {'backend': backend, 'outcome': outcome}, count)
+        family('backend_http_responses_total', 'counter', "HTTP responses by status code, retried attempts included.")
+        for backend, values in totals.items():
+            for code, count in sorted(values['status_codes'].items()):
+                sample('backend_http_responses_total', {'backend': backend, 'code': code}, count)
+        for metric, key, help_text in (('backend_retries_total', 'retries', "Request attempts after the first."),
+                                       ('backend_coalesced_total', 'coalesced',
+                                        "Calls that shared an identical request already in flight."),
+                                       ('backend_parses_total', 'parses', "Responses parsed into a project."),
+                                       ('backend_parse_fallbacks_total', 'parse_fallbacks',
+                                        "Responses without a JSON object, parsed as plain text."),
+                                       ('backend_repairs_total', 'repairs',
+                                        "Calls asking again for fields that failed schema validation."),
+                                       ('backend_repair_failures_total', 'repair_failures',
+                                        "Repair calls that left some fields invalid.")):
+            family(metric, 'counter', help_text)
+            for backend, values in totals.items():
+                sample(metric, {'backend': backend}, values[key])
+        family('backend_tokens_total', 'counter', "Tokens reported by the provider.")
+        for backend, values in totals.items():
+            for kind, count in values['tokens'].items():
+                sample('backend_tokens_total', {'backend': backend, 'kind': kind}, count)
+        return '\n'.join(lines) + '\n'
+    
+    def write_prometheus(self, path: str):
+        """Atomically replace `path` with the current Prometheus text (for node_exporter's textfile collector)"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
+
+
+_adapter_class = None
+_prewarm_scope = threading.local()  # .active is set while prewarm_backend() sends its HEAD request
+
+
+def _pooled_adapter_class():
+    """Define PooledHTTPAdapter on first use so importing this module doesn't load requests"""
+    global _adapter_class
+    if _adapter_class is not None:
+        return _adapter_class
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class PooledHTTPAdapter(HTTPAdapter):
+        """HTTPAdapter that counts new vs. reused keep-alive connections (prewarm traffic kept apart)"""
+
+        def __init__(self, pool_size: int = 4, pool_block: bool = False):
+            self._stats_lock = threading.Lock()
+            self.requests_sent = 0
+            self.connections_opened = 0
+            self.prewarm_requests = 0
+            self.prewarm_connections = 0
+            super().__init__(pool_connections=1, pool_maxsize=pool_size,
+                             max_retries=0, pool_block=pool_block)
+
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            adapter = self
+
+            def counting(pool_class):
+                class CountingPool(pool_class):
+                    def _new_conn(self):
+                        adapter._record_new_connection()
+                        return super()._new_conn()
+
+                    def _make_request(self, conn, *args, **kwargs):
+                        token = getattr(_cancel_scope, 'token', None)
+                        if token is not None:
+                            token._register(conn)
+                        return super()._make_request(conn, *args, **kwargs)
+                return CountingPool
+
+            self.poolmanager.pool_classes_by_scheme = {
+                'http': counting(HTTPConnectionPool),
+                'https': counting(HTTPSConnectionPool),
+            }
+
+        def _record_new_connection(self):
+            with self._stats_lock:
+                if getattr(_prewarm_scope, 'active', False):
+                    self.prewarm_connections += 1
+                else:
+                    self.connections_opened += 1
+
+        def send(self, request, **kwargs):
+            with self._stats_lock:
+                if getattr(_prewarm_scope, 'active', False):
+                    self.prewarm_requests += 1
+                else:
+                    self.requests_sent += 1
+            return super().send(request, **kwargs)
+
+        def stats(self) -> Dict:
+            """Snapshot of request/connection counters; 'requests' and reuse cover API calls only"""
+            with self._stats_lock:
+                sent, opened = self.requests_sent, self.connections_opened
+                prewarm_requests, prewarm_connections = self.prewarm_requests, self.prewarm_connections
+            return {
+                'requests': sent,
+                'new_connections': opened,
+                'reused_connections': max(sent - opened, 0),
+                'prewarm_requests': prewarm_requests,
+                'prewarm_connections': prewarm_connections,
+            }
+
+    _adapter_class = PooledHTTPAdapter
+    return _adapter_class
+
+
+def __getattr__(name):
+    # Lazily defined names (PEP 562)
+    if name == 'PooledHTTPAdapter':
+        return _pooled_adapter_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class LocalAICodeGenerator:
+    def __init__(self, silent=False, selected_backend='mistral', hedging: Optional[Dict] = None,
+                 cache: Optional[Dict] = None, history: Optional[Dict] = None, routing: Optional[Dict] = None,
+                 retry: Optional[Dict] = None, metrics: Optional[Dict] = None, dedup: Optional[Dict] = None,
+                 multi_idea: Optional[Dict] = None, coalesce: Optional[Dict] = None,
+                 structured: Optional[Dict] = None, defer_startup: bool = False):
+        self.available_models = []
+        self.current_model = None
+        self.history_settings = dict(HISTORY_DEFAULTS)
+        self.history_settings.update(history or {})
+        self.history_store = None     # opened by start()
+        self.history_file = None
+        self.suggestion_history = []  # HistorySummary of the most recent entries, up to display_limit
+        self.history_listeners = []   # callables notified with each saved entry
+        self.silent = silent
+        self.selected_backend = selected_backend  # User's choice
+        self.hedging = dict(HEDGING_DEFAULTS)
+        self.hedging.update(hedging or {})
+        self.response_cache = ResponseCache(cache)
+        
+        # Recent successful response latencies per backend (seconds)
+        self.latency_lock = threading.Lock()
+        self.backend_latencies = {name: deque(maxlen=100) for name in AI_BACKENDS}
+        self.first_token_latencies = {name: deque(maxlen=100) for name in AI_BACKENDS}
+        
+        # One keep-alive connection pool per backend, shared by all threads (created on first use)
+        self.session_lock = threading.Lock()
+        self.http_sessions = {}
+        self.http_adapters = {}
+        self.local_workers = {}  # backend name -> LocalModelWorker (backends of type 'local')
+        
+        # Client-side request/token budgets so bursts queue locally instead of drawing 429s
+        self.rate_limiters = {name: BackendRateLimiter(name, self.rate_limit_settings(name)) for name in AI_BACKENDS}
+        
+        # Circuit breakers feeding the backend router
+        self.routing = dict(ROUTING_DEFAULTS)
+        self.routing.update(routing or {})
+        self.breakers = {name: CircuitBreaker(self.routing) for name in AI_BACKENDS}
+        self.retry = dict(RETRY_DEFAULTS)
+        self.retry.update(retry or {})
+        
+        # Identical prompts in flight: (backend, prompt, max_tokens) -> _InflightCall
+        self.coalesce = dict(COALESCE_DEFAULTS)
+        self.coalesce.update(coalesce or {})
+        self.inflight = {}
+        self.inflight_lock = threading.Lock()
+        
+        # Latency histograms, status codes, retries, parse fallbacks and token usage per backend
+        self.metrics = MetricsRecorder(metrics, AI_BACKENDS)
+        self.metrics_stop = threading.Event()
+        
+        # Near-duplicate index over saved ideas, loaded on first use
+        self.dedup = dict(DEDUP_DEFAULTS)
+        self.dedup.update(dedup or {})
+        self.idea_index = None
+        self.idea_index_lock = threading.Lock()
+        
+        # Ideas from multi-idea requests not served yet: preference key -> deque of (expires, project)
+        self.multi_idea = dict(MULTI_IDEA_DEFAULTS)
+        self.multi_idea.update(multi_idea or {})
+        self.idea_buffers = OrderedDict()
+        self.idea_refills = {}  # preference key -> Event set when its refill finishes
+        self.idea_buffer_lock = threading.Lock()
+        
+        # Provider-native JSON output and schema repair; backends that rejected it get plain requests
+        self.structured = dict(STRUCTURED_OUTPUT_DEFAULTS)
+        self.structured.update(structured or {})
+        self.structured_unsupported = set()
+        
+        self.backend_status = {name: False for name in AI_BACKENDS}
+        self.started = threading.Event()
+        if not defer_startup:
+            self.start()
+    
+    def start(self):
+        """Load API keys, open the history store, check backends and load recent history.
+        
+        Runs in the constructor unless defer_startup=True, in which case the
+        caller runs it (e.g. on a worker thread so a window can paint first).
+        """
+        try:
+            load_backend_keys()
+            try:
+                self.history_store = create_history_store(self.history_settings)
+            except history_store_errors() as e:
+                if not self.silent:
+                    print(f"⚠️  Could not open the history database ({e}); using the JSONL journal instead")
+                self.history_store = JournalHistoryStore(self.history_settings)
+            self.history_file = (self.history_settings['snapshot_file']
+                                 if isinstance(self.history_store, JournalHistoryStore)
+                                 else self.history_settings['database_file'])
+            
+            # Check for available backends
+            self.backend_status = self.check_backends()
+            
+            # Load history if exists
+            self.load_history()
+            
+            if self.dedup['enabled']:
+                self.get_idea_index()
+            if self.metrics.settings['prometheus_file']:
+                threading.Thread(target=self._export_metrics, daemon=True).start()
+        finally:
+            self.started.set()
+    
+    def _store(self):
+        """The history store, waiting for start() if it is still running"""
+        if self.history_store is None:
+            self.started.wait()
+        return self.history_store
+    
+    def check_backends(self) -> Dict:
+        """Check available AI backends"""
+        status = {}
+        
+        for backend_name in AI_BACKENDS.keys():
+            backend_info = AI_BACKENDS[backend_name]
+            if backend_info['type'] == 'local':
+                # Local backends need opting in, plus transformers and torch
+                enabled = (self.local_settings(backend_name)['enabled'] or
+                           bool(backend_info.get('model_env') and os.getenv(backend_info['model_env'])))
+                status[backend_name] = enabled and LocalModelWorker.installed()
+                missing = ("transformers/torch not installed" if enabled else
+                           f"not enabled (set {backend_info.get('model_env')})")
+            else:
+                api_key = backend_info.get('key', '')
+                # Backend available if API key is configured
+                status[backend_name] = bool(api_key and api_key.strip())
+                missing = "API key not configured"
+            if not self.silent:
+                if status[backend_name]:
+                    print(f"\u2705 {backend_info['name']} available")
+                else:
+                    print(f"❌ {backend_info['name']} - {missing}")
+        
+        # Open connections in the background so the first generation skips the handshake
+        for backend_name, available in status.items():
+            if available and AI_BACKENDS[backend_name]['type'] != 'local' and self.http_settings(backend_name)['prewarm']:
+                for _ in range(self.http_settings(backend_name)['prewarm_connections']):
+                    threading.Thread(target=self.prewarm_backend, args=(backend_name,), daemon=True).start()
+        
+        return status
+    
+    def http_settings(self, backend_name: str) -> Dict:
+        """Pool settings for a backend (defaults merged with per-backend overrides)"""
+        settings = dict(HTTP_POOL_DEFAULTS)
+        settings.update(AI_BACKENDS.get(backend_name, {}).get('http', {}))
+        return settings
+    
+    def _create_session(self, backend_name: str) -> 'requests.Session':
+        """Create the pooled session for a backend"""
+        settings = self.http_settings(backend_name)
+        import requests
+        adapter = _pooled_adapter_class()(pool_size=settings['pool_size'], pool_block=settings['pool_block'])
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not settings['keep_alive']:
+            session.headers['Connection'] = 'close'
+        self.http_sessions[backend_name] = session
+        self.http_adapters[backend_name] = adapter
+        return session
+    
+    def rate_limit_settings(self, backend_name: str) -> Dict:
+        """Rate limit settings for a backend (defaults merged with per-backend overrides)"""
+        settings = dict(RATE_LIMIT_DEFAULTS)
+        settings.update(AI_BACKENDS.get(backend_name, {}).get('rate_limit', {}))
+        return settings
+    
+    def local_settings(self, backend_name: str) -> Dict:
+        """Local inference settings for a backend (defaults merged with per-backend overrides)"""
+        settings = dict(LOCAL_MODEL_DEFAULTS)
+        settings.update(AI_BACKENDS.get(backend_name, {}).get('inference', {}))
+        return settings
+    
+    def local_worker(self, backend_name: str) -> LocalModelWorker:
+        """The shared model worker for a local backend (the model itself loads on first use)"""
+        worker = self.local_workers.get(backend_name)
+        if worker is None:
+            with self.session_lock:
+                worker = self.local_workers.get(backend_name)
+                if worker is None:
+                    worker = self.local_workers[backend_name] = LocalModelWorker(
+                        backend_name, AI_BACKENDS[backend_name]['model'], self.local_settings(backend_name))
+        return worker
+    
+    def local_model_stats(self) -> Dict:
+        """Per local backend: model, whether it is loaded, queued prompts, passes and batch sizes"""
+        return {name: worker.stats() for name, worker in list(self.local_workers.items())}
+    
+    def rate_limit_stats(self) -> Dict:
+        """Per-backend limiter state: budgets left, in-flight/queued requests, 429s seen"""
+        return {name: limiter.stats() for name, limiter in self.rate_limiters.items()}
+    
+    def get_session(self, backend_name: str) -> 'requests.Session':
+        """Return the shared pooled session for a backend"""
+        session = self.http_sessions.get(backend_name)
+        if session is None:
+            with self.session_lock:
+                session = self.http_sessions.get(backend_name) or self._create_session(backend_name)
+        return session
+    
+    def request_timeout(self, backend_name: str) -> tuple:
+        """(connect, read) timeout tuple for a backend"""
+        settings = self.http_settings(backend_name)
+        return (settings['connect_timeout'], settings['read_timeout'])
+    
+    def prewarm_backend(self, backend_name: str):
+        """Open a keep-alive connection (DNS + TCP + TLS) to the backend host"""
+        endpoint = AI_BACKENDS[backend_name]['endpoint']
+        match = re.match(r'^(https?://[^/]+)', endpoint)
+        if not match:
+            return
+        _prewarm_scope.active = True
+        try:
+            response = self.get_session(backend_name).head(
+                match.group(1) + '/', timeout=self.http_settings(backend_name)['connect_timeout'])
+            response.close()
+        except Exception:
+            pass
+        finally:
+            _prewarm_scope.active = False
+    
+    def connection_stats(self) -> Dict:
+        """Per-backend request counts and how many reused a pooled connection"""
+        return {name: adapter.stats() for name, adapter in list(self.http_adapters.items())}
+    
+    @property
+    def reused_connections(self) -> int:
+        """Total number of requests that reused a keep-alive connection"""
+        return sum(stats['reused_connections'] for stats in self.connection_stats().values())
+    
+    def close(self):
+        """Close all pooled connections and the history journal, writing the metrics file one last time"""
+        self.metrics_stop.set()
+        if self.metrics.settings['prometheus_file']:
+            self.metrics.write_prometheus(self.metrics.settings['prometheus_file'])
+        for session in list(self.http_sessions.values()):
+            session.close()
+        for worker in list(self.local_workers.values()):
+            worker.close()
+        if self.idea_index is not None:
+            self.idea_index.close()
+        if self.history_store is not None:
+            self.history_store.close()
+    
+    def _export_metrics(self):
+        """Rewrite the Prometheus text file every export_interval seconds until close()"""
+        while not self.metrics_stop.wait(self.metrics.settings['export_interval']):
+            try:
+                self.metrics.write_prometheus(self.metrics.settings['prometheus_file'])
+            except OSError as e:
+                if not self.silent:
+                    print(f"⚠️  Could not write metrics: {e}")
+    
+    def metrics_snapshot(self) -> Dict:
+        """Per-backend calls, error rate, throughput, latency p50/p95/p99, status codes, retries,
+        parse fallbacks and token usage"""
+        return self.metrics.snapshot()
+    
+    def load_history(self, limit: Optional[int] = None):
+        """Load summaries of the most recent suggestions (display_limit by default), oldest first;
+        get_history_entry() fetches an entry's details"""
+        try:
+            self.suggestion_history = self._store().page(0, limit or self.history_settings['display_limit'])[::-1]
+        except history_store_errors():
+            self.suggestion_history = []
+    
+    def save_suggestion(self, suggestion: Dict):
+        """Save suggestion to history"""
+        suggestion['timestamp'] = datetime.now().isoformat()
+        try:
+            self._store().append(suggestion)
+        except history_store_errors():
+            pass
+        if 'id' in suggestion and (self.idea_index is not None or self.dedup['enabled']):
+            self.get_idea_index().add(suggestion['id'], suggestion.get('project') or {})
+        
+        self.suggestion_history.append(_history_summary(suggestion))
+        limit = self.history_settings['display_limit']
+        if len(self.suggestion_history) > limit:
+            self.suggestion_history = self.suggestion_history[-limit:]
+        
+        if 'id' in suggestion:
+            for listener in list(self.history_listeners):
+                listener(suggestion)
+    
+    def search_history(self, query: str = '', backend: Optional[str] = None, difficulty: Optional[str] = None,
+                       since: Optional[str] = None, until: Optional[str] = None,
+                       limit: Optional[int] = None) -> List[Dict]:
+        """Search saved suggestions (newest first) by text, backend, difficulty and date"""
+        return self._store().search(query, backend=backend, difficulty=difficulty, since=since, until=until,
+                                         limit=limit or self.history_settings['display_limit'])
+    
+    def count_history(self, **filters) -> int:
+        """Number of saved suggestions matching the search filters"""
+        return self._store().count(**filters)
+    
+    def history_field_values(self, field: str) -> List[str]:
+        """Distinct 'backend' or 'difficulty' values in the history, for filter menus"""
+        return self._store().distinct_values(field)
+    
+    def history_page(self, offset: int, limit: int, **filters) -> List[HistorySummary]:
+        """One page of summary records (newest first) for listing history"""
+        return self._store().page(offset, limit, **filters)
+    
+    def export_history(self, path: str, fmt: Optional[str] = None, progress=None,
+                       cancel_token: Optional[CancelToken] = None, **filters) -> Dict:
+        """Stream every saved suggestion matching the filters to a file (jsonl, json, csv or md).
+
+        The format defaults to the file extension. A bare date for 'until'
+        includes that whole day. The file is written next to its destination
+        and moved into place when complete; a cancelled export leaves nothing.
+        Returns {'path', 'format', 'exported', 'cancelled'}.
+        """
+        fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower() or 'jsonl'
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt} (expected one of {', '.join(EXPORT_FORMATS)})")
+        filters = {key: value for key, value in filters.items() if value}
+        if len(filters.get('until', '')) == 10:
+            filters['until'] += 'T23:59:59.999999'
+        store = self._store()
+        total = store.count(**filters) if progress is not None else None
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+                exported = write_history_export(store.iter_matching(**filters), f, fmt, total=total,
+                                                progress=progress, cancel_token=cancel_token)
+            cancelled = cancel_token is not None and cancel_token.cancelled
+            if cancelled:
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return {'path': path, 'format': fmt, 'exported': exported, 'cancelled': cancelled}
+    
+    def get_history_entry(self, entry_id: int) -> Optional[Dict]:
+        """A saved suggestion by id"""
+        return self._store().get(entry_id)
+    
+    def clear_history(self):
+        """Delete all saved suggestions"""
+        self._store().clear()
+        self.suggestion_history = []
+        if self.idea_index is not None:
+            self.idea_index.clear()
+    
+    def get_idea_index(self) -> IdeaIndex:
+        """The near-duplicate index, created on first use and loaded on a background thread"""
+        with self.idea_index_lock:
+            if self.idea_index is None:
+                store = self._store()
+                path = self.dedup['index_file'] or os.path.splitext(self.history_file)[0] + '.minhash'
+                self.idea_index = IdeaIndex(self.dedup, path)
+                threading.Thread(target=self.idea_index.load, args=(store,), daemon=True).start()
+            return self.idea_index
+    
+    def find_near_duplicates(self, project: Dict, limit: int = 3) -> List[tuple]:
+        """(history id, estimated similarity) of saved ideas that nearly repeat `project`, closest first.
+        
+        Empty while the index is still loading.
+        """
+        return self.get_idea_index().query(project, limit)
+    
+    def avoid_hints(self, matches: List[tuple]) -> List[str]:
+        """'Name: description' of the saved ideas in `matches`, for a retry prompt"""
+        hints = []
+        for entry_id, _ in matches[:self.dedup['avoid_hints']]:
+            entry = self.get_history_entry(entry_id)
+            project = (entry or {}).get('project') or {}
+            if project.get('name'):
+                description = str(project.get('description', ''))
+                hints.append(f"{project['name']}: {description[:120]}" if description else project['name'])
+        return hints
+    
+    def parse_ai_response(self, response_text: str, backend_name: Optional[str] = None) -> Dict:
+        """Parse AI response into structured format (counted in backend_name's metrics if given)"""
+        # Try to extract JSON if present
+        project = extract_json_object(response_text)
+        if backend_name:
+            self.metrics.record_parse(backend_name, project is None)
+        if project is not None:
+            validate_project(project)  # renames aliased keys and fixes value types in place
+            return project
+        
+        # If no JSON, create a structured response from text
+        lines = response_text.strip().split('\n')
+        project = {
+            'name': 'AI-Generated Project',
+            'description': '',
+            'technologies': [],
+            'difficulty': 'intermediate',
+            'duration': '1-2 weeks',
+            'features': [],
+            'learning_outcomes': []
+        }
+        
+        current_section = None
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            
+            # Detect sections
+            lowered = line.lower()
+            if 'name:' in lowered or 'project:' in lowered:
+                project['name'] = line.split(':', 1)[-1].strip()
+            elif 'description:' in lowered:
+                project['description'] = line.split(':', 1)[-1].strip()
+            elif 'technologies:' in lowered or 'tech stack:' in lowered:
+                techs = line.split(':', 1)[-1].strip()
+                project['technologies'] = [t.strip() for t in techs.split(',')]
+            elif 'features:' in lowered:
+                current_section = 'features'
+            elif 'learning outcomes:' in lowered:
+                current_section = 'learning_outcomes'
+            elif line.startswith('- ') or line.startswith('* '):
+                if current_section == 'features':
+                    project['features'].append(line[2:].strip())
+                elif current_section == 'learning_outcomes':
+                    project['learning_outcomes'].append(line[2:].strip())
+        
+        # If no description was found, use first paragraph
+        if not project['description'] and lines:
+            project['description'] = lines[0]
+        
+        return project
+    
+    def parse_ai_projects(self, response_text: str, backend_name: Optional[str] = None) -> List[Dict]:
+        """Parse a multi-idea response into one project per JSON object (falls back like parse_ai_response)"""
+        projects = extract_json_objects(response_text)
+        if backend_name:
+            self.metrics.record_parse(backend_name, not projects)
+        for project in projects:
+            validate_project(project)
+        return projects or [self.parse_ai_response(response_text)]
+    
+    @staticmethod
+    def estimate_tokens(prompt: str, max_tokens: int = 1000) -> int:
+        """Rough token cost of a request (prompt at ~4 chars/token plus the completion cap)"""
+        return len(prompt) // 4 + max_tokens
+    
+    @staticmethod
+    def usage_counts(result: Dict) -> Optional[Dict]:
+        """Prompt, completion and total tokens a provider reports for a response, if any"""
+        usage = result.get('usage') or {}
+        if usage.get('total_tokens') is not None:
+            return {'prompt': usage.get('prompt_tokens') or 0, 'completion': usage.get('completion_tokens') or 0,
+                    'total': usage['total_tokens']}
+        usage = result.get('usageMetadata') or {}
+        if usage.get('totalTokenCount') is not None:
+            return {'prompt': usage.get('promptTokenCount') or 0,
+                    'completion': usage.get('candidatesTokenCount') or 0, 'total': usage['totalTokenCount']}
+        return None
+    
+    def usage_tokens(self, result: Dict) -> Optional[int]:
+        """Total tokens a provider reports for a response, if any"""
+        usage = self.usage_counts(result)
+        return usage['total'] if usage else None
+    
+    def _settle(self, backend_name: str, permit: RatePermit, response, result):
+        """Release a rate-limit permit with the token usage from the response body, recording it"""
+        usage = self.usage_counts(result) if isinstance(result, dict) else None
+        permit.release(response, usage['total'] if usage else None)
+        if usage:
+            self.metrics.record_tokens(backend_name, usage)
+    
+    def backoff_delay(self, retry: int) -> float:
+        """Jittered exponential backoff before retry number `retry` (0-based)"""
+        delay = min(self.retry['backoff_base'] * (2 ** retry), self.retry['backoff_max'])
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    @staticmethod
+    def _interrupted(backend_name: str, cancel_token: Optional[CancelToken],
+                     deadline: Optional[Deadline]) -> Optional[BackendError]:
+        """The error to report if the call was cancelled or ran out of time, else None"""
+        if deadline is not None and deadline.expired:
+            return BackendError(backend_name, BackendError.TIMEOUT, f"deadline of {deadline.seconds:.1f}s exceeded")
+        if cancel_token and cancel_token.cancelled:
+            return BackendError(backend_name, BackendError.CANCELLED)
+        return None
+    
+    def structured_fields(self, backend_name: str, schema: Optional[Dict]) -> Optional[Dict]:
+        """Payload fields asking backend_name for JSON matching schema, or None to ask in prose only.
+        
+        OpenAI-compatible backends get a response_format; Gemini gets the
+        fields for its generationConfig.
+        """
+        backend = AI_BACKENDS[backend_name]
+        mode = backend.get('structured_output')
+        if schema is None or not mode or not self.structured['enabled'] or backend_name in self.structured_unsupported:
+            return None
+        if backend['type'] == 'google':
+            fields = {'responseMimeType': 'application/json'}
+            if mode == 'json_schema':
+                fields['responseSchema'] = provider_schema(schema, 'google')
+            return fields
+        if mode == 'json_schema':
+            return {'response_format': {'type': 'json_schema', 'json_schema': {
+                'name': schema.get('title', 'response'), 'strict': True, 'schema': provider_schema(schema, 'openai')}}}
+        return {'response_format': {'type': 'json_object'}}
+    
+    def _post(self, backend_name: str, url: str, headers: Dict, payload: Dict, tokens: int = 0,
+              cancel_token: Optional[CancelToken] = None, stream: bool = False,
+              deadline: Optional[Deadline] = None, plain_payload: Optional[Dict] = None):
+        """POST through the backend's rate limiter, retrying 429, transient 5xx and connection errors.
+        
+        Returns (response, permit, error). On success error is None and the caller
+        must permit.release(response, tokens_used) once it has read the body;
+        otherwise error is a BackendError. With a deadline, HTTP timeouts, queueing
+        and backoff all come out of its remaining budget. plain_payload is
+        payload without its structured-output fields: a 400 sends it instead,
+        once. Only a 400 whose body names those fields (the model doesn't
+        support them) stops the backend being asked for structured output again.
+        """
+        limiter = self.rate_limiters[backend_name]
+        min_attempt = self.retry['min_attempt']
+        error = None
+        for attempt in range(max(1, self.retry['attempts'])):
+            interrupted = self._interrupted(backend_name, cancel_token, deadline)
+            if interrupted:
+                return None, None, interrupted
+            if attempt:
+                self.metrics.record_retry(backend_name)
+            if deadline is not None and deadline.remaining() < min_attempt:
+                return None, None, error or BackendError(backend_name, BackendError.TIMEOUT,
+                                                         f"deadline of {deadline.seconds:.1f}s exceeded")
+            queue_limit = None
+            if deadline is not None:
+                queue_limit = min(max(deadline.remaining() - min_attempt, 0), limiter.settings['max_wait'])
+            try:
+                permit = limiter.acquire(tokens, cancel_token, queue_limit)
+            except RateLimitExceeded as e:
+                return None, None, (self._interrupted(backend_name, cancel_token, deadline) or
+                                    BackendError(backend_name, BackendError.THROTTLED, str(e)))
+            timeout = self.request_timeout(backend_name)
+            if deadline is not None:
+                timeout = deadline.timeout(*timeout)
+            try:
+                response = self.get_session(backend_name).post(url, headers=headers, json=payload, stream=stream,
+                                                               timeout=timeout)
+            except Exception as e:
+                permit.release()
+                error = (self._interrupted(backend_name, cancel_token, deadline) or
+                         BackendError(backend_name, BackendError.NETWORK, str(e)))
+                if error.kind != BackendError.NETWORK:
+                    return None, None, error
+            else:
+                self.metrics.record_status(backend_name, response.status_code)
+                if response.status_code == 200:
+                    return response, permit, None
+                permit.release(response)
+                rejected = None
+                if response.status_code == 400 and plain_payload is not None:
+                    try:
+                        rejected = _STRUCTURED_REJECTION.search(response.text[:4000]) is not None
+                    except Exception:
+                        rejected = False
+                response.close()
+                error = BackendError(backend_name, BackendError.HTTP, str(response.status_code), response.status_code)
+                if rejected is not None:
+                    if rejected:
+                        if not self.silent:
+                            print(f"⚠️  {AI_BACKENDS[backend_name]['name']} rejected structured output; "
+                                  f"asking in prose")
+                        self.structured_unsupported.add(backend_name)
+                    return self._post(backend_name, url, headers, plain_payload, tokens, cancel_token, stream, deadline)
+                if response.status_code not in (429, 500, 502, 503):
+                    return None, None, error
+                if response.status_code == 429:
+                    continue  # no sleep here: the limiter holds the next acquire until Retry-After
+            
+            if attempt + 1 >= self.retry['attempts']:
+                break
+            delay = self.backoff_delay(attempt)
+            if deadline is not None and deadline.remaining() < delay + min_attempt:
+                break  # a retry could not finish in time; report the real failure
+            if self._retry_wait(delay, cancel_token):
+                return None, None, self._interrupted(backend_name, cancel_token, deadline)
+        return None, None, error
+    
+    def _chat_completion(self, backend_name: str, prompt: str, cancel_token: Optional[CancelToken] = None,
+                         deadline: Optional[Deadline] = None, max_tokens: Optional[int] = None,
+                         schema: Optional[Dict] = None):
+        """Generate with an OpenAI-compatible chat completions endpoint (in JSON mode when given a schema)"""
+        backend = AI_BACKENDS[backend_name]
+        headers = {
+            "Authorization": f"Bearer {backend['key']}",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "model": backend['model'],
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.7,
+            "max_tokens": max_tokens or 1000
+        }
+        structured = self.structured_fields(backend_name, schema)
+        plain_payload = None
+        if structured:
+            plain_payload, payload = payload, dict(payload, **structured)
+        
+        response, permit, error = self._post(backend_name, backend['endpoint'], headers, payload,
+                                             self.estimate_tokens(prompt, max_tokens or 1000), cancel_token,
+                                             deadline=deadline, plain_payload=plain_payload)
+        if error:
+            return error
+        result = None
+        try:
+            result = response.json()
+            text = result['choices'][0]['message']['content']
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            return BackendError(backend_name, BackendError.INVALID, f"unreadable response ({e})")
+        finally:
+            self._settle(backend_name, permit, response, result)
+        return text or BackendError(backend_name, BackendError.EMPTY, "empty response")
+    
+    def generate_with_openai(self, prompt: str, cancel_token: Optional[CancelToken] = None,
+                             deadline: Optional[Deadline] = None, max_tokens: Optional[int] = None,
+                             schema: Optional[Dict] = None):
+        """Generate using OpenAI ChatGPT API"""
+        return self._chat_completion('openai', prompt, cancel_token, deadline, max_tokens, schema)
+    
+    def generate_with_mistral(self, prompt: str, cancel_token: Optional[CancelToken] = None,
+                              deadline: Optional[Deadline] = None, max_tokens: Optional[int] = None,
+                              schema: Optional[Dict] = None):
+        """Generate using Mistral API"""
+        return self._chat_completion('mistral', prompt, cancel_token, deadline, max_tokens, schema)
+    
+    def generate_with_google(self, prompt: str, cancel_token: Optional[CancelToken] = None,
+                             deadline: Optional[Deadline] = None, max_tokens: Optional[int] = None,
+                             schema: Optional[Dict] = None):
+        """Generate using Google Gemini API"""
+        backend = AI_BACKENDS['google']
+        
+        # Google Gemini uses different API format
+        url = f"{backend['endpoint']}?key={backend['key']}"
+        headers = {"Content-Type": "application/json"}
+        
+        payload = {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }]
+        }
+        if max_tokens:
+            payload["generationConfig"] = {"maxOutputTokens": max_tokens}
+        structured = self.structured_fields('google', schema)
+        plain_payload = None
+        if structured:
+            plain_payload = payload
+            payload = dict(payload, generationConfig=dict(payload.get("generationConfig", {}), **structured))
+        
+        response, permit, error = self._post('google', url, headers, payload,
+                                             self.estimate_tokens(prompt, max_tokens or 1000), cancel_token,
+                                             deadline=deadline, plain_payload=plain_payload)
+        if error:
+            return error
+        result = None
+        try:
+            result = response.json()
+            candidates = result.get('candidates', [])
+        except (ValueError, AttributeError) as e:
+            return BackendError('google', BackendError.INVALID, f"unreadable response ({e})")
+        finally:
+            self._settle('google', permit, response, result)
+        if candidates and candidates[0].get('content', {}).get('parts'):
+            text = candidates[0]['content']['parts'][0].get('text', '')
+            if text:
+                return text
+        return BackendError('google', BackendError.EMPTY, "empty response")
+    
+    def generate_with_local(self, backend_name: str, prompt: str, cancel_token: Optional[CancelToken] = None,
+                            deadline: Optional[Deadline] = None, max_tokens: Optional[int] = None):
+        """Generate with a local model on this machine's CPU, batched with concurrent prompts"""
+        text, usage = self.local_worker(backend_name).generate(prompt, max_tokens, cancel_token, deadline)
+        if text is None:
+            return self._interrupted(backend_name, cancel_token, deadline)
+        if usage:
+            self.metrics.record_tokens(backend_name, usage)
+        return text
+    
+    @staticmethod
+    def _iter_sse_data(response):
+        """Yield the data payload of each server-sent event"""
+        response.encoding = 'utf-8'
+        data_lines = []
+        for line in response.iter_lines(chunk_size=128, decode_unicode=True):
+            if line.startswith('data:'):
+                data_lines.append(line[5:].lstrip())
+            elif not line and data_lines:
+                yield '\n'.join(data_lines)
+                data_lines = []
+        if data_lines:
+            yield '\n'.join(data_lines)
+    
+    def generate_streaming(self, prompt: str, backend_name: str = None, on_chunk=None,
+                           cancel_token: Optional[CancelToken] = None, deadline=None,
+                           schema: Optional[Dict] = None):
+        """Stream a completion, calling on_chunk(text) for every piece as it arrives.
+        
+        Stops reading as soon as the JSON project object is complete, or when the
+        deadline (a Deadline or seconds) runs out. With a schema the provider is
+        asked for structured output, as in generate_response.
+        Returns (text, first_token_seconds); text is a BackendError on failure.
+        """
+        deadline = Deadline.coerce(deadline)
+        backend_name = self.resolve_backend(backend_name)
+        if backend_name is None:
+            return BackendError(AUTO_BACKEND, BackendError.CIRCUIT_OPEN, "no healthy backend"), None
+        backend = AI_BACKENDS[backend_name]
+        if backend['type'] == 'local':
+            # Batched local decoding finishes every prompt together, so the answer arrives in one piece
+            started = time.monotonic()
+            text = self._call_backend(prompt, backend_name, cancel_token, deadline, None, schema)
+            if self.is_error(text):
+                return text, None
+            if on_chunk:
+                on_chunk(text)
+            return text, time.monotonic() - started
+        if not self.breakers[backend_name].allow():
+            return BackendError(backend_name, BackendError.CIRCUIT_OPEN), None
+        
+        if backend['type'] == 'google':
+            url = backend['endpoint'].replace(':generateContent', ':streamGenerateContent')
+            url = f"{url}?alt=sse&key={backend['key']}"
+            headers = {"Content-Type": "application/json"}
+            payload = {"contents": [{"parts": [{"text": prompt}]}]}
+            structured = self.structured_fields(backend_name, schema)
+            if structured:
+                structured = {"generationConfig": structured}
+        else:
+            url = backend['endpoint']
+            headers = {
+                "Authorization": f"Bearer {backend['key']}",
+                "Content-Type": "application/json"
+            }
+            payload = {
+                "model": backend['model'],
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": 0.7,
+                "max_tokens": 1000,
+                "stream": True
+            }
+            structured = self.structured_fields(backend_name, schema)
+        plain_payload = None
+        if structured:
+            plain_payload, payload = payload, dict(payload, **structured)
+        
+        started = time.monotonic()
+        first_token = None
+        pieces = []
+        scanner = JSONObjectScanner()
+        
+        with deadline_scope(deadline, cancel_token) as token, cancellation_scope(token):
+            try:
+                response, permit, error = self._post(backend_name, url, headers, payload,
+                                                     self.estimate_tokens(prompt), token, stream=True,
+                                                     deadline=deadline, plain_payload=plain_payload)
+                if error:
+                    self.record_outcome(backend_name, error)
+                    return error, None
+                
+                usage = None
+                finished = False
+                try:
+                    for data in self._iter_sse_data(response):
+                        if data == '[DONE]':
+                            finished = True
+                            break
+                        event = json.loads(data)
+                        if self.usage_counts(event):
+                            usage = event
+                        if backend['type'] == 'google':
+                            parts = (event.get('candidates') or [{}])[0].get('content', {}).get('parts', [])
+                            text = ''.join(part.get('text', '') for part in parts)
+                        else:
+                            choices = event.get('choices') or [{}]
+                            text = (choices[0].get('delta') or {}).get('content') or ''
+                        if not text:
+                            continue
+                        if first_token is None:
+                            first_token = time.monotonic() - started
+                        pieces.append(text)
+                        if on_chunk:
+                            on_chunk(text)
+                        if scanner.feed(text):
+                            finished = True
+                            break
+                finally:
+                    self._settle(backend_name, permit, response, usage)
+                    response.close()
+            except Exception as e:
+                error = self._interrupted(backend_name, token, deadline)
+                if error is None and isinstance(e, ValueError):
+                    error = BackendError(backend_name, BackendError.INVALID, f"unreadable stream ({e})")
+                elif error is None:
+                    error = BackendError(backend_name, BackendError.NETWORK, str(e))
+                self.record_outcome(backend_name, error)
+                return error, first_token
+            
+            # An aborted socket can look like a normal end of stream; don't return a truncated answer
+            error = None if finished else self._interrupted(backend_name, token, deadline)
+            if error:
+                self.record_outcome(backend_name, error)
+                return error, first_token
+        
+        text = ''.join(pieces) or BackendError(backend_name, BackendError.EMPTY, "empty response")
+        self.record_outcome(backend_name, text, time.monotonic() - started, first_token)
+        return text, first_token
+    
+    @staticmethod
+    def _retry_wait(seconds: float, cancel_token: Optional[CancelToken] = None) -> bool:
+        """Sleep before a retry; returns True if the call was cancelled meanwhile"""
+        if cancel_token:
+            return cancel_token.wait(seconds)
+        time.sleep(seconds)
+        return False
+    
+    @staticmethod
+    def is_error(response) -> bool:
+        """Whether a backend response is a failure rather than generated text"""
+        return isinstance(response, BackendError) or not response
+    
+    def generate_response(self, prompt: str, backend_name: str = None,
+                          cancel_token: Optional[CancelToken] = None, deadline=None,
+                          max_tokens: Optional[int] = None, coalesce: Optional[bool] = None,
+                          schema: Optional[Dict] = None):
+        """Generate response using selected backend; returns the text or a BackendError.
+        
+        deadline (a Deadline or seconds) caps the whole call including retries;
+        running out of it returns a BackendError of kind TIMEOUT. max_tokens
+        caps the completion (default 1000, or the provider's own for Gemini).
+        With coalesce (default COALESCE_DEFAULTS['enabled']) a call whose
+        prompt is already in flight to the same backend waits for that call
+        and returns its text or error; pass coalesce=False for an independent sample.
+        A JSON schema (e.g. PROJECT_SCHEMA) asks backends with a
+        'structured_output' mode for JSON matching it; the text is not validated here.
+        """
+        deadline = Deadline.coerce(deadline)
+        backend_name = self.resolve_backend(backend_name)
+        if backend_name is None:
+            return BackendError(AUTO_BACKEND, BackendError.CIRCUIT_OPEN, "no healthy backend")
+        if coalesce is None:
+            coalesce = self.coalesce['enabled']
+        if not coalesce:
+            return self._call_backend(prompt, backend_name, cancel_token, deadline, max_tokens, schema)
+        
+        key = (backend_name, prompt, max_tokens, json.dumps(schema, sort_keys=True) if schema else None)
+        while True:
+            with self.inflight_lock:
+                call = self.inflight.get(key)
+                leader = call is None
+                if leader:
+                    call = self.inflight[key] = _InflightCall()
+            if leader:
+                try:
+                    call.response = self._call_backend(prompt, backend_name, cancel_token, deadline, max_tokens,
+                                                       schema)
+                finally:
+                    with self.inflight_lock:
+                        del self.inflight[key]
+                    call.done.set()
+                return call.response
+            
+            self.metrics.record_coalesced(backend_name)
+            response = self._join_inflight(call, backend_name, cancel_token, deadline)
+            # The call was cut short by its own caller's cancel or deadline, not ours: make a new one
+            borrowed = response is None or (isinstance(response, BackendError) and
+                                            response.kind in (BackendError.CANCELLED, BackendError.TIMEOUT))
+            if not borrowed or self._interrupted(backend_name, cancel_token, deadline):
+                return response
+    
+    def _join_inflight(self, call: _InflightCall, backend_name: str, cancel_token: Optional[CancelToken],
+                       deadline: Optional[Deadline]):
+        """Wait for a coalesced call's result, giving up once this caller is cancelled or out of time"""
+        while True:
+            timeout = 0.25 if cancel_token else None
+            if deadline is not None:
+                timeout = min(timeout or deadline.remaining(), deadline.remaining())
+            if call.done.wait(timeout):
+                return call.response
+            interrupted = self._interrupted(backend_name, cancel_token, deadline)
+            if interrupted:
+                return interrupted
+    
+    def _call_backend(self, prompt: str, backend_name: str, cancel_token: Optional[CancelToken],
+                      deadline: Optional[Deadline], max_tokens: Optional[int], schema: Optional[Dict] = None):
+        """One provider call (retries included) on a resolved backend, recorded in its breaker and metrics"""
+        interrupted = self._interrupted(backend_name, cancel_token, deadline)
+        if interrupted:
+            return interrupted
+        if not self.breakers[backend_name].allow():
+            return BackendError(backend_name, BackendError.CIRCUIT_OPEN)
+        
+        started = time.monotonic()
+        with deadline_scope(deadline, cancel_token) as token, cancellation_scope(token):
+            try:
+                if backend_name == 'openai':
+                    response = self.generate_with_openai(prompt, token, deadline, max_tokens, schema)
+                elif backend_name == 'mistral':
+                    response = self.generate_with_mistral(prompt, token, deadline, max_tokens, schema)
+                elif backend_name == 'google':
+                    response = self.generate_with_google(prompt, token, deadline, max_tokens, schema)
+                elif AI_BACKENDS[backend_name]['type'] == 'local':
+                    response = self.generate_with_local(backend_name, prompt, token, deadline, max_tokens)
+                else:
+                    # Default to OpenAI
+                    response = self.generate_with_openai(prompt, token, deadline, max_tokens, schema)
+            except Exception as e:
+                response = (self._interrupted(backend_name, token, deadline) or
+                            BackendError(backend_name, BackendError.NETWORK, str(e)))
+        
+        self.record_outcome(backend_name, response, time.monotonic() - started)
+        return response
+    
+    def record_outcome(self, backend_name: str, response, seconds: float = None, first_token: Optional[float] = None):
+        """Feed a finished call into the backend's circuit breaker, latency record and metrics"""
+        breaker = self.breakers[backend_name]
+        if not self.is_error(response):
+            self.record_latency(backend_name, seconds, first_token)
+            self.metrics.record_call(backend_name, 'ok', seconds, first_token)
+            breaker.record_success()
+            return
+        kind = response.kind if isinstance(response, BackendError) else BackendError.EMPTY
+        self.metrics.record_call(backend_name, kind)
+        if isinstance(response, BackendError) and response.counts_as_failure:
+            breaker.record_failure(response)
+        else:
+            breaker.release()
+    
+    def routing_score(self, backend_name: str) -> float:
+        """Expected seconds per successful call: median latency inflated by the failure rate"""
+        with self.latency_lock:
+            samples = sorted(self.backend_latencies.get(backend_name, ()))
+        if not samples:
+            return 0.0  # untried backends go first so they get measured
+        success_rate = self.breakers[backend_name].success_rate()
+        return samples[len(samples) // 2] / max(success_rate if success_rate is not None else 1.0, 0.05)
+    
+    def route(self, backend_name: str = None) -> List[str]:
+        """Backends to try, in order: the requested one first if its circuit allows,
+        then the other healthy backends fastest first ('auto' orders them all by speed)"""
+        if not backend_name:
+            backend_name = self.selected_backend
+        healthy = [name for name in AI_BACKENDS
+                   if self.backend_status.get(name) and self.breakers[name].available()]
+        ordered = sorted(healthy, key=self.routing_score)
+        if backend_name in ordered:
+            ordered.remove(backend_name)
+            ordered.insert(0, backend_name)
+        return ordered
+    
+    def resolve_backend(self, backend_name: str = None) -> Optional[str]:
+        """Concrete backend for a request; 'auto' picks the fastest healthy one (None if none is)"""
+        if not backend_name:
+            backend_name = self.selected_backend
+        if backend_name != AUTO_BACKEND:
+            return backend_name
+        candidates = self.route(AUTO_BACKEND)
+        return candidates[0] if candidates else None
+    
+    def backend_health(self) -> Dict:
+        """Live per-backend state for status displays: configured, circuit, success rate, latency"""
+        latency = self.latency_summary()
+        return {name: dict(self.breakers[name].stats(), configured=bool(self.backend_status.get(name)),
+                           latency_p50=latency[name]['total_p50'])
+                for name in AI_BACKENDS}
+    
+    def record_latency(self, backend_name: str, seconds: float, first_token: Optional[float] = None):
+        """Record a successful response latency (and time-to-first-token if streamed)"""
+        with self.latency_lock:
+            self.backend_latencies.setdefault(backend_name, deque(maxlen=100)).append(seconds)
+            if first_token is not None:
+                self.first_token_latencies.setdefault(backend_name, deque(maxlen=100)).append(first_token)
+    
+    def latency_summary(self) -> Dict:
+        """Median total latency and time-to-first-token per backend (seconds)"""
+        def median(samples):
+            samples = sorted(samples)
+            return samples[len(samples) // 2] if samples else None
+        
+        with self.latency_lock:
+            return {name: {'total_p50': median(self.backend_latencies.get(name, ())),
+                           'first_token_p50': median(self.first_token_latencies.get(name, ())),
+                           'samples': len(self.backend_latencies.get(name, ()))}
+                    for name in AI_BACKENDS}
+    
+    def observed_latency(self, backend_name: str, quantile: float = 0.9) -> Optional[float]:
+        """Latency quantile for a backend, or None with too few samples"""
+        with self.latency_lock:
+            samples = sorted(self.backend_latencies.get(backend_name, ()))
+        if len(samples) < self.hedging['min_samples']:
+            return None
+        index = min(int(quantile * len(samples)), len(samples) - 1)
+        return samples[index]
+    
+    def hedge_delay(self, backend_name: str) -> float:
+        """Seconds to wait on a backend before hedging to the next one"""
+        if self.hedging['delay'] is not None:
+            return self.hedging['delay']
+        observed = self.observed_latency(backend_name, self.hedging['quantile'])
+        if observed is None:
+            return self.hedging['default_delay']
+        return max(observed, self.hedging['min_delay'])
+    
+    def generate_hedged(self, prompt: str, backend_name: str, deadline: Optional[Deadline] = None,
+                        max_tokens: Optional[int] = None, parse=None, cancel_token: Optional[CancelToken] = None,
+                        coalesce: Optional[bool] = None, schema: Optional[Dict] = None):
+        """Race the prompt across healthy backends, staggered by the hedge delay.
+        
+        Every attempt shares the deadline, so the race ends when it runs out;
+        cancelling cancel_token aborts all of them.
+        Returns (response, backend_used, project); project is None if every backend failed.
+        parse(response, backend_name) turns a response into the project (default parse_ai_response).
+        """
+        parse = parse or self.parse_ai_response
+        candidates = self.route(backend_name)[:max(1, self.hedging['max_backends'])]
+        if not candidates:
+            return BackendError(backend_name, BackendError.CIRCUIT_OPEN, "no healthy backend"), backend_name, None
+        backend_name = candidates[0]
+        results = queue.Queue()
+        tokens = {}
+        
+        def attempt(name, token):
+            response = self.generate_response(prompt, name, cancel_token=token, deadline=deadline,
+                                              max_tokens=max_tokens, coalesce=coalesce, schema=schema)
+            project = None
+            if not self.is_error(response) and not token.cancelled:
+                project = parse(response, name)
+            results.put((name, response, project))
+        
+        def launch(name):
+            if not self.silent and tokens:
+                print(f"⏱️  Hedging with {AI_BACKENDS[name]['name']}...")
+            tokens[name] = cancel_token.child() if cancel_token else CancelToken()
+            threading.Thread(target=attempt, args=(name, tokens[name]), daemon=True).start()
+        
+        try:
+            pending = list(candidates)
+            launch(pending.pop(0))
+            next_launch = time.monotonic() + self.hedge_delay(backend_name)
+            outstanding = 1
+            last = (backend_name, None)
+            
+            while outstanding:
+                timeout = max(next_launch - time.monotonic(), 0) if pending else None
+                try:
+                    name, response, project = results.get(timeout=timeout)
+                except queue.Empty:
+                    launch(pending.pop(0))
+                    outstanding += 1
+                    next_launch = time.monotonic() + self.hedge_delay(backend_name)
+                    continue
+                outstanding -= 1
+                if project is not None:
+                    for other, token in tokens.items():
+                        if other != name:
+                            token.cancel()
+                    return response, name, project
+                last = (name, response)
+                # A failed attempt hedges immediately instead of waiting out the delay
+                if pending:
+                    launch(pending.pop(0))
+                    outstanding += 1
+                    next_launch = time.monotonic() + self.hedge_delay(backend_name)
+            
+            return last[1], last[0], None
+        finally:
+            # The race is decided: the parent no longer needs to reach the attempts' tokens
+            if cancel_token:
+                for token in tokens.values():
+                    cancel_token._detach(token)
+    
+    def create_project_prompt(self, user_input: Dict, avoid: Optional[List[str]] = None, count: int = 1,
+                              structured: bool = False) -> str:
+        """Create a prompt for AI based on user preferences (steering away from the `avoid` ideas).
+        
+        With count > 1 it asks for that many distinct ideas as a JSON array, wrapped
+        in {"ideas": [...]} when structured (JSON mode only returns objects).
+        """
+        skill_level = user_input.get('skill_level', 'intermediate')
+        interests = user_input.get('interests', [])
+        time_available = user_input.get('time', 'medium')
+        focus_area = user_input.get('focus', 'general')
+        avoid_text = ''
+        if avoid:
+            avoid_text = ("\n\nThese ideas already exist; the new project must be clearly different from all of them:\n"
+                          + '\n'.join(f"- {idea}" for idea in avoid))
+        if count > 1:
+            request = f"Generate {count} unique Minecraft project ideas, each clearly different from the others,"
+            format_text = f"a JSON array of {count} objects, each in this JSON format"
+            closing = "Minecraft Project Ideas (JSON array):"
+            if structured:
+                format_text = f'a JSON object {{"ideas": [...]}} whose "ideas" is {format_text}'
+                closing = "Minecraft Project Ideas (JSON object):"
+        else:
+            request = "Generate a unique Minecraft project idea"
+            format_text = "this JSON format"
+            closing = "Minecraft Project Idea:"
+        
+        prompt = f"""{request} with the following details:
+
+User Requirements:
+- Skill Level: {skill_level}
+- Interests: {', '.join(interests) if interests else 'Any'}
+- Time Available: {time_available}
+- Focus Area: {focus_area}
+
+Please provide a detailed Minecraft project suggestion in {format_text}:
+{{
+    "name": "Minecraft Project Name",
+    "description": "Brief description of the Minecraft build/mod/plugin/datapack",
+    "technologies": ["Minecraft Java Edition", "Spigot/Paper", "MCreator", "Fabric/Forge", etc.],
+    "difficulty": "{skill_level}",
+    "estimated_duration": "e.g., 1-2 weeks",
+    "key_features": ["feature1", "feature2", "feature3"],
+    "learning_outcomes": ["what user will learn about Minecraft development"],
+    "prerequisites": ["required Minecraft/coding knowledge"],
+    "potential_extensions": ["how to expand the Minecraft project"],
+    "resources": ["suggested Minecraft tutorials/documentation"]
+}}
+
+Make the Minecraft project creative, fun, and educational. Include details about whether it's a build, redstone contraption, mod, plugin, datapack, command creation, or resource pack. The project should be appropriate for the skill level and time constraints.{avoid_text}
+
+{closing}"""
+        
+        return prompt
+    
+    def create_repair_prompt(self, project: Dict, invalid: List[str]) -> str:
+        """Prompt asking for only the `invalid` fields of a project, with its valid fields as context"""
+        properties = PROJECT_SCHEMA['properties']
+        known = {name: value for name, value in project.items() if name in properties and name not in invalid}
+        template = ',\n'.join(f'    "{name}": ' + ('["...", "..."]' if properties[name]['type'] == 'array' else '"..."')
+                              for name in invalid)
+        return f"""This Minecraft project idea is missing or has invalid values for: {', '.join(invalid)}.
+
+{json.dumps(known, indent=2)}
+
+Reply with only a JSON object holding exactly these fields, filled in to fit the idea above:
+{{
+{template}
+}}"""
+    
+    def generate_project_idea(self, user_input: Dict, backend_name: str = None,
+                              use_cache: Optional[bool] = None, on_chunk=None,
+                              save_history: bool = True, deadline=None, dedup: Optional[bool] = None,
+                              cancel_token: Optional[CancelToken] = None,
+                              coalesce: Optional[bool] = None) -> Optional[Dict]:
+        """Generate a project idea using selected AI backend
+        
+        Passing on_chunk streams the response, calling on_chunk(text) per piece
+        (hedged generation does not stream). deadline (seconds, default
+        RETRY_DEFAULTS['deadline']) bounds the whole call, fallbacks included;
+        raises DeadlineExceeded when it runs out before any backend answers.
+        With dedup (default DEDUP_DEFAULTS['enabled']) an idea that nearly
+        repeats a saved one is regenerated with the closest ones named as
+        ideas to avoid; if every retry repeats too, the last idea comes back
+        with 'near_duplicate_of' set. Cancelling cancel_token aborts the call,
+        which then returns None. coalesce=False never shares a provider call
+        with concurrent identical requests (see generate_response); streamed
+        calls are never shared. A cache hit comes back with 'cached' set and
+        is not saved to the history again.
+        """
+        deadline = Deadline.coerce(self.retry['deadline'] if deadline is None else deadline)
+        if not backend_name:
+            backend_name = self.selected_backend
+        if use_cache is None:
+            use_cache = self.response_cache.settings['enabled']
+        if dedup is None:
+            dedup = self.dedup['enabled']
+        
+        if not any(self.backend_status.values()):
+            return None
+        
+        if not self.silent:
+            backend_info = AI_BACKENDS.get(backend_name, {})
+            print(f"\n🤖 Generating AI-powered project idea...")
+            print(f"🎯 Using {backend_info.get('name', backend_name)}...")
+        
+        prompt = self.create_project_prompt(user_input)
+        started = time.monotonic()
+        requested_backend = backend_name
+        cached = None
+        if use_cache and not dedup:  # a cached answer is by definition already in the history
+            cached = self.response_cache.get(self.response_cache.make_key(user_input, backend_name))
+        
+        if cached:
+            response, first_token = cached, None
+            project = self.parse_ai_response(response)
+        else:
+            response, backend_name, project, first_token = self._generate_parsed(
+                prompt, requested_backend, on_chunk, deadline, cancel_token=cancel_token, coalesce=coalesce,
+                schema=PROJECT_SCHEMA)
+            if project is None:
+                return None
+        
+        if use_cache and not cached:
+            # 'auto' requests are cached under 'auto'; explicit ones under the backend that answered
+            key_backend = AUTO_BACKEND if requested_backend == AUTO_BACKEND else backend_name
+            self.response_cache.put(self.response_cache.make_key(user_input, key_backend), response)
+        
+        duplicates = self.find_near_duplicates(project) if dedup else []
+        for _ in range(self.dedup['retries'] if duplicates else 0):
+            if (deadline is not None and deadline.expired) or (cancel_token and cancel_token.cancelled):
+                break
+            avoid = self.avoid_hints(duplicates)
+            if not self.silent:
+                print(f"♻️  '{project.get('name')}' repeats a saved idea; asking for a different one...")
+            try:
+                result = self._generate_parsed(self.create_project_prompt(user_input, avoid), requested_backend,
+                                               on_chunk, deadline, cancel_token=cancel_token, schema=PROJECT_SCHEMA)
+            except DeadlineExceeded:
+                break  # out of time: keep the repeat rather than nothing
+            if result[2] is None:
+                break
+            response, backend_name, project, first_token = result
+            duplicates = self.find_near_duplicates(project)
+            if not duplicates:
+                break
+        
+        project['raw_response'] = response
+        project['backend_used'] = backend_name
+        project['latency'] = {
+            'total': round(time.monotonic() - started, 3),
+            'first_token': round(first_token, 3) if first_token is not None else None
+        }
+        if duplicates:
+            project['near_duplicate_of'] = [entry_id for entry_id, _ in duplicates]
+        if cached:
+            project['cached'] = True
+        
+        # Save to history (a cached answer was saved when it was first generated)
+        if save_history and not cached and (not duplicates or self.dedup['save_duplicates']):
+            self.save_suggestion({
+                'project': project,
+                'user_input': user_input,
+                'backend': backend_name
+            })
+        
+        return project
+    
+    def ideas_per_request(self, count: Optional[int] = None) -> int:
+        """Ideas to ask for in one completion: count (default MULTI_IDEA_DEFAULTS), within the token cap"""
+        count = count or self.multi_idea['ideas_per_request']
+        fits = self.multi_idea['max_tokens'] // self.multi_idea['tokens_per_idea']
+        return max(1, min(int(count), fits))
+    
+    def generate_project_ideas(self, user_input: Dict, count: Optional[int] = None, backend_name: str = None,
+                               save_history: bool = True, deadline=None, dedup: Optional[bool] = None,
+                               cancel_token: Optional[CancelToken] = None,
+                               coalesce: Optional[bool] = None) -> List[Dict]:
+        """Generate several project ideas with one request; returns them in order (empty on failure).
+        
+        The prompt asks for a JSON array of `count` ideas and the completion
+        budget grows with it. Each idea is saved as its own history entry;
+        they share the backend, latency and a 'request' dict with the request
+        id, the idea's index and the number of ideas. With dedup, ideas that
+        nearly repeat saved ones (or each other) are dropped unless all of them
+        do, in which case they come back with 'near_duplicate_of' set.
+        Multi-idea requests neither stream nor use the response cache.
+        """
+        deadline = Deadline.coerce(self.retry['deadline'] if deadline is None else deadline)
+        backend_name = backend_name or self.selected_backend
+        count = self.ideas_per_request(count)
+        if dedup is None:
+            dedup = self.dedup['enabled']
+        if not any(self.backend_status.values()):
+            return []
+        
+        if not self.silent:
+            print(f"\n🤖 Generating {count} AI-powered project ideas...")
+            print(f"🎯 Using {AI_BACKENDS.get(backend_name, {}).get('name', backend_name)}...")
+        
+        started = time.monotonic()
+        structured = self.structured['enabled']
+        response, backend_name, projects, _ = self._generate_parsed(
+            self.create_project_prompt(user_input, count=count, structured=structured), backend_name, None, deadline,
+            max_tokens=count * self.multi_idea['tokens_per_idea'], parse=self.parse_ai_projects,
+            cancel_token=cancel_token, coalesce=coalesce, schema=project_list_schema(count) if structured else None)
+        if not projects:
+            return []
+        
+        projects = projects[:count]
+        request = {'id': os.urandom(6).hex(), 'size': len(projects)}
+        latency = {'total': round(time.monotonic() - started, 3), 'first_token': None}
+        fresh, repeats = [], []
+        for index, project in enumerate(projects):
+            project['raw_response'] = json.dumps(project, indent=2) if len(projects) > 1 else response
+            project['backend_used'] = backend_name
+            project['latency'] = dict(latency)
+            project['request'] = dict(request, index=index)
+            duplicates = self.find_near_duplicates(project) if dedup else []
+            if duplicates:
+                project['near_duplicate_of'] = [entry_id for entry_id, _ in duplicates]
+                repeats.append(project)
+                if not self.dedup['save_duplicates']:
+                    continue
+            else:
+                fresh.append(project)
+            if save_history:
+                # Saved one at a time so later ideas in the batch are checked against earlier ones
+                self.save_suggestion({'project': project, 'user_input': user_input, 'backend': backend_name})
+        return fresh or repeats
+    
+    def next_project_idea(self, user_input: Dict, backend_name: str = None, count: Optional[int] = None,
+                          save_history: bool = True, deadline=None, dedup: Optional[bool] = None,
+                          on_chunk=None, use_cache: Optional[bool] = None,
+                          cancel_token: Optional[CancelToken] = None,
+                          coalesce: Optional[bool] = None) -> Optional[Dict]:
+        """The next idea for these preferences, served from the local buffer when it has one.
+        
+        With more than one idea per request (count, default
+        MULTI_IDEA_DEFAULTS['ideas_per_request']) an empty buffer is refilled by
+        generate_project_ideas() and its first idea returned; callers arriving
+        during a refill wait for it and take the next ideas (unless
+        coalesce=False). Otherwise this is generate_project_idea(), which
+        streams and uses the cache as usual.
+        """
+        backend_name = backend_name or self.selected_backend
+        if coalesce is None:
+            coalesce = self.coalesce['enabled']
+        if self.ideas_per_request(count) <= 1:
+            return self.generate_project_idea(user_input, backend_name, use_cache=use_cache, on_chunk=on_chunk,
+                                              save_history=save_history, deadline=deadline, dedup=dedup,
+                                              cancel_token=cancel_token, coalesce=coalesce)
+        deadline = Deadline.coerce(self.retry['deadline'] if deadline is None else deadline)
+        key = self.response_cache.make_key(user_input, backend_name)
+        while True:
+            project = self._take_buffered(key)
+            if project is not None:
+                return project
+            with self.idea_buffer_lock:
+                refill = self.idea_refills.get(key) if coalesce else None
+                if refill is None:
+                    refill = self.idea_refills[key] = threading.Event()
+                    break
+            while not refill.wait(0.25 if cancel_token else deadline.remaining() if deadline else None):
+                if (cancel_token and cancel_token.cancelled) or (deadline is not None and deadline.expired):
+                    return None
+        try:
+            projects = self.generate_project_ideas(user_input, count, backend_name, save_history, deadline, dedup,
+                                                   cancel_token, coalesce)
+            if not projects:
+                return None
+            self._buffer_ideas(key, projects[1:])
+            return projects[0]
+        finally:
+            with self.idea_buffer_lock:
+                if self.idea_refills.get(key) is refill:
+                    del self.idea_refills[key]
+            refill.set()
+    
+    def buffered_ideas(self, user_input: Dict, backend_name: str = None) -> int:
+        """Number of ideas waiting in the buffer for these preferences"""
+        key = self.response_cache.make_key(user_input, backend_name or self.selected_backend)
+        now = time.monotonic()
+        with self.idea_buffer_lock:
+            return sum(1 for expires, _ in self.idea_buffers.get(key, ()) if expires > now)
+    
+    def _take_buffered(self, key: str) -> Optional[Dict]:
+        """Pop the oldest unexpired buffered idea for a preference key"""
+        now = time.monotonic()
+        with self.idea_buffer_lock:
+            buffered = self.idea_buffers.get(key)
+            while buffered:
+                expires, project = buffered.popleft()
+                if expires > now:
+                    if not buffered:
+                        del self.idea_buffers[key]
+                    return project
+            self.idea_buffers.pop(key, None)
+            return None
+    
+    def _buffer_ideas(self, key: str, projects: List[Dict]):
+        """Keep ideas for later next_project_idea() calls with the same preferences"""
+        if not projects:
+            return
+        expires = time.monotonic() + self.multi_idea['buffer_ttl']
+        with self.idea_buffer_lock:
+            self.idea_buffers.setdefault(key, deque()).extend((expires, project) for project in projects)
+            self.idea_buffers.move_to_end(key)
+            while len(self.idea_buffers) > self.multi_idea['max_buffers']:
+                self.idea_buffers.popitem(last=False)
+    
+    def _generate_parsed(self, prompt: str, backend_name: str, on_chunk, deadline: Optional[Deadline],
+                         max_tokens: Optional[int] = None, parse=None, cancel_token: Optional[CancelToken] = None,
+                         coalesce: Optional[bool] = None, schema: Optional[Dict] = None):
+        """One generation with hedging or fallbacks: (response, backend_used, project, first_token).
+        
+        project is None if every backend failed or the call was cancelled;
+        raises DeadlineExceeded if the budget ran out. The schema goes to the
+        provider as structured output, and fields of the parsed project (or
+        projects) that fail PROJECT_SCHEMA are repaired by the backend that answered.
+        """
+        parse = parse or self.parse_ai_response
+        first_token = None
+        if self.hedging['enabled']:
+            response, backend_name, project = self.generate_hedged(prompt, backend_name, deadline, max_tokens, parse,
+                                                                   cancel_token, coalesce, schema)
+            if project is None:
+                self._raise_if_timed_out(response, deadline)
+                return response, backend_name, project, first_token
+            response, project = self._repair_invalid(response, project, backend_name, deadline, cancel_token)
+            return response, backend_name, project, first_token
+        
+        # Try the requested backend, then the other healthy ones fastest first;
+        # backends with an open circuit are skipped instead of costing a timeout.
+        # Each attempt but the last leaves part of the budget for the fallbacks.
+        response = None
+        candidates = self.route(backend_name)
+        for index, candidate in enumerate(candidates):
+            if response is not None and not self.silent:
+                print(f"{response}; falling back to {AI_BACKENDS[candidate]['name']}...")
+            budget = deadline
+            if deadline is not None and index < len(candidates) - 1:
+                budget = deadline.share(1 - self.retry['fallback_share'])
+            if on_chunk:
+                response, first_token = self.generate_streaming(prompt, candidate, on_chunk, cancel_token, budget,
+                                                                schema)
+            else:
+                response = self.generate_response(prompt, candidate, cancel_token, budget, max_tokens, coalesce,
+                                                  schema)
+            if not self.is_error(response) or (deadline is not None and deadline.expired):
+                break
+            if cancel_token and cancel_token.cancelled:
+                break
+        
+        if self.is_error(response):
+            self._raise_if_timed_out(response, deadline)
+            return response, backend_name, None, first_token
+        response, project = self._repair_invalid(response, parse(response, candidate), candidate, deadline,
+                                                 cancel_token)
+        return response, candidate, project, first_token
+    
+    def _repair_invalid(self, response: str, parsed, backend_name: str, deadline: Optional[Deadline],
+                        cancel_token: Optional[CancelToken]):
+        """Check a parsed project (or list of them) against PROJECT_SCHEMA and repair what fails.
+        
+        Returns (response, parsed). When a single project was repaired, response
+        becomes that project as JSON so the cache keeps the fixed answer.
+        """
+        projects = parsed if isinstance(parsed, list) else [parsed]
+        repaired = False
+        for project in projects:
+            invalid = validate_project(project)
+            if invalid and self.structured['repair']:
+                still_invalid = self.repair_project(project, invalid, backend_name, deadline, cancel_token)
+                repaired = repaired or len(still_invalid) < len(invalid)
+        if repaired and isinstance(parsed, dict):
+            response = json.dumps(parsed, indent=2)
+        return response, parsed
+    
+    def repair_project(self, project: Dict, invalid: List[str], backend_name: str,
+                       deadline: Optional[Deadline] = None, cancel_token: Optional[CancelToken] = None) -> List[str]:
+        """Ask backend_name for just the `invalid` fields of project and merge the valid ones in.
+        
+        One short call whose schema holds only those fields; returns the
+        fields that are still invalid (all of them if cancelled or out of time).
+        """
+        if self._interrupted(backend_name, cancel_token, deadline):
+            return invalid
+        if not self.silent:
+            print(f"🩹 Asking {AI_BACKENDS[backend_name]['name']} again for: {', '.join(invalid)}...")
+        properties = PROJECT_SCHEMA['properties']
+        schema = {'title': 'project_fields', 'type': 'object',
+                  'properties': {name: properties[name] for name in invalid}, 'required': list(invalid)}
+        response = self.generate_response(self.create_repair_prompt(project, invalid), backend_name, cancel_token,
+                                          deadline, self.structured['repair_max_tokens'], False, schema)
+        fields = None if self.is_error(response) else extract_json_object(response)
+        candidate = dict(project)
+        candidate.update((name, value) for name, value in (fields or {}).items() if name in invalid)
+        still_invalid = [name for name in validate_project(candidate) if name in invalid]
+        for name in invalid:
+            if name not in still_invalid:
+                project[name] = candidate[name]
+        self.metrics.record_repair(backend_name, not still_invalid)
+        return still_invalid
+    
+    @staticmethod
+    def _raise_if_timed_out(response, deadline: Optional[Deadline]):
+        """Turn a generation that failed because its budget ran out into DeadlineExceeded"""
+        if deadline is None:
+            return
+        if deadline.expired or (isinstance(response, BackendError) and response.kind == BackendError.TIMEOUT):
+            raise DeadlineExceeded(f"no answer within the {deadline.seconds:.1f}s deadline"
+                                   + (f" (last: {response})" if response else ""))
+    
+    def display_project(self, project: Dict):
+        """Display project in a nice format"""
+        print("\n" + "="*60)
+        print("🤖 AI-GENERATED PROJECT IDEA")
+        print("="*60)
+        print(f"\n📋 Project Name: {project.get('name', 'Unnamed Project')}")
+        print(f"\n📝 Description:")
+        print(f"   {project.get('description', 'No description')}")
+        
+        print(f"\n🛠️  Technologies:")
+        for tech in project.get('technologies', []):
+            print(f"   • {tech}")
+        
+        print(f"\n⭐ Key Features:")
+        for feature in project.get('key_features', project.get('features', [])):
+            print(f"   • {feature}")
+        
+        print(f"\n🎯 Learning Outcomes:")
+        for outcome in project.get('learning_outcomes', []):
+            print(f"   • {outcome}")
+        
+        print(f"\n⏱️  Estimated Duration: {project.get('estimated_duration', project.get('duration', 'Not specified'))}")
+        print(f"📊 Difficulty: {project.get('difficulty', 'Not specified')}")
+        
+        if project.get('prerequisites'):
+            print(f"\n📚 Prerequisites:")
+            for req in project.get('prerequisites', []):
+                print(f"   • {req}")
+        
+        if project.get('potential_extensions'):
+            print(f"\n🚀 Potential Extensions:")
+            for ext in project.get('potential_extensions', []):
+                print(f"   • {ext}")
+        
+        if project.get('resources'):
+            print(f"\n🔗 Suggested Resources:")
+            for resource in project.get('resources', []):
+                print(f"   • {resource}")
+        
+        print("\n" + "="*60)
+        print(f"Generated using: {project.get('backend_used', 'Unknown')}")
+
+
+# Background prefetching for "Generate Now": a few ideas kept ready for the current preferences
+PREFETCH_DEFAULTS = {
+    'enabled': False,
+    'depth': 2,                    # ideas kept ready
+    'max_requests_per_hour': 20,   # spend cap on background requests (rolling hour)
+    'debounce': 1.5,               # seconds the preferences must stay put before prefetching starts
+    'ttl': 1800,                   # seconds a prefetched idea can still be served
+    'retry_interval': 10.0,        # seconds before trying again after a failure or while rate limited
+}
+
+
+class IdeaPrefetcher:
+    """Keeps up to `depth` ideas ready for one set of preferences, generated on a background thread.
+    
+    set_target() points it at the current preferences and backend; a change
+    drops the ready ideas and cancels an in-flight prefetch. A prefetch only
+    starts when the backend's rate limiter has room to spare for foreground
+    requests and the hourly spend cap allows it. Ideas are saved to history
+    when taken, not when prefetched, on a background thread so take() never
+    waits on history I/O.
+    """
+    
+    def __init__(self, generator: LocalAICodeGenerator, settings: Optional[Dict] = None):
+        self.generator = generator
+        self.settings = dict(PREFETCH_DEFAULTS)
+        self.settings.update(settings or {})
+        self.condition = threading.Condition()
+        self.target = None        # (key, user_input, backend_name)
+        self.changed_at = 0.0
+        self.ready = deque()      # (expires, project)
+        self.spent = deque()      # start times of background requests in the last hour
+        self.retry_at = 0.0
+        self.token = None         # CancelToken of the in-flight prefetch
+        self.thread = None
+        self.saves = queue.Queue()  # taken ideas waiting to be saved to history, in order
+        self.saver = None
+        self.stopped = False
+        self.counters = {'served': 0, 'misses': 0, 'prefetched': 0, 'discarded': 0, 'requests': 0}
+    
+    def configure(self, **settings):
+        """Change settings (e.g. enabled, depth, max_requests_per_hour); disabling drops the ready ideas"""
+        with self.condition:
+            self.settings.update(settings)
+            if not self.settings['enabled']:
+                self._drop()
+            self._wake()
+    
+    def set_target(self, user_input: Dict, backend_name: str):
+        """Prefetch for these preferences from now on (a no-op if they did not change)"""
+        key = self.generator.response_cache.make_key(user_input, backend_name)
+        with self.condition:
+            if self.target is not None and self.target[0] == key:
+                return
+            self.target = (key, dict(user_input), backend_name)
+            self.changed_at = time.monotonic()
+            self.retry_at = 0.0
+            self._drop()
+            self._wake()
+    
+    def take(self, user_input: Dict, backend_name: str) -> Optional[Dict]:
+        """A ready idea for these preferences, queued for saving to history; None if there is none yet.
+        
+        Taking one starts a refill.
+        """
+        key = self.generator.response_cache.make_key(user_input, backend_name)
+        project = None
+        with self.condition:
+            now = time.monotonic()
+            if self.target is not None and self.target[0] == key:
+                while self.ready and project is None:
+                    expires, candidate = self.ready.popleft()
+                    if expires > now:
+                        project = candidate
+            self.counters['served' if project else 'misses'] += 1
+            self._wake()
+            if project is not None:
+                self.saves.put({'project': project, 'user_input': user_input,
+                                'backend': project.get('backend_used', backend_name)})
+                if self.saver is None:
+                    self.saver = threading.Thread(target=self._save_taken, daemon=True)
+                    self.saver.start()
+        return project
+    
+    def _save_taken(self):
+        while True:
+            suggestion = self.saves.get()
+            if suggestion is None:
+                return
+            try:
+                self.generator.save_suggestion(suggestion)
+            except Exception:
+                pass  # the idea was already shown; a failed save must not stop later ones
+    
+    def stats(self) -> Dict:
+        """Ready ideas, requests spent in the last hour and served/miss/discard counters"""
+        with self.condition:
+            self._expire(time.monotonic())
+            return dict(self.counters, ready=len(self.ready), spent_last_hour=len(self.spent),
+                        in_flight=self.token is not None)
+    
+    def stop(self):
+        """Cancel any in-flight prefetch and end the background threads"""
+        with self.condition:
+            self.stopped = True
+            self._drop()
+            self.condition.notify_all()
+            self.saves.put(None)  # the saver finishes the ideas already taken, then exits
+    
+    def _drop(self):
+        """Discard ready ideas and cancel the in-flight prefetch (lock held)"""
+        self.counters['discarded'] += len(self.ready)
+        self.ready.clear()
+        if self.token is not None:
+            self.token.cancel()
+    
+    def _wake(self):
+        """Start the background thread if needed and let it re-check (lock held)"""
+        if self.settings['enabled'] and self.thread is None and not self.stopped:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        self.condition.notify_all()
+    
+    def _expire(self, now: float):
+        while self.ready and self.ready[0][0] <= now:
+            self.ready.popleft()
+            self.counters['discarded'] += 1
+        while self.spent and self.spent[0] <= now - 3600:
+            self.spent.popleft()
+    
+    def _has_headroom(self, backend_name: str) -> bool:
+        """Whether the backend can take a background request without delaying foreground ones"""
+        name = self.generator.resolve_backend(backend_name)
+        if name is None or not self.generator.backend_status.get(name):
+            return False
+        limiter = self.generator.rate_limiters[name]
+        return limiter.has_headroom(self.generator.estimate_tokens('', self.generator.multi_idea['tokens_per_idea']))
+    
+    def _delay(self) -> Optional[float]:
+        """Seconds until the next prefetch may start (0 = now, None = until woken) (lock held)"""
+        now = time.monotonic()
+        self._expire(now)
+        settings = self.settings
+        if not settings['enabled'] or self.target is None or self.token is not None:
+            return None
+        if len(self.ready) >= settings['depth']:
+            return self.ready[0][0] - now if self.ready else None
+        wait = max(self.changed_at + settings['debounce'], self.retry_at) - now
+        if wait > 0:
+            return wait
+        if len(self.spent) >= settings['max_requests_per_hour']:
+            return self.spent[0] + 3600 - now if self.spent else None
+        if not self._has_headroom(self.target[2]):
+            return settings['retry_interval']
+        return 0
+    
+    def _next_job(self) -> Optional[tuple]:
+        """Block until a prefetch should start: (target, ideas needed, token); None once stopped"""
+        with self.condition:
+            while not self.stopped:
+                delay = self._delay()
+                if delay is not None and delay <= 0:
+                    self.token = CancelToken()
+                    self.spent.append(time.monotonic())
+                    self.counters['requests'] += 1
+                    return self.target, self.settings['depth'] - len(self.ready), self.token
+                self.condition.wait(delay)
+            return None
+    
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            target, needed, token = job
+            _, user_input, backend_name = target
+            generator = self.generator
+            try:
+                if needed > 1 and generator.ideas_per_request() > 1:
+                    projects = generator.generate_project_ideas(user_input, needed, backend_name, save_history=False,
+                                                                cancel_token=token, coalesce=False)
+                else:
+                    # Independent samples: sharing a foreground call would prefetch the idea just shown
+                    project = generator.generate_project_idea(user_input, backend_name, use_cache=False,
+                                                              save_history=False, cancel_token=token, coalesce=False)
+                    projects = [project] if project else []
+            except Exception:
+                projects = []  # DeadlineExceeded or a failed request: try again after retry_interval
+            with self.condition:
+                self.token = None
+                now = time.monotonic()
+                if target is not self.target or token.cancelled:
+                    self.counters['discarded'] += len(projects)
+                elif projects:
+                    expires = now + self.settings['ttl']
+                    self.ready.extend((expires, project) for project in projects)
+                    self.counters['prefetched'] += len(projects)
+                else:
+                    self.retry_at = now + self.settings['retry_interval']
+                self.condition.notify_all()
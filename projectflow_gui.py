@@ -0,0 +1,1320 @@
+"""Tkinter desktop interface"""
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+import tkinter as tk
+from tkinter import ttk, scrolledtext, messagebox, filedialog
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from projectflow_core import (AI_BACKENDS, AUTO_BACKEND, AUTO_BACKEND_NAME, EXPORT_FORMATS, CancelToken,
+                              CircuitBreaker, DeadlineExceeded, HistorySummary, IdeaPrefetcher,
+                              LocalAICodeGenerator, _history_summary, project_markdown)
+
+
+# Generations run on one bounded pool; workers hand results back through a queue the Tk loop polls
+JOB_DEFAULTS = {
+    'workers': 3,              # generations running at once; further clicks wait their turn
+    'io_workers': 2,           # history loads, block fetches and exports; never queue behind generations
+    'poll_interval': 50,       # ms between drains of the result queue
+    'keep_finished': 20,       # finished jobs listed before the oldest are dropped
+}
+
+
+class GenerationJob:
+    """One queued, running or finished generation from the Generate tab"""
+    
+    def __init__(self, job_id: int, user_input: Dict, backend_key: str, backend_name: str, stream: bool):
+        self.id = job_id
+        self.user_input = user_input
+        self.backend_key = backend_key
+        self.backend_name = backend_name
+        self.stream = stream
+        self.cancel_token = CancelToken()
+        self.state = 'queued'      # queued, running, done, failed, cancelled (changed on the Tk thread)
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.streamed = 0          # characters received so far
+        self.from_buffer = False
+        self.project = None
+        self.error = None
+    
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+    
+    def describe(self) -> str:
+        """Short summary of the job's preferences for the jobs list"""
+        interests = ', '.join(self.user_input.get('interests') or []) or 'any interests'
+        return f"{self.user_input.get('skill_level')}, {interests}, {self.user_input.get('time')}"
+
+
+class AICodeSuggestorGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("AI Project Idea Generator")
+        self.root.geometry("900x700")
+        # Silent mode for GUI; history and backend checks start on a worker thread
+        # (check_backends_status) so the window paints first
+        self.generator = LocalAICodeGenerator(silent=True, defer_startup=True)
+        self.prefetcher = IdeaPrefetcher(self.generator)
+        self.current_project = None
+        
+        # Generations and history/export I/O run on separate bounded pools so slow generations
+        # never hold up the History tab; callbacks for the Tk thread queue up in ui_queue
+        self.executor = ThreadPoolExecutor(max_workers=JOB_DEFAULTS['workers'], thread_name_prefix='generation')
+        self.io_executor = ThreadPoolExecutor(max_workers=JOB_DEFAULTS['io_workers'], thread_name_prefix='history-io')
+        self.ui_queue = queue.Queue()
+        self.jobs = OrderedDict()   # job id -> GenerationJob, oldest first
+        self.job_ids = 0
+        self.streaming_job = None   # the job whose chunks are shown in the output box
+        self.export_tokens = set()  # cancel tokens of running history exports
+        
+        # Configure style
+        style = ttk.Style()
+        style.theme_use('clam')
+        
+        self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.update_status("Starting up...")
+        self.poll_ui_queue()
+        self.check_backends_status()
+    
+    def setup_ui(self):
+        """Setup the main UI components"""
+        # Create notebook (tabs)
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        # Tab 1: Generate Project
+        self.generate_tab = ttk.Frame(self.notebook)
+        self.notebook.add(self.generate_tab, text='Generate Project')
+        self.setup_generate_tab()
+        
+        # Tab 2: View History
+        self.history_tab = ttk.Frame(self.notebook)
+        self.notebook.add(self.history_tab, text='History')
+        self.setup_history_tab()
+        
+        # Tab 3: Settings
+        self.settings_tab = ttk.Frame(self.notebook)
+        self.notebook.add(self.settings_tab, text='Settings')
+        self.setup_settings_tab()
+        
+        # Status bar
+        self.status_bar = ttk.Label(self.root, text="Ready", relief=tk.SUNKEN, anchor=tk.W)
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+    
+    def setup_generate_tab(self):
+        """Setup the project generation tab"""
+        # Backend Selector
+        backend_frame = ttk.LabelFrame(self.generate_tab, text="AI Backend", padding=10)
+        backend_frame.pack(fill='x', padx=10, pady=5)
+        
+        ttk.Label(backend_frame, text="Select AI Service:").pack(side='left', padx=5)
+        self.backend_var = tk.StringVar(value=AI_BACKENDS['mistral']['name'])
+        backend_combo = ttk.Combobox(backend_frame, textvariable=self.backend_var, width=30, state='readonly')
+        backend_combo['values'] = [AUTO_BACKEND_NAME] + [AI_BACKENDS[k]['name'] for k in sorted(AI_BACKENDS.keys())]
+        backend_combo.pack(side='left', padx=5)
+        
+        self.hedge_var = tk.BooleanVar(value=self.generator.hedging['enabled'])
+        ttk.Checkbutton(backend_frame, text="Hedge slow requests across backends",
+                        variable=self.hedge_var).pack(side='left', padx=10)
+        
+        self.stream_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(backend_frame, text="Stream output", variable=self.stream_var).pack(side='left', padx=5)
+        
+        # Input frame
+        input_frame = ttk.LabelFrame(self.generate_tab, text="Project Preferences", padding=10)
+        input_frame.pack(fill='x', padx=10, pady=10)
+        
+        # Skill Level
+        ttk.Label(input_frame, text="Skill Level:").grid(row=0, column=0, sticky='w', pady=5)
+        self.skill_var = tk.StringVar(value='intermediate')
+        skill_frame = ttk.Frame(input_frame)
+        skill_frame.grid(row=0, column=1, sticky='w', pady=5)
+        ttk.Radiobutton(skill_frame, text="Beginner", variable=self.skill_var, value='beginner').pack(side='left', padx=5)
+        ttk.Radiobutton(skill_frame, text="Intermediate", variable=self.skill_var, value='intermediate').pack(side='left', padx=5)
+        ttk.Radiobutton(skill_frame, text="Advanced", variable=self.skill_var, value='advanced').pack(side='left', padx=5)
+        
+        # Interests
+        ttk.Label(input_frame, text="Interests (comma-separated):").grid(row=1, column=0, sticky='w', pady=5)
+        self.interests_var = tk.StringVar(value="web development, data science, automation")
+        self.interests_entry = ttk.Entry(input_frame, width=50, textvariable=self.interests_var)
+        self.interests_entry.grid(row=1, column=1, sticky='w', pady=5)
+        
+        # Time Available
+        ttk.Label(input_frame, text="Time Available:").grid(row=2, column=0, sticky='w', pady=5)
+        self.time_var = tk.StringVar(value='1 week')
+        time_combo = ttk.Combobox(input_frame, textvariable=self.time_var, width=30, state='readonly')
+        time_combo['values'] = ('weekend', '1 week', 'month', 'open-ended')
+        time_combo.grid(row=2, column=1, sticky='w', pady=5)
+        
+        # Focus Area
+        ttk.Label(input_frame, text="Focus Area:").grid(row=3, column=0, sticky='w', pady=5)
+        self.focus_var = tk.StringVar(value='general')
+        focus_combo = ttk.Combobox(input_frame, textvariable=self.focus_var, width=30, state='readonly')
+        focus_combo['values'] = ('learning new technology', 'building portfolio project', 
+                                  'solving real-world problem', 'just for fun/experimentation', 'general')
+        focus_combo.grid(row=3, column=1, sticky='w', pady=5)
+        
+        # Ideas prefetched for "Generate Now" follow the form
+        for var in (self.backend_var, self.skill_var, self.interests_var, self.time_var, self.focus_var):
+            var.trace_add('write', self.on_preferences_changed)
+        
+        # Generate Button
+        btn_frame = ttk.Frame(self.generate_tab)
+        btn_frame.pack(fill='x', padx=10, pady=10)
+        
+        self.generate_btn = ttk.Button(btn_frame, text="🤖 Generate Project Idea", command=self.generate_project)
+        self.generate_btn.pack(side='left', padx=5)
+        
+        ttk.Button(btn_frame, text="🚀 Generate Now", command=self.quick_generate).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Clear Output", command=self.clear_output).pack(side='left', padx=5)
+        
+        # Generation jobs: each click queues one with the form's current settings
+        jobs_frame = ttk.LabelFrame(self.generate_tab, text="Generations", padding=5)
+        jobs_frame.pack(fill='x', padx=10, pady=5)
+        
+        job_columns = ('Backend', 'Preferences', 'Status')
+        self.jobs_tree = ttk.Treeview(jobs_frame, columns=job_columns, show='tree headings', height=4)
+        self.jobs_tree.heading('#0', text='#')
+        self.jobs_tree.column('#0', width=40, stretch=False)
+        self.jobs_tree.column('Backend', width=150, stretch=False)
+        self.jobs_tree.column('Preferences', width=330)
+        self.jobs_tree.column('Status', width=220)
+        for col in job_columns:
+            self.jobs_tree.heading(col, text=col)
+        self.jobs_tree.pack(side='left', fill='x', expand=True)
+        self.jobs_tree.bind('<Double-1>', lambda event: self.show_job_result())
+        
+        job_buttons = ttk.Frame(jobs_frame)
+        job_buttons.pack(side='left', fill='y', padx=5)
+        ttk.Button(job_buttons, text="Cancel", command=self.cancel_selected_jobs).pack(fill='x', pady=2)
+        ttk.Button(job_buttons, text="Show Result", command=self.show_job_result).pack(fill='x', pady=2)
+        
+        # Output frame
+        output_frame = ttk.LabelFrame(self.generate_tab, text="Generated Project", padding=10)
+        output_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        self.output_text = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, width=80, height=20)
+        self.output_text.pack(fill='both', expand=True)
+        
+        # Export button
+        export_frame = ttk.Frame(self.generate_tab)
+        export_frame.pack(fill='x', padx=10, pady=5)
+        
+        ttk.Button(export_frame, text="Export as JSON", command=lambda: self.export_current('json')).pack(side='left', padx=5)
+        ttk.Button(export_frame, text="Export as Markdown", command=lambda: self.export_current('md')).pack(side='left', padx=5)
+        ttk.Button(export_frame, text="Export as Text", command=lambda: self.export_current('txt')).pack(side='left', padx=5)
+    
+    def setup_history_tab(self):
+        """Setup the history viewing tab"""
+        # Controls
+        control_frame = ttk.Frame(self.history_tab)
+        control_frame.pack(fill='x', padx=10, pady=10)
+        
+        ttk.Button(control_frame, text="Refresh History", command=self.load_history).pack(side='left', padx=5)
+        ttk.Button(control_frame, text="Clear History", command=self.clear_history).pack(side='left', padx=5)
+        ttk.Button(control_frame, text="Export History...", command=self.export_history_dialog).pack(side='left', padx=5)
+        
+        # Search and column filters (run as indexed queries in the history store)
+        filter_frame = ttk.Frame(self.history_tab)
+        filter_frame.pack(fill='x', padx=10)
+        
+        ttk.Label(filter_frame, text="Search:").pack(side='left', padx=5)
+        self.history_search_var = tk.StringVar()
+        search_entry = ttk.Entry(filter_frame, textvariable=self.history_search_var, width=30)
+        search_entry.pack(side='left', padx=5)
+        search_entry.bind('<Return>', lambda event: self.load_history())
+        
+        ttk.Label(filter_frame, text="Backend:").pack(side='left', padx=5)
+        self.history_backend_var = tk.StringVar(value='All')
+        self.history_backend_combo = ttk.Combobox(filter_frame, textvariable=self.history_backend_var,
+                                                  width=12, state='readonly', values=['All'])
+        self.history_backend_combo.pack(side='left', padx=5)
+        self.history_backend_combo.bind('<<ComboboxSelected>>', lambda event: self.load_history())
+        
+        ttk.Label(filter_frame, text="Difficulty:").pack(side='left', padx=5)
+        self.history_difficulty_var = tk.StringVar(value='All')
+        self.history_difficulty_combo = ttk.Combobox(filter_frame, textvariable=self.history_difficulty_var,
+                                                     width=14, state='readonly', values=['All'])
+        self.history_difficulty_combo.pack(side='left', padx=5)
+        self.history_difficulty_combo.bind('<<ComboboxSelected>>', lambda event: self.load_history())
+        
+        ttk.Button(filter_frame, text="Search", command=self.load_history).pack(side='left', padx=5)
+        
+        # History list
+        list_frame = ttk.Frame(self.history_tab)
+        list_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        # Treeview for history: a virtual window over the history store. Only the
+        # visible rows exist as items; the scrollbar maps onto the full result count.
+        self.history_filters = {}
+        self.history_total = 0
+        self.history_request = None
+        self.history_offset = 0
+        self.history_visible_rows = 15
+        self.history_blocks = OrderedDict()  # block index -> summary rows (small page cache)
+        self.history_version = 0             # bumped whenever cached blocks stop matching the store
+        self.history_pending = set()         # (version, block) being fetched on the I/O executor
+        self.history_selected_id = None
+        
+        columns = ('Date', 'Project Name', 'Difficulty', 'Backend')
+        self.history_tree = ttk.Treeview(list_frame, columns=columns, show='tree headings', height=15)
+        
+        self.history_tree.heading('#0', text='#')
+        self.history_tree.column('#0', width=50)
+        
+        for col in columns:
+            self.history_tree.heading(col, text=col)
+            self.history_tree.column(col, width=150)
+        
+        self.history_tree.pack(side='left', fill='both', expand=True)
+        
+        # Scrollbar
+        self.history_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.on_history_scroll)
+        self.history_scrollbar.pack(side='right', fill='y')
+        
+        # Bind selection, scrolling and resizing
+        self.history_tree.bind('<<TreeviewSelect>>', self.on_history_select)
+        self.history_tree.bind('<MouseWheel>', self.on_history_wheel)
+        self.history_tree.bind('<Button-4>', lambda event: self.scroll_history(-3) or 'break')
+        self.history_tree.bind('<Button-5>', lambda event: self.scroll_history(3) or 'break')
+        self.history_tree.bind('<Up>', self.on_history_key)
+        self.history_tree.bind('<Down>', self.on_history_key)
+        self.history_tree.bind('<Prior>', lambda event: self.scroll_history(-self.history_visible_rows) or 'break')
+        self.history_tree.bind('<Next>', lambda event: self.scroll_history(self.history_visible_rows) or 'break')
+        self.history_tree.bind('<Configure>', self.on_history_resize)
+        
+        # New suggestions are added to the list as they are saved
+        self.generator.history_listeners.append(lambda entry: self.post(self.add_history_row, entry))
+        
+        # Details frame
+        details_frame = ttk.LabelFrame(self.history_tab, text="Project Details", padding=10)
+        details_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        self.history_details = scrolledtext.ScrolledText(details_frame, wrap=tk.WORD, height=10)
+        self.history_details.pack(fill='both', expand=True)
+    
+    def setup_settings_tab(self):
+        """Setup the settings tab"""
+        # Backend status
+        status_frame = ttk.LabelFrame(self.settings_tab, text="Available AI Services", padding=10)
+        status_frame.pack(fill='x', padx=10, pady=10)
+        
+        self.backend_labels = {}
+        for i, (key, backend) in enumerate(AI_BACKENDS.items()):
+            label = ttk.Label(status_frame, text=f"✅ {backend['name']}")
+            label.grid(row=i, column=0, sticky='w', pady=3)
+            self.backend_labels[key] = label
+        
+        # Response cache
+        cache_frame = ttk.LabelFrame(self.settings_tab, text="Response Cache", padding=10)
+        cache_frame.pack(fill='x', padx=10, pady=10)
+        
+        cache_settings = self.generator.response_cache.settings
+        self.cache_enabled_var = tk.BooleanVar(value=cache_settings['enabled'])
+        ttk.Checkbutton(cache_frame, text="Reuse cached responses for identical preferences",
+                        variable=self.cache_enabled_var, command=self.apply_cache_settings).grid(row=0, column=0, columnspan=2, sticky='w')
+        
+        ttk.Label(cache_frame, text="Variants per preference set:").grid(row=1, column=0, sticky='w', pady=3)
+        self.cache_variants_var = tk.IntVar(value=cache_settings['variants'])
+        ttk.Spinbox(cache_frame, from_=1, to=10, width=5, textvariable=self.cache_variants_var,
+                    command=self.apply_cache_settings).grid(row=1, column=1, sticky='w', pady=3)
+        
+        self.cache_stats_label = ttk.Label(cache_frame, text="")
+        self.cache_stats_label.grid(row=2, column=0, columnspan=2, sticky='w', pady=3)
+        
+        cache_buttons = ttk.Frame(cache_frame)
+        cache_buttons.grid(row=3, column=0, columnspan=2, sticky='w')
+        ttk.Button(cache_buttons, text="Refresh Stats", command=self.update_cache_stats).pack(side='left', padx=5)
+        ttk.Button(cache_buttons, text="Clear Cache", command=self.clear_cache).pack(side='left', padx=5)
+        self.update_cache_stats()
+        
+        # Request time budget
+        requests_frame = ttk.LabelFrame(self.settings_tab, text="Requests", padding=10)
+        requests_frame.pack(fill='x', padx=10, pady=10)
+        
+        ttk.Label(requests_frame, text="Time budget per generation (seconds, fallbacks included):").grid(row=0, column=0, sticky='w', pady=3)
+        self.deadline_var = tk.IntVar(value=int(self.generator.retry['deadline'] or 0))
+        ttk.Spinbox(requests_frame, from_=5, to=300, increment=5, width=5, textvariable=self.deadline_var,
+                    command=self.apply_request_settings).grid(row=0, column=1, sticky='w', pady=3)
+        
+        self.dedup_var = tk.BooleanVar(value=self.generator.dedup['enabled'])
+        ttk.Checkbutton(requests_frame, text="Regenerate ideas that nearly repeat a saved one",
+                        variable=self.dedup_var, command=self.apply_request_settings).grid(row=1, column=0, columnspan=2, sticky='w')
+        
+        ttk.Label(requests_frame, text="Ideas per request (extras are kept for the next clicks):").grid(row=2, column=0, sticky='w', pady=3)
+        self.ideas_per_request_var = tk.IntVar(value=self.generator.multi_idea['ideas_per_request'])
+        ttk.Spinbox(requests_frame, from_=1, to=10, width=5, textvariable=self.ideas_per_request_var,
+                    command=self.apply_request_settings).grid(row=2, column=1, sticky='w', pady=3)
+        
+        # Background prefetching for "Generate Now"
+        prefetch_frame = ttk.LabelFrame(self.settings_tab, text="Generate Now Prefetch", padding=10)
+        prefetch_frame.pack(fill='x', padx=10, pady=10)
+        
+        prefetch_settings = self.prefetcher.settings
+        self.prefetch_var = tk.BooleanVar(value=prefetch_settings['enabled'])
+        ttk.Checkbutton(prefetch_frame, text="Keep ideas ready in the background for the current preferences",
+                        variable=self.prefetch_var, command=self.apply_prefetch_settings).grid(row=0, column=0, columnspan=2, sticky='w')
+        
+        ttk.Label(prefetch_frame, text="Ideas kept ready:").grid(row=1, column=0, sticky='w', pady=3)
+        self.prefetch_depth_var = tk.IntVar(value=prefetch_settings['depth'])
+        ttk.Spinbox(prefetch_frame, from_=1, to=5, width=5, textvariable=self.prefetch_depth_var,
+                    command=self.apply_prefetch_settings).grid(row=1, column=1, sticky='w', pady=3)
+        
+        ttk.Label(prefetch_frame, text="Max background requests per hour:").grid(row=2, column=0, sticky='w', pady=3)
+        self.prefetch_spend_var = tk.IntVar(value=prefetch_settings['max_requests_per_hour'])
+        ttk.Spinbox(prefetch_frame, from_=1, to=500, width=5, textvariable=self.prefetch_spend_var,
+                    command=self.apply_prefetch_settings).grid(row=2, column=1, sticky='w', pady=3)
+        
+        self.prefetch_stats_label = ttk.Label(prefetch_frame, text="")
+        self.prefetch_stats_label.grid(row=3, column=0, columnspan=2, sticky='w', pady=3)
+        
+        # Live per-backend metrics
+        metrics_frame = ttk.LabelFrame(self.settings_tab, text="Metrics", padding=10)
+        metrics_frame.pack(fill='x', padx=10, pady=10)
+        
+        columns = (('backend', "Backend", 90), ('calls', "Calls", 55), ('errors', "Errors", 70),
+                   ('rate', "Ideas/min", 70), ('p50', "p50", 55), ('p95', "p95", 55), ('p99', "p99", 55),
+                   ('codes', "HTTP codes", 140), ('retries', "Retries", 60), ('fallbacks', "Parse fallbacks", 100),
+                   ('repairs', "Failed repairs", 90), ('tokens', "Tokens", 80))
+        self.metrics_tree = ttk.Treeview(metrics_frame, columns=[c[0] for c in columns], show='headings',
+                                         height=len(AI_BACKENDS))
+        for key, heading, width in columns:
+            self.metrics_tree.heading(key, text=heading)
+            self.metrics_tree.column(key, width=width, anchor='w' if key in ('backend', 'codes') else 'e')
+        for key in AI_BACKENDS:
+            self.metrics_tree.insert('', 'end', iid=key, values=(AI_BACKENDS[key]['label'],))
+        self.metrics_tree.pack(fill='x')
+        
+        ttk.Button(metrics_frame, text="Export Prometheus Text...",
+                   command=self.export_metrics).pack(anchor='w', pady=(5, 0))
+        
+        # Instructions
+        instructions_frame = ttk.LabelFrame(self.settings_tab, text="About This App", padding=10)
+        instructions_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        instructions_text = scrolledtext.ScrolledText(instructions_frame, wrap=tk.WORD, height=15)
+        instructions_text.pack(fill='both', expand=True)
+
+        instructions = """⚠️ IMPORTANT: ADD YOUR API KEYS
+
+This app supports 3 popular AI services, plus an optional offline model. Add your keys via environment variables (or .env) — the code will read them automatically.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+1. 🔥 OpenAI ChatGPT (Most Popular)
+    • Best quality responses
+    • Env var: OPENAI_API_KEY
+    • Get key: https://platform.openai.com/account/api-keys
+    • Model: gpt-3.5-turbo
+
+2. 🚀 Mistral (Open Source & Free)
+    • Fast and solid quality
+    • Env var: MISTRAL_API_KEY
+    • Get key: https://console.mistral.ai/
+    • Model: mistral-small-latest
+
+3. 🌐 Google Gemini (Very Popular)
+    • Great for creative tasks
+    • Env var: GEMINI_API_KEY
+    • Get key: https://makersuite.google.com/app/apikey
+    • Model: gemini-pro
+
+4. 💻 Local model (offline, CPU)
+    • No key, no quota, no network once downloaded
+    • Env var: PROJECTFLOW_LOCAL_MODEL (a Hugging Face model id)
+    • Needs: pip install transformers torch
+    • Model: Qwen/Qwen2.5-0.5B-Instruct
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+HOW TO SET UP (no code edits needed):
+
+1. Obtain your API key from one of the links above
+2. Export it in your shell (or add to .env):
+   • export OPENAI_API_KEY=your_key_here
+   • export MISTRAL_API_KEY=your_key_here
+   • export GEMINI_API_KEY=your_key_here
+3. Restart the app so it picks up the env vars
+4. Select your AI service and generate
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+TIPS:
+
+• Default backend is Mistral; switch if you prefer OpenAI/Gemini
+• Keep your API keys SECRET and avoid sharing them
+• If a service errors, switch to another backend
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
+        instructions_text.insert('1.0', instructions)
+        instructions_text.config(state='disabled')
+    
+    def apply_cache_settings(self):
+        """Push the cache controls into the generator's cache settings"""
+        settings = self.generator.response_cache.settings
+        settings['enabled'] = self.cache_enabled_var.get()
+        try:
+            settings['variants'] = max(1, int(self.cache_variants_var.get()))
+        except (tk.TclError, ValueError):
+            pass
+    
+    def apply_request_settings(self):
+        """Push the time budget, near-duplicate and ideas-per-request controls into the generator's settings"""
+        try:
+            self.generator.retry['deadline'] = max(1, int(self.deadline_var.get()))
+        except (tk.TclError, ValueError):
+            pass
+        try:
+            self.generator.multi_idea['ideas_per_request'] = max(1, int(self.ideas_per_request_var.get()))
+        except (tk.TclError, ValueError):
+            pass
+        self.generator.dedup['enabled'] = self.dedup_var.get()
+        if self.dedup_var.get() and self.generator.started.is_set():
+            self.generator.get_idea_index()  # start loading the index before the first generation
+    
+    def apply_prefetch_settings(self):
+        """Push the prefetch controls into the prefetcher and point it at the current form"""
+        settings = {'enabled': self.prefetch_var.get()}
+        try:
+            settings['depth'] = max(1, int(self.prefetch_depth_var.get()))
+            settings['max_requests_per_hour'] = max(1, int(self.prefetch_spend_var.get()))
+        except (tk.TclError, ValueError):
+            pass
+        self.prefetcher.configure(**settings)
+        self.on_preferences_changed()
+    
+    def on_preferences_changed(self, *args):
+        """Re-target the prefetcher when any form setting changes (dropping ideas made for the old ones)"""
+        if self.prefetcher.settings['enabled'] and self.generator.started.is_set():
+            self.prefetcher.set_target(self.get_user_input(), self.selected_backend_key())
+    
+    def update_prefetch_stats(self):
+        """Show how many prefetched ideas are ready and what prefetching has cost"""
+        if not self.prefetcher.settings['enabled']:
+            self.prefetch_stats_label.config(text="")
+            return
+        stats = self.prefetcher.stats()
+        self.prefetch_stats_label.config(
+            text=(f"Ready: {stats['ready']}{' (+1 generating)' if stats['in_flight'] else ''}   "
+                  f"Served: {stats['served']}   Misses: {stats['misses']}   Discarded: {stats['discarded']}   "
+                  f"Requests in the last hour: {stats['spent_last_hour']} / "
+                  f"{self.prefetcher.settings['max_requests_per_hour']}"))
+    
+    def update_cache_stats(self):
+        """Show response cache hit/miss statistics; the first call walks ai_cache/, so it runs on the I/O executor"""
+        def show(stats):
+            self.cache_stats_label.config(
+                text=(f"Hits: {stats['hits']} (memory {stats['memory_hits']}, disk {stats['disk_hits']})   "
+                      f"Misses: {stats['misses']}   Hit rate: {stats['hit_rate']:.0%}\n"
+                      f"Cached keys: {stats['memory_keys']} in memory, {stats['disk_keys']} on disk "
+                      f"({stats['disk_bytes'] / 1024:.1f} KB)   Evictions: {stats['evictions']}"))
+        
+        self.io_executor.submit(lambda: self.post(show, self.generator.response_cache.stats()))
+    
+    def clear_cache(self):
+        """Clear the response cache after confirmation"""
+        if messagebox.askyesno("Confirm", "Clear all cached responses?"):
+            def cleared():
+                self.update_cache_stats()
+                self.update_status("Response cache cleared")
+            
+            def clear():
+                self.generator.response_cache.clear()
+                self.post(cleared)
+            
+            self.io_executor.submit(clear)
+    
+    def get_user_input(self) -> Dict:
+        """Get user preferences from GUI"""
+        interests_text = self.interests_entry.get().strip()
+        interests = [i.strip() for i in interests_text.split(',') if i.strip()]
+        
+        return {
+            'skill_level': self.skill_var.get(),
+            'interests': interests,
+            'time': self.time_var.get(),
+            'focus': self.focus_var.get()
+        }
+    
+    def check_backends_status(self):
+        """Check and update backend status (starting the generator the first time)"""
+        first_start = not self.generator.started.is_set()
+        
+        def update_status():
+            if first_start:
+                self.generator.start()
+            else:
+                self.generator.backend_status = self.generator.check_backends()
+            
+            # Schedule GUI updates on main thread
+            def update_gui():
+                available = sum(1 for key in self.backend_labels if self.generator.backend_status.get(key))
+                status_msg = f"{available} / {len(self.backend_labels)} services ready"
+                if available == 0:
+                    status_msg = "No AI service ready - add a key in AI_BACKENDS"
+                self.update_status(status_msg)
+                if first_start:
+                    self.refresh_backend_labels()
+                    self.load_history()
+                    self.on_preferences_changed()
+            
+            self.post(update_gui)
+        
+        self.executor.submit(update_status)
+    
+    def refresh_backend_labels(self):
+        """Show each backend's live circuit state, success rate and latency; repeats every 2s"""
+        for backend_key, health in self.generator.backend_health().items():
+            name = AI_BACKENDS[backend_key]['name']
+            if not health['configured']:
+                text = f"❌ {name} ({'not enabled' if AI_BACKENDS[backend_key]['type'] == 'local' else 'add API key'})"
+            elif health['state'] == CircuitBreaker.OPEN:
+                text = f"⛔ {name} - failing, retry in {health['retry_in']:.0f}s ({health['last_error']})"
+            elif health['state'] == CircuitBreaker.HALF_OPEN:
+                text = f"⚠️ {name} - recovering, probing"
+            else:
+                details = []
+                if health['success_rate'] is not None:
+                    details.append(f"{health['success_rate']:.0%} ok")
+                if health['latency_p50'] is not None:
+                    details.append(f"{health['latency_p50']:.1f}s typical")
+                text = f"✅ {name}" + (f" ({', '.join(details)})" if details else "")
+            self.backend_labels[backend_key].config(text=text)
+        self.update_metrics()
+        self.update_prefetch_stats()
+        self.root.after(2000, self.refresh_backend_labels)
+    
+    def update_metrics(self):
+        """Fill the Settings tab's metrics table from the generator's metrics snapshot"""
+        def seconds(value):
+            return f"{value:.2f}s" if value is not None else "-"
+        
+        for backend_key, metrics in self.generator.metrics_snapshot()['backends'].items():
+            if not self.metrics_tree.exists(backend_key):
+                continue
+            latency = metrics['latency']
+            codes = ' '.join(f"{code}×{count}" for code, count in sorted(metrics['status_codes'].items()))
+            errors = (f"{metrics['errors']} ({metrics['error_rate']:.0%})"
+                      if metrics['error_rate'] is not None else "0")
+            self.metrics_tree.item(backend_key, values=(
+                AI_BACKENDS[backend_key]['label'], metrics['calls'], errors, f"{metrics['per_minute']:g}",
+                seconds(latency['p50']), seconds(latency['p95']), seconds(latency['p99']), codes or "-",
+                metrics['retries'], f"{metrics['parse_fallbacks']} / {metrics['parses']}",
+                f"{metrics['repair_failures']} / {metrics['repairs']}", metrics['tokens']['total']))
+    
+    def export_metrics(self):
+        """Save the current metrics in the Prometheus text format"""
+        filename = filedialog.asksaveasfilename(defaultextension=".prom",
+                                                filetypes=[("Prometheus text", "*.prom"), ("All files", "*.*")])
+        if not filename:
+            return
+        try:
+            self.generator.metrics.write_prometheus(filename)
+            self.update_status(f"Metrics exported to {filename}")
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not export metrics: {e}")
+    
+    def update_status(self, message):
+        """Update status bar"""
+        self.status_bar.config(text=message)
+    
+    def generate_project(self):
+        """Generate project with user input"""
+        if not self.generator.started.is_set():
+            self.update_status("Still starting up - try again in a moment")
+            return
+        if not any(self.generator.backend_status.values()):
+            messagebox.showerror("Error", "No AI backend available!")
+            return
+        
+        backend_key = self.selected_backend_key()
+
+        # Block generation if the selected backend has no API key configured
+        if backend_key != AUTO_BACKEND and not self.generator.backend_status.get(backend_key, False):
+            if AI_BACKENDS[backend_key]['type'] == 'local':
+                messagebox.showerror("Error", f"{AI_BACKENDS[backend_key]['name']} is not enabled. Set "
+                                     f"{AI_BACKENDS[backend_key]['model_env']} to a model, install transformers and torch, and restart.")
+                return
+            messagebox.showerror("Error", f"API key not configured for {AI_BACKENDS[backend_key]['name']}. Please add your key in AI_BACKENDS and restart.")
+            return
+        
+        user_input = self.get_user_input()
+        self.generator.hedging['enabled'] = self.hedge_var.get()
+        self.apply_cache_settings()
+        self.apply_request_settings()
+        backend_name = AUTO_BACKEND_NAME if backend_key == AUTO_BACKEND else AI_BACKENDS[backend_key]['name']
+        # Multi-idea requests don't stream; a buffered idea shows up straight away
+        stream = self.stream_var.get() and not self.hedge_var.get() and self.generator.ideas_per_request() <= 1
+        self.job_ids += 1
+        job = GenerationJob(self.job_ids, user_input, backend_key, backend_name, stream)
+        self.jobs[job.id] = job
+        if stream:
+            self.streaming_job = job
+            self.output_text.delete('1.0', tk.END)
+            self.output_text.insert(tk.END, f"Streaming from {backend_name}...\n\n")
+        self.render_job(job)
+        running = sum(1 for other in self.jobs.values() if other.state in ('queued', 'running'))
+        self.update_status(f"Generating with {backend_name}..." if running == 1 else
+                           f"Queued generation #{job.id} ({running} in progress)")
+        self.executor.submit(self.run_job, job)
+    
+    def run_job(self, job: GenerationJob):
+        """Worker-thread body of a generation job; results go back through the UI queue"""
+        if job.cancel_token.cancelled:
+            return  # cancelled while it waited for a worker
+        self.post(self.job_started, job)
+        on_chunk = (lambda text: self.post(self.job_chunk, job, text)) if job.stream else None
+        try:
+            job.from_buffer = self.generator.buffered_ideas(job.user_input, job.backend_key) > 0
+            job.project = self.generator.next_project_idea(job.user_input, job.backend_key, on_chunk=on_chunk,
+                                                           cancel_token=job.cancel_token)
+        except Exception as e:
+            job.error = e
+        self.post(self.job_finished, job)
+    
+    def post(self, callback, *args):
+        """Run callback(*args) on the Tk thread; safe to call from any thread"""
+        self.ui_queue.put((callback, args))
+    
+    def poll_ui_queue(self):
+        """Run the callbacks queued by worker threads and tick the running jobs' timers"""
+        deadline = time.monotonic() + 0.02  # leave the rest of the frame to Tk
+        while time.monotonic() < deadline:
+            try:
+                callback, args = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                self.update_status(f"Error: {e}")
+        for job in self.jobs.values():
+            if job.state == 'running':
+                self.render_job(job)
+        self.root.after(JOB_DEFAULTS['poll_interval'], self.poll_ui_queue)
+    
+    def job_started(self, job: GenerationJob):
+        if job.state == 'queued':
+            job.state = 'running'
+            job.started = time.monotonic()
+            self.render_job(job)
+    
+    def job_chunk(self, job: GenerationJob, text: str):
+        job.streamed += len(text)
+        if job is self.streaming_job and job.state == 'running':
+            self.append_output(text)
+    
+    def job_finished(self, job: GenerationJob):
+        """Show a finished job's idea (unless a newer streamed one is on screen) and report it"""
+        if job.finished is not None:
+            return  # cancelled while queued, then reported again by a worker that had already picked it up
+        job.finished = time.monotonic()
+        if job.started is None:
+            job.started = job.finished
+        if job.cancel_token.cancelled:
+            job.state = 'cancelled'
+        elif job.project:
+            job.state = 'done'
+        else:
+            job.state = 'failed'
+        self.render_job(job)
+        self.update_cache_stats()
+        
+        if job.state == 'cancelled':
+            self.update_status(f"Generation #{job.id} cancelled")
+        elif job.state == 'done':
+            watching = self.streaming_job
+            if watching is None or watching is job or watching.state != 'running':
+                self.streaming_job = None
+                self.current_project = job.project
+                self.display_project(job.project)
+            repeat = " (still close to a saved idea)" if job.project.get('near_duplicate_of') else ""
+            buffered = self.generator.buffered_ideas(job.user_input, job.backend_key)
+            more = f" {buffered} more ready for these preferences." if buffered else ""
+            if job.from_buffer:
+                timing = "(from the last request)"
+            elif job.project.get('cached'):
+                timing = "(from the response cache)"
+            else:
+                timing = self.format_latency(job.project)
+            self.update_status(f"Project #{job.id} generated successfully{repeat}! {timing}{more}")
+        elif isinstance(job.error, DeadlineExceeded):
+            messagebox.showerror("Timed out", str(job.error))
+            self.update_status("Generation timed out")
+        elif job.error is not None:
+            messagebox.showerror("Error", f"Generation failed: {job.error}")
+            self.update_status("Error occurred")
+        else:
+            messagebox.showerror("Error", "Failed to generate project")
+            self.update_status("Generation failed")
+        
+        finished = [job_id for job_id, other in self.jobs.items() if other.state not in ('queued', 'running')]
+        for job_id in finished[:-JOB_DEFAULTS['keep_finished']]:
+            del self.jobs[job_id]
+            if self.jobs_tree.exists(str(job_id)):
+                self.jobs_tree.delete(str(job_id))
+    
+    def render_job(self, job: GenerationJob):
+        """Insert or refresh a job's row in the jobs list"""
+        if job.state == 'running':
+            status = f"running {job.elapsed():.1f}s" + (f", {job.streamed} chars" if job.streamed else "")
+        elif job.state == 'done':
+            status = f"done in {job.elapsed():.1f}s: {job.project.get('name', 'Unnamed Project')}"
+        elif job.state == 'failed':
+            status = f"failed: {job.error}" if job.error else "failed"
+        else:
+            status = job.state
+        values = (job.backend_name, job.describe(), status)
+        iid = str(job.id)
+        if self.jobs_tree.exists(iid):
+            self.jobs_tree.item(iid, values=values)
+        else:
+            self.jobs_tree.insert('', 0, iid=iid, text=str(job.id), values=values)
+    
+    def selected_jobs(self) -> List[GenerationJob]:
+        return [self.jobs[int(iid)] for iid in self.jobs_tree.selection() if int(iid) in self.jobs]
+    
+    def cancel_selected_jobs(self):
+        """Cancel the selected jobs, or every unfinished one if none is selected; aborts in-flight HTTP calls"""
+        jobs = self.selected_jobs() or list(self.jobs.values())
+        cancelled = 0
+        for job in jobs:
+            if job.state in ('queued', 'running'):
+                job.cancel_token.cancel()
+                cancelled += 1
+                if job.state == 'queued':
+                    self.job_finished(job)  # its worker will see the token and return without posting
+        if cancelled:
+            self.update_status(f"Cancelling {cancelled} generation{'s' if cancelled > 1 else ''}...")
+    
+    def show_job_result(self):
+        """Show the selected finished job's idea in the output box"""
+        for job in self.selected_jobs():
+            if job.project:
+                self.streaming_job = None
+                self.current_project = job.project
+                self.display_project(job.project)
+                return
+    
+    def on_close(self):
+        """Cancel queued and running work so the window closes without waiting on the network"""
+        for job in self.jobs.values():
+            job.cancel_token.cancel()
+        for token in self.export_tokens:
+            token.cancel()
+        self.prefetcher.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.io_executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+    
+    def selected_backend_key(self) -> str:
+        """Backend key (or AUTO_BACKEND) for the service picked in the combobox"""
+        selected_text = self.backend_var.get()
+        if selected_text == AUTO_BACKEND_NAME:
+            return AUTO_BACKEND
+        for key, backend_info in AI_BACKENDS.items():
+            if backend_info['name'] == selected_text:
+                return key
+        return 'mistral'  # Default fallback
+    
+    def quick_generate(self):
+        """Show a prefetched idea straight away if one is ready, else generate with current settings (no reset)"""
+        if self.prefetcher.settings['enabled'] and self.generator.started.is_set():
+            started = time.perf_counter()
+            user_input, backend_key = self.get_user_input(), self.selected_backend_key()
+            self.prefetcher.set_target(user_input, backend_key)
+            project = self.prefetcher.take(user_input, backend_key)
+            if project:
+                self.current_project = project
+                self.display_project(project)
+                self.update_status(f"Prefetched idea shown in {(time.perf_counter() - started) * 1000:.0f} ms; "
+                                   f"refilling in the background")
+                return
+        # Just generate with whatever settings are currently selected
+        # Don't reset the user's choices!
+        self.generate_project()
+    
+    def append_output(self, text: str):
+        """Append a streamed chunk to the output text widget"""
+        self.output_text.insert(tk.END, text)
+        self.output_text.see(tk.END)
+    
+    @staticmethod
+    def format_latency(project: Dict) -> str:
+        """Short latency note for the status bar"""
+        latency = project.get('latency') or {}
+        if latency.get('total') is None:
+            return ""
+        if latency.get('first_token') is not None:
+            return f"(first token {latency['first_token']:.2f}s, total {latency['total']:.2f}s)"
+        return f"({latency['total']:.2f}s)"
+    
+    def clear_output(self):
+        """Clear the output text"""
+        self.output_text.delete('1.0', tk.END)
+        self.current_project = None
+    
+    def display_project(self, project: Dict):
+        """Display project in the output text widget"""
+        self.output_text.delete('1.0', tk.END)
+        
+        output = []
+        output.append("="*60)
+        output.append("🤖 AI-GENERATED PROJECT IDEA")
+        output.append("="*60)
+        output.append("")
+        output.append(f"📋 Project Name: {project.get('name', 'Unnamed Project')}")
+        output.append("")
+        output.append("📝 Description:")
+        output.append(f"   {project.get('description', 'No description')}")
+        output.append("")
+        
+        if project.get('technologies'):
+            output.append("🛠️  Technologies:")
+            for tech in project.get('technologies', []):
+                output.append(f"   • {tech}")
+            output.append("")
+        
+        if project.get('key_features') or project.get('features'):
+            output.append("⭐ Key Features:")
+            for feature in project.get('key_features', project.get('features', [])):
+                output.append(f"   • {feature}")
+            output.append("")
+        
+        if project.get('learning_outcomes'):
+            output.append("🎯 Learning Outcomes:")
+            for outcome in project.get('learning_outcomes', []):
+                output.append(f"   • {outcome}")
+            output.append("")
+        
+        output.append(f"⏱️  Estimated Duration: {project.get('estimated_duration', project.get('duration', 'Not specified'))}")
+        output.append(f"📊 Difficulty: {project.get('difficulty', 'Not specified')}")
+        output.append("")
+        
+        if project.get('prerequisites'):
+            output.append("📚 Prerequisites:")
+            for req in project.get('prerequisites', []):
+                output.append(f"   • {req}")
+            output.append("")
+        
+        if project.get('potential_extensions'):
+            output.append("🚀 Potential Extensions:")
+            for ext in project.get('potential_extensions', []):
+                output.append(f"   • {ext}")
+            output.append("")
+        
+        if project.get('resources'):
+            output.append("🔗 Suggested Resources:")
+            for resource in project.get('resources', []):
+                output.append(f"   • {resource}")
+            output.append("")
+        
+        output.append("="*60)
+        output.append(f"Generated using: {project.get('backend_used', 'Unknown')}")
+        
+        self.output_text.insert('1.0', '\n'.join(output))
+    
+    HISTORY_BLOCK_SIZE = 100
+    
+    def load_history(self):
+        """Load and display history; the store is queried on the I/O executor"""
+        # Filters apply when a search or column filter is set
+        query = self.history_search_var.get().strip()
+        backend = self.history_backend_var.get()
+        difficulty = self.history_difficulty_var.get()
+        filters = {}
+        if query:
+            filters['query'] = query
+        if backend and backend != 'All':
+            filters['backend'] = backend
+        if difficulty and difficulty != 'All':
+            filters['difficulty'] = difficulty
+        
+        self.history_request = request = object()
+        
+        def query():
+            total = self.generator.count_history(**filters)
+            first_block = self.generator.history_page(0, self.HISTORY_BLOCK_SIZE, **filters)
+            backends = self.generator.history_field_values('backend')
+            difficulties = self.generator.history_field_values('difficulty')
+            self.post(show, total, first_block, backends, difficulties)
+        
+        def show(total, first_block, backends, difficulties):
+            if request is not self.history_request:
+                return  # a newer search superseded this one
+            self.history_filters = filters
+            self.history_version += 1
+            self.history_blocks.clear()
+            self.history_blocks[0] = first_block
+            self.history_total = total
+            self.history_offset = 0
+            self.history_backend_combo['values'] = ['All'] + backends
+            self.history_difficulty_combo['values'] = ['All'] + difficulties
+            self.render_history()
+            self.update_status(f"Loaded {self.history_total} history items")
+        
+        self.io_executor.submit(query)
+    
+    def history_rows(self, start: int, count: int) -> List[Optional[HistorySummary]]:
+        """Summary rows [start, start + count), a block at a time; None for rows still being fetched"""
+        rows = []
+        position = start
+        end = min(start + count, self.history_total)
+        while position < end:
+            block = position // self.HISTORY_BLOCK_SIZE
+            block_end = min((block + 1) * self.HISTORY_BLOCK_SIZE, end)
+            if block not in self.history_blocks:
+                self.fetch_history_block(block)
+                rows.extend([None] * (block_end - position))
+                position = block_end
+                continue
+            self.history_blocks.move_to_end(block)
+            first = position - block * self.HISTORY_BLOCK_SIZE
+            chunk = self.history_blocks[block][first:first + block_end - position]
+            rows.extend(chunk)
+            if len(chunk) < block_end - position:
+                break  # the store holds fewer rows than it counted
+            position = block_end
+        return rows
+    
+    def fetch_history_block(self, block: int):
+        """Load a block of summary rows on the I/O executor, re-rendering once it arrives"""
+        key = (self.history_version, block)
+        if key in self.history_pending:
+            return
+        self.history_pending.add(key)
+        filters = self.history_filters
+        
+        def fetch():
+            try:
+                rows = self.generator.history_page(block * self.HISTORY_BLOCK_SIZE, self.HISTORY_BLOCK_SIZE,
+                                                   **filters)
+            except Exception as e:
+                rows, error = [], e
+            else:
+                error = None
+            self.post(loaded, rows, error)
+        
+        def loaded(rows, error):
+            self.history_pending.discard(key)
+            if key[0] != self.history_version:
+                return  # the list was reloaded or shifted meanwhile
+            if error is not None:
+                self.update_status(f"Could not load history: {error}")
+                return
+            self.history_blocks[block] = rows
+            while len(self.history_blocks) > 8:
+                self.history_blocks.popitem(last=False)
+            start = block * self.HISTORY_BLOCK_SIZE
+            visible = range(self.history_offset, self.history_offset + self.history_visible_rows)
+            if start < visible.stop and start + self.HISTORY_BLOCK_SIZE > visible.start:
+                self.render_history()
+        
+        self.io_executor.submit(fetch)
+    
+    @staticmethod
+    def format_history_timestamp(timestamp: str) -> str:
+        """'YYYY-MM-DD HH:MM' from an ISO timestamp, without parsing it"""
+        return timestamp[:16].replace('T', ' ')
+    
+    def history_values(self, row: HistorySummary) -> tuple:
+        return (self.format_history_timestamp(row.timestamp or ''),
+                (row.name or 'Unnamed')[:30],
+                row.difficulty or 'N/A',
+                row.backend or 'N/A')
+    
+    def render_history(self):
+        """Rebuild the visible window of rows at history_offset"""
+        self.history_tree.delete(*self.history_tree.get_children())
+        rows = self.history_rows(self.history_offset, self.history_visible_rows)
+        for i, row in enumerate(rows, self.history_offset + 1):
+            if row is None:
+                self.history_tree.insert('', 'end', iid=f"loading-{i}", text=str(i), values=('', 'Loading...', '', ''))
+            else:
+                self.history_tree.insert('', 'end', iid=str(row.id), text=str(i), values=self.history_values(row))
+        
+        selected = str(self.history_selected_id)
+        if self.history_tree.exists(selected):
+            self.history_tree.selection_set(selected)
+        self.update_history_scrollbar()
+    
+    def update_history_scrollbar(self):
+        total = max(self.history_total, 1)
+        first = self.history_offset / total
+        last = min((self.history_offset + self.history_visible_rows) / total, 1.0)
+        self.history_scrollbar.set(first, last)
+    
+    def scroll_history(self, rows: int):
+        """Move the visible window by a number of rows"""
+        last_offset = max(self.history_total - self.history_visible_rows, 0)
+        offset = min(max(self.history_offset + rows, 0), last_offset)
+        if offset != self.history_offset:
+            self.history_offset = offset
+            self.render_history()
+    
+    def on_history_scroll(self, *args):
+        """Scrollbar command: 'moveto fraction' or 'scroll n units|pages'"""
+        if args[0] == 'moveto':
+            target = int(float(args[1]) * self.history_total)
+            self.scroll_history(target - self.history_offset)
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.history_visible_rows
+            self.scroll_history(amount)
+    
+    def on_history_wheel(self, event):
+        self.scroll_history(-3 if event.delta > 0 else 3)
+        return 'break'
+    
+    def on_history_key(self, event):
+        """Arrow keys scroll the window when the focus is on its first/last row"""
+        children = self.history_tree.get_children()
+        if not children:
+            return None
+        focus = self.history_tree.focus()
+        if event.keysym == 'Down' and focus == children[-1]:
+            self.scroll_history(1)
+        elif event.keysym == 'Up' and focus == children[0]:
+            self.scroll_history(-1)
+        else:
+            return None
+        children = self.history_tree.get_children()
+        if children:
+            target = children[-1] if event.keysym == 'Down' else children[0]
+            self.history_tree.focus(target)
+            self.history_tree.selection_set(target)
+        return 'break'
+    
+    def on_history_resize(self, event):
+        """Show as many rows as fit in the tree's current height"""
+        try:
+            row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        except (tk.TclError, ValueError):
+            row_height = 20
+        rows = max((event.height - 25) // row_height, 1)
+        if rows != self.history_visible_rows:
+            self.history_visible_rows = rows
+            self.history_offset = min(self.history_offset, max(self.history_total - rows, 0))
+            self.render_history()
+    
+    def add_history_row(self, entry: Dict):
+        """Show a newly saved suggestion without reloading the list"""
+        if self.history_filters:
+            return  # filtered views pick it up on the next search
+        if self.history_tree.exists(str(entry['id'])):
+            return  # a history load that finished after the save already shows (and counts) it
+        self.history_total += 1
+        self.history_version += 1
+        self.history_blocks.clear()
+        if self.history_offset > 0:
+            # Keep the rows the user is looking at in place
+            self.history_offset += 1
+            self.update_history_scrollbar()
+            return
+        self.history_tree.insert('', 0, iid=str(entry['id']), text='1',
+                                 values=self.history_values(_history_summary(entry)))
+        children = self.history_tree.get_children()
+        if len(children) > self.history_visible_rows:
+            self.history_tree.delete(*children[self.history_visible_rows:])
+        for i, item in enumerate(self.history_tree.get_children()[1:], 2):
+            self.history_tree.item(item, text=str(i))
+        self.update_history_scrollbar()
+    
+    def on_history_select(self, event):
+        """Handle history selection; the full entry is fetched on the I/O executor"""
+        selection = self.history_tree.selection()
+        if selection and not selection[0].startswith('loading-'):
+            entry_id = int(selection[0])
+            if entry_id == self.history_selected_id:
+                return
+            self.history_selected_id = entry_id
+            
+            def fetch():
+                try:
+                    entry = self.generator.get_history_entry(entry_id)
+                except Exception as e:
+                    self.post(self.update_status, f"Could not load history entry: {e}")
+                else:
+                    self.post(self.show_history_entry, entry_id, entry)
+            
+            self.io_executor.submit(fetch)
+    
+    def show_history_entry(self, entry_id: int, entry: Optional[Dict]):
+        """Show a fetched history entry in the details box, unless the selection moved on"""
+        if entry_id != self.history_selected_id:
+            return
+        if entry:
+            project = entry['project']
+            
+            # Display in details
+            self.history_details.delete('1.0', tk.END)
+            
+            details = []
+            details.append(f"Name: {project.get('name', 'N/A')}")
+            details.append(f"\nDescription: {project.get('description', 'N/A')}")
+            details.append(f"\nTechnologies: {', '.join(project.get('technologies', []))}")
+            details.append(f"\nDifficulty: {project.get('difficulty', 'N/A')}")
+            details.append(f"\nDuration: {project.get('estimated_duration', 'N/A')}")
+            
+            if project.get('key_features'):
+                details.append("\n\nKey Features:")
+                for feature in project.get('key_features', []):
+                    details.append(f"  • {feature}")
+            
+            self.history_details.insert('1.0', '\n'.join(details))
+    
+    def clear_history(self):
+        """Clear history after confirmation"""
+        if messagebox.askyesno("Confirm", "Clear all history?"):
+            try:
+                self.generator.clear_history()
+                self.load_history()
+                self.update_status("History cleared")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to clear history: {e}")
+    
+    def export_history_dialog(self):
+        """Export every idea matching the History tab's filters, streamed on the I/O executor"""
+        filters = dict(self.history_filters)
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Export History")
+        dialog.transient(self.root)
+        dialog.resizable(False, False)
+        frame = ttk.Frame(dialog, padding=15)
+        frame.pack(fill='both', expand=True)
+        
+        described = ', '.join(f"{key} '{value}'" for key, value in filters.items()) or "none"
+        ttk.Label(frame, text=f"Current filters: {described}").grid(row=0, column=0, columnspan=2, sticky='w')
+        
+        labels = {label: fmt for fmt, label in EXPORT_FORMATS.items()}
+        ttk.Label(frame, text="Format:").grid(row=1, column=0, sticky='w', pady=5)
+        format_var = tk.StringVar(value=EXPORT_FORMATS['jsonl'])
+        ttk.Combobox(frame, textvariable=format_var, values=list(labels), state='readonly',
+                     width=14).grid(row=1, column=1, sticky='w', pady=5)
+        ttk.Label(frame, text="Since (YYYY-MM-DD):").grid(row=2, column=0, sticky='w')
+        since_var = tk.StringVar()
+        ttk.Entry(frame, textvariable=since_var, width=16).grid(row=2, column=1, sticky='w')
+        ttk.Label(frame, text="Until (YYYY-MM-DD):").grid(row=3, column=0, sticky='w', pady=5)
+        until_var = tk.StringVar()
+        ttk.Entry(frame, textvariable=until_var, width=16).grid(row=3, column=1, sticky='w', pady=5)
+        
+        progress_bar = ttk.Progressbar(frame, mode='determinate', length=320)
+        progress_bar.grid(row=4, column=0, columnspan=2, sticky='ew', pady=(10, 5))
+        progress_label = ttk.Label(frame, text="")
+        progress_label.grid(row=5, column=0, columnspan=2, sticky='w')
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(row=6, column=0, columnspan=2, sticky='e', pady=(10, 0))
+        export_button = ttk.Button(button_frame, text="Export...")
+        export_button.pack(side='left', padx=5)
+        close_button = ttk.Button(button_frame, text="Close", command=dialog.destroy)
+        close_button.pack(side='left', padx=5)
+        
+        cancel_token = CancelToken()
+        
+        def show_progress(done, total):
+            if not dialog.winfo_exists():
+                return
+            progress_bar['maximum'] = max(total or 0, 1)
+            progress_bar['value'] = done
+            progress_label.config(text=f"{done} of {total} ideas written")
+        
+        def finished(token, result, error):
+            self.export_tokens.discard(token)
+            if error is None and not result['cancelled']:
+                self.update_status(f"Exported {result['exported']} ideas to {result['path']}")
+            if not dialog.winfo_exists():
+                return
+            close_button.config(text="Close", command=dialog.destroy)
+            export_button.config(state='normal')
+            if error is not None:
+                progress_label.config(text=f"Export failed: {error}")
+            elif result['cancelled']:
+                progress_label.config(text="Export cancelled; nothing was written")
+            else:
+                progress_label.config(text=f"{result['exported']} ideas written to {result['path']}")
+        
+        def cancel():
+            cancel_token.cancel()
+            close_button.config(state='disabled')
+        
+        def start():
+            nonlocal cancel_token
+            fmt = labels[format_var.get()]
+            file_path = filedialog.asksaveasfilename(
+                parent=dialog, defaultextension=f".{fmt}",
+                filetypes=[(f"{EXPORT_FORMATS[fmt]} files", f"*.{fmt}"), ("All files", "*.*")],
+                initialfile=f"projectflow_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}")
+            if not file_path:
+                return
+            cancel_token = token = CancelToken()
+            export_filters = dict(filters, since=since_var.get().strip(), until=until_var.get().strip())
+            export_button.config(state='disabled')
+            close_button.config(text="Cancel", command=cancel, state='normal')
+            progress_label.config(text="Counting ideas...")
+            
+            def run():
+                result, error = None, None
+                if token.cancelled:  # cancelled while it waited for a worker
+                    self.post(finished, token, {'cancelled': True}, None)
+                    return
+                try:
+                    result = self.generator.export_history(
+                        file_path, fmt, cancel_token=token,
+                        progress=lambda done, total: self.post(show_progress, done, total),
+                        **export_filters)
+                except Exception as e:
+                    error = e
+                self.post(finished, token, result, error)
+            
+            self.export_tokens.add(token)
+            self.io_executor.submit(run)
+        
+        export_button.config(command=start)
+        dialog.protocol("WM_DELETE_WINDOW", lambda: (cancel_token.cancel(), dialog.destroy()))
+    
+    def export_current(self, format_type):
+        """Export current project"""
+        if not self.current_project:
+            messagebox.showwarning("Warning", "No project to export. Generate a project first!")
+            return
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        default_name = f"project_{timestamp}.{format_type}"
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=f".{format_type}",
+            filetypes=[(f"{format_type.upper()} files", f"*.{format_type}"), ("All files", "*.*")],
+            initialfile=default_name
+        )
+        
+        if not file_path:
+            return
+        
+        try:
+            if format_type == 'json':
+                with open(file_path, 'w') as f:
+                    json.dump(self.current_project, f, indent=2)
+            
+            elif format_type == 'txt':
+                with open(file_path, 'w') as f:
+                    f.write(self.output_text.get('1.0', tk.END))
+            
+            elif format_type == 'md':
+                with open(file_path, 'w') as f:
+                    f.write(project_markdown(self.current_project))
+            
+            messagebox.showinfo("Success", f"Exported to {file_path}")
+            self.update_status(f"Exported to {format_type.upper()}")
+        
+        except Exception as e:
+            messagebox.showerror("Error", f"Export failed: {e}")